@@ -0,0 +1,240 @@
+"""Benchmark: end-to-end tools over a synthetic SQLite catalog, no live warehouse needed.
+
+Scenarios go through ``run_deterministic`` (or the CLI) against the SQLite adapter,
+optionally with a simulated per-round-trip latency. Each scenario runs in its own
+process so peak RSS is attributable; results report throughput, latency percentiles
+and peak RSS, and can be saved and compared against a baseline.
+
+Usage:
+    python benchmarks/bench_offline.py [--tables 10000] [--columns 50] [--fks 4] [--rows 100000]
+                                       [--latency-ms 0] [--iterations 5] [scenario ...]
+    python benchmarks/bench_offline.py --save baseline.json
+    python benchmarks/bench_offline.py --baseline baseline.json --tolerance 0.25
+"""
+
+import argparse
+import functools
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import build_catalog  # noqa: E402
+
+def percentile(samples, q: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    s = sorted(samples)
+    return s[max(0, math.ceil(q / 100 * len(s)) - 1)]
+
+def _peak_rss_mb() -> float:
+    """Peak RSS of this process or any finished child (the CLI scenario runs in children)."""
+    rss = max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+    return rss / 2**20 if sys.platform == "darwin" else rss / 1024
+
+# ---------- Scenarios ----------
+# Each returns a list of (seconds, items) samples; items are rows/columns/edges handled.
+
+def _run(action, payload):
+    from src import run_deterministic
+    return run_deterministic(action, payload)
+
+def list_schema(conn, a):
+    samples = []
+    for _ in range(a.iterations):
+        start = time.perf_counter()
+        out = _run("list_schema", {"conn": conn, "refresh": True})
+        samples.append((time.perf_counter() - start, out.count('"column_name"')))
+    return samples
+
+def list_schema_table(conn, a):
+    samples = []
+    for i in range(a.iterations * 20):
+        start = time.perf_counter()
+        _run("list_schema", {"conn": conn, "table": f"t{i * 7919 % a.tables:05d}", "refresh": True})
+        samples.append((time.perf_counter() - start, 1))
+    return samples
+
+def list_schema_cached(conn, a):
+    _run("list_schema", {"conn": conn})
+    samples = []
+    for _ in range(a.iterations * 20):
+        start = time.perf_counter()
+        _run("list_schema", {"conn": conn})
+        samples.append((time.perf_counter() - start, 1))
+    return samples
+
+def ontology(conn, a):
+    samples = []
+    for _ in range(a.iterations):
+        start = time.perf_counter()
+        out = _run("get_ontology", {"conn": conn, "refresh": True})
+        samples.append((time.perf_counter() - start, out.count('"from"')))
+    return samples
+
+def execute_query(conn, a):
+    samples = []
+    for _ in range(a.iterations):
+        start = time.perf_counter()
+        _run("execute_query", {"conn": conn, "sql": "SELECT * FROM events"})
+        samples.append((time.perf_counter() - start, a.rows))
+    return samples
+
+def execute_query_stream(conn, a):
+    samples = []
+    for _ in range(a.iterations):
+        start = time.perf_counter()
+        _run("execute_query", {"conn": conn, "sql": "SELECT * FROM events", "stream": True,
+                               "output": os.devnull, "batch_size": 10000})
+        samples.append((time.perf_counter() - start, a.rows))
+    return samples
+
+def _change(i, a):
+    return {"level": "column", "schema": "main", "table": f"t{i % a.tables:05d}",
+            "column": f"c{a.columns - 1:03d}", "comment": f"benchmark comment {i}"}
+
+def update_metadata(conn, a):
+    samples = []
+    for i in range(a.iterations * 20):
+        start = time.perf_counter()
+        _run("update_metadata", dict(_change(i, a), conn=conn))
+        samples.append((time.perf_counter() - start, 1))
+    return samples
+
+def bulk_update_metadata(conn, a):
+    samples = []
+    for it in range(a.iterations):
+        changes = [_change(it * 1000 + i, a) for i in range(1000)]
+        start = time.perf_counter()
+        _run("bulk_update_metadata", {"conn": conn, "changes": changes})
+        samples.append((time.perf_counter() - start, len(changes)))
+    return samples
+
+def query_render(conn, a):
+    from src import query_manager
+    from src.utils import build_postgres_filter_clause
+    samples = []
+    for i in range(a.iterations * 2000):
+        start = time.perf_counter()
+        query_manager.render("sqlite", "list_schema", **build_postgres_filter_clause("main", f"t{i:05d}"))
+        samples.append((time.perf_counter() - start, 1))
+    return samples
+
+def cli_startup(conn, a):
+    payload = json.dumps({"conn": conn, "table": "t00001"})
+    cmd = [sys.executable, os.path.join(ROOT, "main.py"), "--mode", "det", "--action", "list_schema",
+           "--payload_json", payload]
+    samples = []
+    for _ in range(a.iterations):
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, capture_output=True)
+        samples.append((time.perf_counter() - start, 1))
+    return samples
+
+SCENARIOS = {
+    "cli_startup": (cli_startup, "runs"),
+    "query_render": (query_render, "renders"),
+    "list_schema": (list_schema, "columns"),
+    "list_schema_table": (list_schema_table, "tables"),
+    "list_schema_cached": (list_schema_cached, "calls"),
+    "ontology": (ontology, "edges"),
+    "execute_query": (execute_query, "rows"),
+    "execute_query_stream": (execute_query_stream, "rows"),
+    "update_metadata": (update_metadata, "updates"),
+    "bulk_update_metadata": (bulk_update_metadata, "updates"),
+}
+
+def run_scenario(name, a) -> dict:
+    """Run one scenario in this process and summarise it."""
+    conn = {"type": "sqlite", "path": a.path}
+    if a.latency_ms:
+        from src import register_adapter
+        from src.adapters.sqlite import SQLiteAdapter
+        register_adapter("sqlite", functools.partial(SQLiteAdapter, latency=a.latency_ms / 1000))
+    fn, unit = SCENARIOS[name]
+    # Open the pooled connection (and let SQLite parse the catalog) outside the timings
+    _run("list_schema", {"conn": conn, "table": "t00000", "refresh": True})
+    samples = fn(conn, a)
+    times = [t for t, _ in samples]
+    total = sum(times)
+    return {
+        "scenario": name,
+        "ops": len(samples),
+        "ops_per_s": len(samples) / total,
+        "items_per_s": sum(n for _, n in samples) / total,
+        "unit": unit,
+        "p50_ms": percentile(times, 50) * 1000,
+        "p95_ms": percentile(times, 95) * 1000,
+        "p99_ms": percentile(times, 99) * 1000,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--tables", type=int, default=10000)
+    p.add_argument("--columns", type=int, default=50)
+    p.add_argument("--fks", type=int, default=4)
+    p.add_argument("--rows", type=int, default=100000)
+    p.add_argument("--latency-ms", type=float, default=0.0, help="simulated delay per round trip")
+    p.add_argument("--iterations", type=int, default=5)
+    p.add_argument("--save", help="write the results to this JSON file")
+    p.add_argument("--baseline", help="compare p50 latencies against a saved JSON file")
+    p.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown vs the baseline")
+    p.add_argument("--child", help=argparse.SUPPRESS)
+    p.add_argument("--path", help=argparse.SUPPRESS)
+    p.add_argument("scenarios", nargs="*", default=list(SCENARIOS))
+    a = p.parse_args()
+    if a.columns <= a.fks + 1:
+        # The metadata scenarios comment the last column, which must not be the id or a foreign key
+        p.error("--columns must be greater than --fks + 1")
+
+    if a.child:
+        print(json.dumps(run_scenario(a.child, a)))
+        return
+
+    start = time.perf_counter()
+    a.path = build_catalog(a.tables, a.columns, a.fks, a.rows)
+    print(f"Catalog: {a.tables:,} tables, {a.tables * a.columns:,} columns, ~{a.tables * a.fks:,} FKs, "
+          f"{a.rows:,} event rows ({time.perf_counter() - start:.1f}s)  latency {a.latency_ms} ms/round trip")
+    print(f"{'scenario':<22} {'ops/s':>10} {'items/s':>21} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'RSS MB':>8}")
+
+    base = {}
+    if a.baseline:
+        with open(a.baseline, encoding="utf-8") as f:
+            base = {r["scenario"]: r for r in json.load(f)["results"]}
+    results, regressions = [], []
+    for name in a.scenarios:
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", name, "--path", a.path,
+               "--tables", str(a.tables), "--columns", str(a.columns), "--fks", str(a.fks), "--rows", str(a.rows),
+               "--latency-ms", str(a.latency_ms), "--iterations", str(a.iterations)]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode:
+            print(f"{name:<22} FAILED: {proc.stderr.strip().splitlines()[-1]}")
+            regressions.append(name)
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        results.append(r)
+        note = ""
+        if name in base:
+            ratio = r["p50_ms"] / base[name]["p50_ms"]
+            note = f"  x{ratio:.2f} vs baseline"
+            if ratio > 1 + a.tolerance:
+                regressions.append(name)
+                note += " REGRESSION"
+        print(f"{name:<22} {r['ops_per_s']:>10,.1f} {r['items_per_s']:>12,.0f} {r['unit']:<8} "
+              f"{r['p50_ms']:>10.2f} {r['p95_ms']:>10.2f} {r['p99_ms']:>10.2f} {r['peak_rss_mb']:>8.0f}{note}")
+
+    if a.save:
+        with open(a.save, "w", encoding="utf-8") as f:
+            json.dump({"params": {k: getattr(a, k) for k in ("tables", "columns", "fks", "rows", "latency_ms")},
+                       "results": results}, f, indent=2)
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark: result-set JSON serialization, legacy ``default=str`` vs the column-typed encoders.
+
+Usage: python benchmarks/bench_serializer.py [--rows 1000000] [--batch-size 10000]
+"""
+
+import argparse
+import datetime
+import decimal
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.utils import serialize  # noqa: E402
+
+COLUMNS = ["id", "name", "amount", "price", "created_at", "day", "payload", "ref", "active", "note"]
+KINDS = ["native", "native", "decimal", "native", "datetime", "date", "bytes", "uuid", "native", "native"]
+
+def make_rows(n: int):
+    """Mixed-type rows shaped like a typical analytic result."""
+    rnd = random.Random(42)
+    base = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    return [
+        (
+            i,
+            f"customer_{i}",
+            decimal.Decimal(rnd.randint(0, 10**8)) / 100,
+            rnd.random() * 1000,
+            base + datetime.timedelta(seconds=i),
+            (base + datetime.timedelta(days=i % 365)).date(),
+            rnd.randbytes(12),
+            uuid.UUID(int=rnd.getrandbits(128)),
+            i % 3 == 0,
+            None if i % 5 else "flagged",
+        )
+        for i in range(n)
+    ]
+
+def legacy(rows, batch_size):
+    """The previous path: run_query's dict per row, then safe_json_dumps' single json.dumps(default=str)."""
+    return len(json.dumps([dict(zip(COLUMNS, r)) for r in rows], ensure_ascii=False, default=str))
+
+def typed(rows, batch_size, backend):
+    """Column-typed converters plus chunked encoding with the given backend."""
+    serialize.use_backend(backend)
+    encoder = serialize.RowEncoder(COLUMNS, KINDS)
+    batches = (encoder.rows(rows[s:s + batch_size]) for s in range(0, len(rows), batch_size))
+    return sum(len(chunk) for chunk in serialize.iter_json_chunks(batches, "ndjson"))
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    size = fn(*args)
+    return time.perf_counter() - start, size
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--batch-size", type=int, default=10000)
+    a = p.parse_args()
+
+    print(f"Generating {a.rows:,} rows...")
+    rows = make_rows(a.rows)
+
+    base, size = timed(legacy, rows, a.batch_size)
+    print(f"{'legacy json default=str':<28} {base:8.2f}s  {a.rows / base:>12,.0f} rows/s  {size / 2**20:8.1f} MiB")
+    backends = ["json"] + (["orjson"] if serialize.HAS_ORJSON else [])
+    for name in backends:
+        t, size = timed(typed, rows, a.batch_size, name)
+        print(f"{'typed + ' + name:<28} {t:8.2f}s  {a.rows / t:>12,.0f} rows/s  {size / 2**20:8.1f} MiB"
+              f"  x{base / t:.2f}")
+
+if __name__ == "__main__":
+    main()
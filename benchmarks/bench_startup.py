@@ -0,0 +1,96 @@
+"""Benchmark: CLI startup cost per mode, gated against time budgets and forbidden eager imports.
+
+Each mode's import path runs in a fresh interpreter; the reported time is the median
+wall time minus a bare ``python -c pass``. Exits non-zero when a budget is exceeded or
+a mode loads a module it must not (e.g. a database driver or LangChain for ``det``).
+
+Usage: python benchmarks/bench_startup.py [--runs 7] [--budget det=400] [--top 8]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# What each CLI mode imports before it does any real work
+MODES = {
+    "det": "from src import run_deterministic, Conn, QueryArgs",
+    "langchain": "from src import DatabaseAgentManager, AgentConfig",
+    "agent": "from agents import Agent, Runner",
+}
+
+# Default budgets in milliseconds above bare interpreter startup
+BUDGETS = {"det": 400.0, "langchain": 2500.0, "agent": 2500.0}
+
+# Modules a mode must never load at import time
+FORBIDDEN = {
+    "det": ["snowflake", "psycopg", "pyarrow", "pandas", "dotenv", "langchain_core", "langchain_openai", "agents"],
+    "langchain": ["snowflake", "psycopg", "pyarrow", "agents"],
+    "agent": [],
+}
+
+_CHECK = "import sys\n{stmt}\nprint(','.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+_IMPORTTIME = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (.*)$")
+
+def run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=ROOT, capture_output=True, text=True)
+
+def wall_ms(code: str, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = run(code)
+        times.append((time.perf_counter() - start) * 1000)
+        if proc.returncode:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return statistics.median(times)
+
+def top_imports(code: str, n: int):
+    """Heaviest top-level imports by cumulative time (``python -X importtime``)."""
+    rows = []
+    for line in run(code, "-X", "importtime").stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if m and not m.group(2).startswith(" "):
+            rows.append((int(m.group(1)), m.group(2).strip()))
+    return sorted(rows, reverse=True)[:n]
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--runs", type=int, default=7)
+    p.add_argument("--budget", action="append", default=[], metavar="MODE=MS", help="override a mode's budget")
+    p.add_argument("--top", type=int, default=0, help="show the N heaviest imports per mode")
+    p.add_argument("modes", nargs="*", default=list(MODES))
+    a = p.parse_args()
+
+    budgets = dict(BUDGETS)
+    for item in a.budget:
+        mode, _, ms = item.partition("=")
+        budgets[mode] = float(ms)
+
+    base = wall_ms("pass", a.runs)
+    print(f"{'interpreter':<12} {base:8.1f} ms")
+    failed = False
+    for mode in a.modes:
+        stmt = MODES[mode]
+        try:
+            ms = wall_ms(stmt, a.runs) - base
+        except RuntimeError as e:
+            print(f"{mode:<12} {'skipped':>8}    ({e})")
+            continue
+        loaded = set(run(_CHECK.format(stmt=stmt)).stdout.strip().split(","))
+        eager = [m for m in FORBIDDEN[mode] if m in loaded]
+        ok = ms <= budgets[mode] and not eager
+        failed |= not ok
+        note = f"  eager imports: {', '.join(eager)}" if eager else ""
+        print(f"{mode:<12} {ms:8.1f} ms  budget {budgets[mode]:7.1f} ms  {'ok' if ok else 'FAIL'}{note}")
+        for us, name in top_imports(stmt, a.top):
+            print(f"{'':<14}{us / 1000:8.1f} ms  {name}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
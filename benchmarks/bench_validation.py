@@ -0,0 +1,108 @@
+"""Benchmark: request validation cost in ``run_deterministic``, before and after prebuilt dispatch.
+
+Compares, per payload, the previous path (mapping dicts rebuilt per call, ``json.loads``
+then ``model_validate``; the LangChain path also built and dumped a ``Conn`` first)
+with ``validate_payload`` on raw JSON bytes and ``validate_payloads`` on a JSON array.
+Only validation is timed; no action runs.
+
+Usage: python benchmarks/bench_validation.py [--payloads 100000] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.models.schemas import (Conn, SchemaArgs, MetadataArgs, BulkMetadataArgs, QueryArgs,  # noqa: E402
+                                ExportArgs, OntologyArgs, OntologyQueryArgs, CrawlArgs)
+from src.tools import validate_payload, validate_payloads  # noqa: E402
+
+CONN = {"type": "postgres", "host": "db.internal", "port": 5432, "user": "svc", "password": "secret",
+        "dbname": "analytics"}
+
+def make_payloads(n: int):
+    """A mix of execute_query and list_schema payloads, as JSON text."""
+    out = []
+    for i in range(n):
+        if i % 2:
+            out.append(json.dumps({"conn": CONN, "sql": f"SELECT * FROM events WHERE id = {i}", "cache": True}))
+        else:
+            out.append(json.dumps({"conn": CONN, "schema": "public", "table": f"t{i:05d}"}))
+    return out
+
+def legacy_validate(action: str, payload: dict):
+    """The previous run_deterministic: both dicts rebuilt on every call, then model_validate."""
+    mapping = {a: None for a in ("list_schema", "update_metadata", "bulk_update_metadata", "execute_query",
+                                 "export_query", "get_ontology", "query_ontology", "view_current_ontology",
+                                 "crawl_catalog")}
+    mapping[action]
+    model = {"list_schema": SchemaArgs, "update_metadata": MetadataArgs,
+             "bulk_update_metadata": BulkMetadataArgs,
+             "execute_query": QueryArgs, "export_query": ExportArgs,
+             "get_ontology": SchemaArgs,
+             "query_ontology": OntologyQueryArgs,
+             "view_current_ontology": OntologyArgs,
+             "crawl_catalog": CrawlArgs}[action]
+    return model.model_validate(payload)
+
+def action_of(i: int) -> str:
+    return "execute_query" if i % 2 else "list_schema"
+
+def cli_legacy(payloads):
+    for i, p in enumerate(payloads):
+        legacy_validate(action_of(i), json.loads(p))
+
+def cli_raw(payloads):
+    for i, p in enumerate(payloads):
+        validate_payload(action_of(i), p)
+
+def langchain_legacy(payloads):
+    for i, p in enumerate(payloads):
+        d = json.loads(p)
+        conn = d.pop("conn")
+        payload = {"conn": Conn(**conn).model_dump(by_alias=True), **d}
+        legacy_validate(action_of(i), payload)
+
+def langchain_single(payloads):
+    for i, p in enumerate(payloads):
+        d = json.loads(p)
+        validate_payload(action_of(i), {"conn": d.pop("conn"), **d})
+
+def batch_raw(payloads):
+    # One JSON array per action, validated in one pass each
+    for parity, action in ((0, "list_schema"), (1, "execute_query")):
+        validate_payloads(action, ("[" + ",".join(payloads[parity::2]) + "]").encode("utf-8"))
+
+SCENARIOS = [
+    ("cli: json.loads + model_validate (legacy)", cli_legacy),
+    ("cli: model_validate_json on raw bytes", cli_raw),
+    ("langchain: Conn + model_dump + validate (legacy)", langchain_legacy),
+    ("langchain: single validation", langchain_single),
+    ("batch: TypeAdapter on a JSON array", batch_raw),
+]
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--payloads", type=int, default=100000)
+    p.add_argument("--repeat", type=int, default=3)
+    a = p.parse_args()
+    payloads = make_payloads(a.payloads)
+    print(f"{'scenario':<50} {'best s':>8} {'us/payload':>11} {'speedup':>8}")
+    baseline = {}
+    for name, fn in SCENARIOS:
+        best = min(_timed(fn, payloads) for _ in range(a.repeat))
+        group = name.split(":")[0]
+        baseline.setdefault(group if group != "batch" else "cli", best)
+        ref = baseline[group if group != "batch" else "cli"]
+        print(f"{name:<50} {best:>8.3f} {best / len(payloads) * 1e6:>11.2f} {ref / best:>7.2f}x")
+
+def _timed(fn, payloads) -> float:
+    start = time.perf_counter()
+    fn(payloads)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    main()
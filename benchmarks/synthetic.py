@@ -0,0 +1,65 @@
+"""Synthetic SQLite catalogs for the offline benchmarks.
+
+``build_catalog`` creates ``tables`` tables of ``columns`` columns each, where every
+table declares ``fks`` foreign keys to earlier tables, plus an ``events`` table of
+``rows`` mixed-type rows for query/serialization benchmarks. Files are cached by
+their parameters, so repeated runs skip the build.
+"""
+
+import datetime
+import os
+import random
+import sqlite3
+import tempfile
+
+_TYPES = ["INTEGER", "TEXT", "REAL", "NUMERIC", "TIMESTAMP", "VARCHAR(64)", "BOOLEAN", "DATE"]
+
+def catalog_path(tables: int, columns: int, fks: int, rows: int, directory: str = None) -> str:
+    directory = directory or os.path.join(tempfile.gettempdir(), "db_agent_bench")
+    return os.path.join(directory, f"catalog_t{tables}_c{columns}_f{fks}_r{rows}.sqlite")
+
+def _table_ddl(i: int, columns: int, fks: int, rnd: random.Random) -> str:
+    cols = ["id INTEGER PRIMARY KEY"]
+    refs = sorted(rnd.sample(range(i), min(fks, i))) if i else []
+    for k, target in enumerate(refs):
+        cols.append(f"fk_{k} INTEGER REFERENCES t{target:05d}(id)")
+    for c in range(len(cols), columns):
+        cols.append(f"c{c:03d} {_TYPES[(i + c) % len(_TYPES)]}")
+    return f"CREATE TABLE t{i:05d} ({', '.join(cols)})"
+
+def _event_rows(rows: int, rnd: random.Random):
+    base = datetime.datetime(2024, 1, 1)
+    for i in range(rows):
+        yield (
+            i,
+            f"customer_{i}",
+            round(rnd.random() * 10000, 2),
+            (base + datetime.timedelta(seconds=i)).isoformat(),
+            rnd.randbytes(12),
+            i % 3 == 0,
+            None if i % 5 else "flagged",
+        )
+
+def build_catalog(tables: int = 10000, columns: int = 50, fks: int = 4, rows: int = 100000,
+                  directory: str = None, seed: int = 42) -> str:
+    """Create (or reuse) a synthetic catalog and return its path."""
+    path = catalog_path(tables, columns, fks, rows, directory)
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    rnd = random.Random(seed)
+    cn = sqlite3.connect(tmp)
+    try:
+        cn.execute("PRAGMA journal_mode=OFF")
+        cn.execute("PRAGMA synchronous=OFF")
+        with cn:
+            for i in range(tables):
+                cn.execute(_table_ddl(i, columns, fks, rnd))
+            cn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, name TEXT, amount REAL, "
+                       "created_at TEXT, payload BLOB, active BOOLEAN, note TEXT)")
+            cn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", _event_rows(rows, rnd))
+    finally:
+        cn.close()
+    os.replace(tmp, path)
+    return path
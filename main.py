@@ -1,26 +1,30 @@
 """Main entry point for the database agent system."""
 
-import json
 import argparse
 import asyncio
 import os
-from agents import Agent, Runner
+import sys
+import typing
 
-from src import run_deterministic, DatabaseAgentManager, AgentConfig
+# Heavy stacks (the agents SDK, LangChain, database drivers) are imported by the mode that needs them.
 
 # ---------- Agent ----------
-agent = Agent(
-    name="DB-Agent",
-    instructions=(
-        "You are a database agent. If the user asks to list schema, update metadata, execute a query or get ontology, "
-        "you must ALWAYS call the correct tool and return JSON."
-    ),
-    tools=[],  # Temporarily empty to avoid schema issues
-)
+def build_agent():
+    """Create the conversational agent (imports the agents SDK)."""
+    from agents import Agent
+    return Agent(
+        name="DB-Agent",
+        instructions=(
+            "You are a database agent. If the user asks to list schema, update metadata, execute a query or get ontology, "
+            "you must ALWAYS call the correct tool and return JSON."
+        ),
+        tools=[],  # Temporarily empty to avoid schema issues
+    )
 
 # ---------- LangChain Agent Manager ----------
 def get_langchain_agent():
     """Initialize and return the LangChain database agent manager."""
+    from src import DatabaseAgentManager, AgentConfig
     try:
         config = AgentConfig()
         return DatabaseAgentManager(config.openai_api_key)
@@ -32,22 +36,66 @@ def get_langchain_agent():
 # ---------- CLI Example ----------
 if __name__ == "__main__":
     p = argparse.ArgumentParser(description="Database Agent System with LangChain Integration")
-    p.add_argument("--mode", choices=["agent","det","langchain"], default="det",
-                   help="Execution mode: agent (conversational), det (deterministic), langchain (AI-powered)")
-    p.add_argument("--action", choices=["list_schema","update_metadata","execute_query","get_ontology","view_current_ontology"],
+    p.add_argument("--mode", choices=["agent","det","langchain","serve"], default="det",
+                   help="Execution mode: agent (conversational), det (deterministic), langchain (AI-powered), "
+                        "serve (long-running server)")
+    from src.tools import Action  # det mode needs src.tools anyway; the choices stay in sync with it
+    p.add_argument("--action", choices=typing.get_args(Action),
                    help="Action to perform (required for det mode)")
     p.add_argument("--payload_json", help="JSON payload with connection and parameters")
     p.add_argument("--request", help="Natural language request (required for langchain mode)")
     p.add_argument("--api_key", help="OpenAI API key (optional, can use OPENAI_API_KEY env var)")
+    p.add_argument("--transport", choices=["http", "stdio"], default="http",
+                   help="Server transport for serve mode: local HTTP or JSON-RPC over stdin/stdout")
+    p.add_argument("--host", default="127.0.0.1", help="HTTP bind address for serve mode")
+    p.add_argument("--port", type=int, default=8765, help="HTTP port for serve mode")
+    p.add_argument("--workers", type=int, default=8, help="Concurrent requests in serve mode")
+    p.add_argument("--max_pending", type=int, default=64, help="Queued requests before serve mode pushes back")
+    p.add_argument("--trace", choices=["summary", "json"],
+                   help="Instrumentation to stderr: latency histogram summary at exit, or one JSON line per span")
     
     a = p.parse_args()
+
+    if a.trace:
+        from src.instrumentation import add_sink, HistogramSink, JSONLogSink
+        if a.trace == "json":
+            add_sink(JSONLogSink(counters=True))
+        else:
+            import atexit
+            sink = add_sink(HistogramSink())
+            atexit.register(lambda: print(sink.format(), file=sys.stderr))
     
     if a.mode == "det":
         if not a.action or not a.payload_json:
             print("Error: --action and --payload_json are required for deterministic mode")
             exit(1)
-        print(run_deterministic(a.action, json.loads(a.payload_json)))
+        payload = a.payload_json
+        if a.action == "submit_query":
+            # In-process jobs die with this one-shot process; only detached queries survive it
+            from src import get_adapter, validate_payload
+            payload = validate_payload(a.action, payload)  # run_deterministic reuses the model
+            if not get_adapter(payload.conn).detached_queries:
+                print("Error: submit_query in deterministic mode needs a dialect that runs queries detached "
+                      "(Snowflake); use server mode or the Python API for other dialects")
+                exit(1)
+        progress = None
+        if a.action == "export_query":
+            def progress(stats):
+                done = f"{stats['rows']} rows" if stats["rows"] is not None else f"{stats['bytes']} bytes"
+                print(f"exported {done} ({stats['files']} file(s))", file=sys.stderr)
+        from src import run_deterministic
+        result = run_deterministic(a.action, payload, progress)
+        if result:
+            print(result)
         
+    elif a.mode == "serve":
+        from src.server import ActionServer, ServerConfig, serve_http, serve_stdio
+        app = ActionServer(ServerConfig(workers=a.workers, max_pending=a.max_pending), openai_api_key=a.api_key)
+        if a.transport == "stdio":
+            serve_stdio(app)
+        else:
+            serve_http(app, a.host, a.port)
+
     elif a.mode == "langchain":
         if not a.request:
             print("Error: --request is required for langchain mode")
@@ -68,5 +116,6 @@ if __name__ == "__main__":
             print("Error: --payload_json is required for agent mode")
             exit(1)
         # conversational mode (agent decides the tool)
-        result = asyncio.run(Runner.run(agent, input=a.payload_json))
+        from agents import Runner
+        result = asyncio.run(Runner.run(build_agent(), input=a.payload_json))
         print(result.final_output)
\ No newline at end of file
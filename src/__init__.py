@@ -1,42 +1,55 @@
-"""Database Agent System."""
+"""Database Agent System.
 
-from .models import Conn, SchemaArgs, MetadataArgs, QueryArgs, OntologyArgs, DBType
-from .adapters import DBAdapter, get_adapter
-from .tools import list_schema, update_metadata, execute_query, get_ontology, view_current_ontology, run_deterministic
-from .utils import ident, safe_json_dumps, build_filter_clause, build_postgres_filter_clause
-from .queries import query_manager
-from .agents import DatabaseAgent, DatabaseAgentManager, is_langchain_available
-from .agents.config import AgentConfig, AgentUtils
+Public names are resolved lazily (PEP 562): importing ``src`` is cheap, and each
+subpackage (adapters and their drivers, pyarrow, the LangChain stack) is only
+imported when one of its names is first used.
+"""
 
-__all__ = [
+import importlib
+
+# Public names by defining subpackage
+_EXPORTS = {
     # Models
-    "Conn",
-    "SchemaArgs", 
-    "MetadataArgs",
-    "QueryArgs",
-    "OntologyArgs",
-    "DBType",
+    ".models": ["Conn", "SchemaArgs", "CrawlArgs", "MetadataArgs", "MetadataChange", "BulkMetadataArgs", "QueryArgs",
+                "SubmitQueryArgs", "QueryHandleArgs", "ExportArgs", "OntologyArgs", "SaveOntologyArgs", "OntologyQueryArgs", "DBType"],
     # Adapters
-    "DBAdapter",
-    "get_adapter",
+    ".adapters": ["DBAdapter", "AsyncDBAdapter", "statement_timeout", "get_adapter", "get_async_adapter", "close_adapters",
+                  "aclose_adapters", "register_adapter", "PoolConfig"],
     # Tools
-    "list_schema",
-    "update_metadata", 
-    "execute_query",
-    "get_ontology",
-    "view_current_ontology",
-    "run_deterministic",
+    ".tools": ["list_schema", "update_metadata", "bulk_update_metadata", "execute_query", "export_query",
+               "get_ontology", "query_ontology", "view_current_ontology", "save_ontology", "crawl_catalog", "iter_crawl",
+               "submit_query", "query_status", "cancel_query", "fetch_query",
+               "run_deterministic", "arun_deterministic", "arun_batch", "validate_payload",
+               "validate_payloads"],
     # Utils
-    "ident",
-    "safe_json_dumps",
-    "build_filter_clause",
-    "build_postgres_filter_clause",
+    ".utils": ["ident", "conn_fingerprint", "safe_json_dumps", "use_json_backend", "write_json_stream",
+               "write_arrow_stream", "to_numpy", "to_pandas", "build_filter_clause", "build_postgres_filter_clause"],
     # Query Management
-    "query_manager",
+    ".queries": ["query_manager"],
+    # Caching
+    ".cache": ["schema_cache", "SchemaCache", "result_cache", "ResultCache"],
+    # Ontology
+    ".ontology": ["OntologyGraph"],
+    # Instrumentation
+    ".instrumentation": ["add_sink", "remove_sink", "HistogramSink", "JSONLogSink", "OTelSink"],
+    # Server mode
+    ".server": ["ActionServer", "ServerConfig", "serve_http", "serve_stdio"],
     # LangChain Agents
-    "DatabaseAgent",
-    "DatabaseAgentManager",
-    "is_langchain_available",
-    "AgentConfig",
-    "AgentUtils"
-]
+    ".agents": ["DatabaseAgent", "DatabaseAgentManager", "is_langchain_available"],
+    ".agents.config": ["AgentConfig", "AgentUtils"],
+}
+
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_MODULE_OF)
+
+def __getattr__(name):
+    module = _MODULE_OF.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,6 +1,8 @@
 """Adaptadores de base de datos."""
 
-from .base import DBAdapter
-from .factory import get_adapter
+from .base import DBAdapter, AsyncDBAdapter, statement_timeout
+from .factory import get_adapter, get_async_adapter, close_adapters, aclose_adapters, evict_idle_connections, register_adapter
+from .pool import ConnectionPool, AsyncConnectionPool, PoolConfig
 
-__all__ = ["DBAdapter", "get_adapter"]
+__all__ = ["DBAdapter", "AsyncDBAdapter", "statement_timeout", "get_adapter", "get_async_adapter", "close_adapters",
+           "aclose_adapters", "evict_idle_connections", "register_adapter", "ConnectionPool", "AsyncConnectionPool", "PoolConfig"]
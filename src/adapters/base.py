@@ -1,28 +1,564 @@
 """Clase base para adaptadores de base de datos."""
 
+import contextlib
+import contextvars
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
-from ..models.schemas import MetadataArgs
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple
+from ..models.schemas import MetadataArgs, MetadataChange
+from .jobs import QueryCancelled, QueryJob, QueryJobs
+from .pool import AsyncConnectionPool, ConnectionPool, PoolConfig
+from ..utils.arrow import pin_types, rows_to_record_batch, record_batches_to_table
+from ..utils.export import ProgressCallback, export_batches
+from ..utils.serialize import RowEncoder
+from ..instrumentation import count, span
+from ..queries import query_manager
+from ..utils import build_keyset_clause, build_postgres_filter_clause
+
+# Consulta paginada y columnas de su clave de orden, por modo de list_schema
+_PAGES = {
+    "columns": ("list_schema_page", ("table_schema", "table_name", "ordinal_position")),
+    "tables": ("list_tables_page", ("table_schema", "table_name")),
+}
+
+# Límite de duración (segundos) de las sentencias ejecutadas en el contexto actual
+_statement_timeout: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar(
+    "db_agent_statement_timeout", default=None)
+
+@contextlib.contextmanager
+def statement_timeout(seconds: Optional[float]):
+    """Limita a ``seconds`` cada sentencia ejecutada dentro del bloque (None: sin límite).
+
+    El límite lo aplica el servidor (ver ``DBAdapter._timeout_options``).
+    """
+    token = _statement_timeout.set(seconds)
+    try:
+        yield
+    finally:
+        _statement_timeout.reset(token)
 
 class DBAdapter(ABC):
     """Interfaz base para adaptadores de base de datos."""
-    
+
+    db_type = "db"  # etiqueta de las métricas de instrumentación
+    statement_timeouts = False  # el servidor aplica ``statement_timeout``
+    detached_queries = False  # lo enviado con submit_query sobrevive al proceso que lo envió
+    pool_config: Optional[PoolConfig] = None
+    _pool: Optional[ConnectionPool] = None
+    _pool_lock = threading.Lock()
+
+    def _connect(self):
+        """Abre una conexión nueva con el driver."""
+        raise NotImplementedError
+
+    def _check_connection(self, cn) -> bool:
+        """Indica si una conexión inactiva del pool sigue siendo utilizable."""
+        return not getattr(cn, "closed", False)
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """Pool de conexiones del adaptador, creado en el primer uso."""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ConnectionPool(self._timed_connect, self._check_connection,
+                                                self.pool_config, name=self.db_type)
+        return self._pool
+
+    def _timed_connect(self):
+        with span("db.connect", db=self.db_type):
+            return self._connect()
+
+    def _timed_execute(self, cur, *args, **kwargs):
+        """``cur.execute`` registrando la fase ``db.execute`` y aplicando el límite de ``statement_timeout``."""
+        seconds = _statement_timeout.get()
+        if seconds is not None:
+            self._require_timeouts()
+            kwargs.update(self._timeout_options(cur, seconds))
+        with span("db.execute", db=self.db_type):
+            return cur.execute(*args, **kwargs)
+
+    def _require_timeouts(self) -> None:
+        if not self.statement_timeouts:
+            raise ValueError(f"Statement timeouts are not supported for {self.db_type}")
+
+    def _timeout_options(self, cur, seconds: float) -> Dict[str, Any]:
+        """Prepara el límite de duración de la próxima sentencia del cursor.
+
+        Devuelve argumentos extra para ``cur.execute``; puede ejecutar antes una
+        sentencia de configuración en la misma transacción.
+        """
+        return {}
+
+    def _fetchall(self, cur) -> list:
+        """``cur.fetchall`` registrando la fase ``db.fetch`` y las filas leídas."""
+        with span("db.fetch", db=self.db_type) as sp:
+            rows = cur.fetchall()
+            sp.set("rows", len(rows))
+        count("db.rows", len(rows), db=self.db_type)
+        return rows
+
+    def _fetchmany(self, cur, size: int) -> list:
+        """``cur.fetchmany`` registrando la fase ``db.fetch`` y las filas leídas."""
+        with span("db.fetch", db=self.db_type) as sp:
+            rows = cur.fetchmany(size)
+            sp.set("rows", len(rows))
+        count("db.rows", len(rows), db=self.db_type)
+        return rows
+
+    def _conn(self):
+        """Presta una conexión del pool como context manager."""
+        return self.pool.connection()
+
+    def close(self) -> None:
+        """Cierra todas las conexiones del pool."""
+        if self._pool is not None:
+            self._pool.close()
+
+    @staticmethod
+    def _fk_edges(rows) -> Dict[str, Any]:
+        """Convierte filas de claves foráneas en la lista de aristas de la ontología."""
+        return {"edges": [{"from": f"{r[0]}.{r[1]}.{r[2]}", "to": f"{r[3]}.{r[4]}.{r[5]}"} for r in rows]}
+
+    def list_schemas(self) -> List[Tuple[str, str]]:
+        """Pares (base de datos, esquema) visibles para la conexión, para recorrer el catálogo."""
+        raise NotImplementedError
+
+    def _execute_bound(self, cur, query) -> None:
+        """Ejecuta una consulta renderizada, pasando parámetros solo si los tiene."""
+        if query.params:
+            self._timed_execute(cur, query.sql, query.params)
+        else:
+            self._timed_execute(cur, query.sql)
+
+    def _query_rows(self, query) -> List[Dict[str, Any]]:
+        """Ejecuta una consulta renderizada y devuelve las filas como diccionarios (claves en minúsculas)."""
+        with self._conn() as cn:
+            cur = cn.cursor()
+            try:
+                self._execute_bound(cur, query)
+                cols = [d[0].lower() for d in cur.description]
+                return [dict(zip(cols, r)) for r in self._fetchall(cur)]
+            finally:
+                cur.close()
+
+    def query_rows(self, query_name: str, **params) -> List[Dict[str, Any]]:
+        """Ejecuta una consulta con nombre del dialecto y devuelve sus filas como diccionarios."""
+        return self._query_rows(query_manager.render(self.db_type, query_name, **params))
+
+    def execute_statements(self, statements: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Ejecuta sentencias con nombre ``(consulta, parámetros)`` en orden y en una sola transacción.
+
+        Con autocommit (Snowflake) cada sentencia se confirma por separado.
+        """
+        with self._conn() as cn:
+            cur = cn.cursor()
+            try:
+                for name, params in statements:
+                    self._execute_bound(cur, query_manager.render(self.db_type, name, **params))
+            finally:
+                cur.close()
+
+    def ontology_version(self) -> Optional[Tuple[Any, Any]]:
+        """``(id, created_at)`` del grafo de conocimiento más reciente, sin leer el documento; None si no hay."""
+        rows = self._query_rows(query_manager.render(self.db_type, "current_ontology_version"))
+        return (rows[0]["id"], rows[0]["created_at"]) if rows else None
+
+    def ontology_document(self, version_id: Any) -> Optional[Dict[str, Any]]:
+        """Fila ``knowledge_graph``/``id``/``created_at`` de una versión guardada del grafo."""
+        rows = self._query_rows(query_manager.render(self.db_type, "ontology_by_id", id=version_id))
+        return rows[0] if rows else None
+
+    def knowledge_graph_tables(self) -> Set[str]:
+        """Tablas del grafo de conocimiento que existen: ``json_storage`` (la heredada) y/o ``graph_versions``."""
+        tables = set()
+        for row in self._query_rows(query_manager.render(self.db_type, "knowledge_graph_tables")):
+            name = str(row["table_name"]).lower()
+            tables.add("json_storage" if name.endswith("json_storage") else "graph_versions")
+        return tables
+
+    @staticmethod
+    def fold_identifier(name: str) -> str:
+        """Nombre de columna tal como lo devuelve el dialecto para un alias sin comillas."""
+        return name.lower()
+
+    def _page_filters(self, database=None, schema=None, table=None) -> Dict[str, Any]:
+        """Filtros de las consultas paginadas del catálogo (esquema y tabla por defecto)."""
+        return build_postgres_filter_clause(schema, table)
+
+    def catalog_page(self, mode: str = "columns", database=None, schema=None, table=None,
+                     after: Optional[List[Any]] = None, limit: int = 1000
+                     ) -> Tuple[List[Dict[str, Any]], Optional[List[Any]]]:
+        """Una página del catálogo (``columns`` o ``tables``) ordenada por su clave, posterior a ``after``.
+
+        Devuelve las filas y la clave de la última fila, o None si no hay más páginas.
+        """
+        name, keys = _PAGES[mode]
+        query = query_manager.render(self.db_type, name, limit=limit + 1,
+                                     **self._page_filters(database, schema, table),
+                                     **build_keyset_clause(list(keys), after))
+        with self._conn() as cn:
+            cur = cn.cursor()
+            try:
+                self._execute_bound(cur, query)
+                cols = [d[0] for d in cur.description]
+                rows = self._fetchall(cur)
+            finally:
+                cur.close()
+        lower = [c.lower() for c in cols]
+        positions = [lower.index(k) for k in keys]
+        last = list(rows[limit - 1][i] for i in positions) if len(rows) > limit else None
+        # La posición ordinal solo sirve de clave: las filas conservan la forma de list_schema
+        keep = [i for i, c in enumerate(lower) if c != "ordinal_position"]
+        return [{cols[i]: r[i] for i in keep} for r in rows[:limit]], last
+
+    def table_signatures(self, database=None, schema=None) -> Dict[str, str]:
+        """Marcador de cambios por tabla ("schema.tabla" -> firma) para refrescos incrementales."""
+        raise NotImplementedError
+
+    def ontology_for_tables(self, tables: List[str], database=None) -> Dict[str, Any]:
+        """Relaciones FK declaradas por las tablas indicadas ("schema.tabla")."""
+        raise NotImplementedError
+
+    # ----- consultas en segundo plano -----
+
+    _jobs: Optional[QueryJobs] = None
+
+    @property
+    def jobs(self) -> QueryJobs:
+        """Consultas enviadas con ``submit_query`` que siguen en este proceso."""
+        if self._jobs is None:
+            with self._pool_lock:
+                if self._jobs is None:
+                    self._jobs = QueryJobs()
+        return self._jobs
+
+    def _backend_id(self, cn) -> Optional[Any]:
+        """Identificador de la sesión en el servidor (PID en PostgreSQL), parte del handle."""
+        return None
+
+    def _interrupt(self, cn, cur) -> None:
+        """Interrumpe desde otro hilo la sentencia en curso; por defecto la cancelación espera al siguiente lote."""
+
+    def _end_job(self, cn) -> None:
+        """Deshace lo que ``_interrupt`` dejó en la conexión, antes de devolverla al pool."""
+
+    def _run_job(self, job: QueryJob, timeout: Optional[float], batch_size: int) -> None:
+        try:
+            with statement_timeout(timeout), self._conn() as cn:
+                job.backend_id = self._backend_id(cn)
+                cur = cn.cursor()
+                job.interrupt = lambda: self._interrupt(cn, cur)
+                job.attached.set()
+                try:
+                    if job.cancel_requested:  # cancelada antes de empezar: no hay nada que interrumpir
+                        raise QueryCancelled("Query cancelled")
+                    self._timed_execute(cur, job.sql)
+                    rows: List[Dict[str, Any]] = []
+                    if cur.description:
+                        for batch in self._json_rows(cur, batch_size):
+                            if job.cancel_requested:
+                                raise QueryCancelled("Query cancelled")
+                            rows.extend(batch)
+                finally:
+                    job.detach()  # bajo el lock del job: ninguna cancelación llega a la conexión ya liberada
+                    cur.close()
+                    self._end_job(cn)
+            job.finish(rows)
+        except BaseException as e:
+            job.fail(e)
+
+    def submit_query(self, sql: str, timeout: Optional[float] = None, batch_size: int = 10000) -> str:
+        """Lanza una consulta en segundo plano y devuelve su handle sin esperar el resultado.
+
+        La consulta ocupa una conexión del pool hasta terminar; las filas quedan en
+        memoria hasta ``fetch_query``.
+        """
+        if timeout is not None:
+            self._require_timeouts()
+        job = QueryJob(sql)
+        threading.Thread(target=self._run_job, args=(job, timeout, batch_size),
+                         name=f"db-agent-query-{job.token}", daemon=True).start()
+        job.attached.wait()
+        self.jobs.add(job)
+        return job.handle
+
+    def query_status(self, handle: str) -> Dict[str, Any]:
+        """Estado de una consulta enviada: ``running``, ``succeeded``, ``failed`` o ``cancelled``."""
+        return self.jobs.get(handle).status()
+
+    def cancel_query(self, handle: str) -> bool:
+        """Pide cancelar una consulta enviada; False si ya había terminado."""
+        return self.jobs.get(handle).cancel()
+
+    def fetch_query(self, handle: str, batch_size: int = 10000) -> List[Dict[str, Any]]:
+        """Filas (listas para JSON) de una consulta terminada; después se liberan."""
+        job = self.jobs.get(handle)
+        if not job.done.is_set():
+            raise ValueError(f"Query {handle} is still running")
+        if job.state != "succeeded":
+            raise ValueError(f"Query {handle} {job.state}: {job.error}")
+        return self.jobs.pop(handle).rows
+
+    def _stream_cursor(self, cn, batch_size: int):
+        """Cursor usado por stream_query; los adaptadores pueden usar cursores de servidor."""
+        return cn.cursor()
+
+    def _column_kinds(self, description) -> Optional[List[Optional[str]]]:
+        """Tipo de valor por columna según ``cursor.description`` (ver ``KIND_CONVERTERS``); None para deducirlo."""
+        return None
+
+    def _json_rows(self, cur, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """Lotes de filas listas para serializar, con un conversor precalculado por columna."""
+        encoder = RowEncoder([d[0] for d in cur.description], self._column_kinds(cur.description))
+        while True:
+            rows = self._fetchmany(cur, batch_size)
+            if not rows:
+                break
+            with span("serialize.encode", rows=len(rows)):
+                batch = encoder.rows(rows)
+            yield batch
+
+    def stream_query(self, sql: str, batch_size: int = 10000,
+                     json_ready: bool = False) -> Iterator[List[Dict[str, Any]]]:
+        """Ejecuta una consulta y entrega las filas en lotes de ``batch_size``.
+
+        Con ``json_ready`` los valores quedan listos para el backend JSON activo.
+        """
+        with self._conn() as cn:
+            cur = self._stream_cursor(cn, batch_size)
+            try:
+                self._timed_execute(cur, sql)
+                if not cur.description:
+                    return
+                if json_ready:
+                    yield from self._json_rows(cur, batch_size)
+                    return
+                cols = [d[0] for d in cur.description]
+                while True:
+                    rows = self._fetchmany(cur, batch_size)
+                    if not rows:
+                        break
+                    yield [dict(zip(cols, r)) for r in rows]
+            finally:
+                cur.close()
+
+    def run_query_json(self, sql: str, batch_size: int = 10000) -> List[Dict[str, Any]]:
+        """Como ``run_query`` pero con los valores listos para el backend JSON activo."""
+        with self._conn() as cn:
+            cur = cn.cursor()
+            try:
+                self._timed_execute(cur, sql)
+                if not cur.description:
+                    return []
+                return [row for batch in self._json_rows(cur, batch_size) for row in batch]
+            finally:
+                cur.close()
+
+    def _arrow_cursor(self, cn, batch_size: int):
+        """Cursor usado por arrow_batches; por defecto el mismo que stream_query."""
+        return self._stream_cursor(cn, batch_size)
+
+    def _arrow_types(self, description) -> Optional[List[Any]]:
+        """Tipos Arrow por columna según ``cursor.description`` (None para inferirlos)."""
+        return None
+
+    def _arrow_from_rows(self, cur, batch_size: int) -> Iterator[Any]:
+        """Convierte a lotes Arrow las filas pendientes de un cursor ya ejecutado.
+
+        Los tipos inferidos en el primer lote se fijan para los siguientes y así el
+        esquema se mantiene estable. Siempre entrega al menos un lote (vacío).
+        """
+        cols = [d[0] for d in cur.description]
+        types = self._arrow_types(cur.description) or [None] * len(cols)
+        empty = True
+        while True:
+            rows = self._fetchmany(cur, batch_size)
+            if not rows:
+                break
+            batch = rows_to_record_batch(rows, cols, types)
+            types = pin_types(types, batch)
+            empty = False
+            yield batch
+        if empty:
+            yield rows_to_record_batch([], cols, types)
+
+    def arrow_batches(self, sql: str, batch_size: int = 10000) -> Iterator[Any]:
+        """Ejecuta una consulta y entrega lotes Arrow (``pyarrow.RecordBatch``) sin crear diccionarios por fila."""
+        with self._conn() as cn:
+            cur = self._arrow_cursor(cn, batch_size)
+            try:
+                self._timed_execute(cur, sql)
+                if cur.description:
+                    yield from self._arrow_from_rows(cur, batch_size)
+            finally:
+                cur.close()
+
+    def run_query_arrow(self, sql: str, batch_size: int = 10000):
+        """Ejecuta una consulta y devuelve el resultado como ``pyarrow.Table``."""
+        return record_batches_to_table(self.arrow_batches(sql, batch_size))
+
+    def export_query(self, sql: str, output: str, fmt: str = "parquet", compression: Optional[str] = None,
+                     rows_per_file: Optional[int] = None, batch_size: int = 10000,
+                     progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """Exporta el resultado de una consulta a ficheros Parquet o CSV a partir de lotes Arrow."""
+        return export_batches(self.arrow_batches(sql, batch_size), output, fmt,
+                              compression, rows_per_file, progress)
+
+    def bulk_update_metadata(self, changes: List[MetadataChange], atomic: bool = False) -> List[Dict[str, Any]]:
+        """Aplica varios cambios de metadatos y devuelve el resultado de cada uno.
+
+        La implementación por defecto aplica los cambios uno a uno y no es atómica.
+        """
+        results = []
+        for i, change in enumerate(changes):
+            try:
+                self.update_metadata(change)
+                results.append({"index": i, "status": "ok"})
+            except Exception as e:
+                results.append({"index": i, "status": "error", "error": str(e)})
+        return results
+
     @abstractmethod
     def list_schema(self, database=None, schema=None, table=None) -> List[Dict[str, Any]]:
         """Lista el esquema de la base de datos."""
         raise NotImplementedError
-    
+
     @abstractmethod
     def update_metadata(self, args: MetadataArgs) -> str:
         """Actualiza metadatos de tabla o columna."""
         raise NotImplementedError
-    
+
     @abstractmethod
     def run_query(self, sql: str) -> List[Dict[str, Any]]:
         """Ejecuta una consulta SQL."""
         raise NotImplementedError
-    
+
     @abstractmethod
     def ontology(self, database=None, schema=None) -> Dict[str, Any]:
         """Devuelve la ontología (relaciones FK) de la base de datos."""
         raise NotImplementedError
+
+class AsyncDBAdapter(ABC):
+    """Interfaz asíncrona equivalente a :class:`DBAdapter`."""
+
+    db_type = "db"
+    pool_config: Optional[PoolConfig] = None
+    _pool: Optional[AsyncConnectionPool] = None
+
+    async def _connect(self):
+        """Abre una conexión nueva con el driver."""
+        raise NotImplementedError
+
+    async def _check_connection(self, cn) -> bool:
+        """Indica si una conexión inactiva del pool sigue siendo utilizable."""
+        return not getattr(cn, "closed", False)
+
+    @property
+    def pool(self) -> AsyncConnectionPool:
+        """Pool de conexiones del adaptador, creado en el primer uso."""
+        if self._pool is None:
+            self._pool = AsyncConnectionPool(self._timed_connect, self._check_connection,
+                                             self.pool_config, name=self.db_type)
+        return self._pool
+
+    async def _timed_connect(self):
+        with span("db.connect", db=self.db_type):
+            return await self._connect()
+
+    async def _timed_execute(self, cur, *args, **kwargs):
+        """``await cur.execute`` registrando la fase ``db.execute`` (cursores asíncronos)."""
+        with span("db.execute", db=self.db_type):
+            return await cur.execute(*args, **kwargs)
+
+    async def _fetchall(self, cur) -> list:
+        """``await cur.fetchall`` registrando la fase ``db.fetch`` y las filas leídas."""
+        with span("db.fetch", db=self.db_type) as sp:
+            rows = await cur.fetchall()
+            sp.set("rows", len(rows))
+        count("db.rows", len(rows), db=self.db_type)
+        return rows
+
+    def _conn(self):
+        """Presta una conexión del pool como async context manager."""
+        return self.pool.connection()
+
+    async def close(self) -> None:
+        """Cierra todas las conexiones del pool."""
+        if self._pool is not None:
+            await self._pool.close()
+
+    async def bulk_update_metadata(self, changes: List[MetadataChange], atomic: bool = False) -> List[Dict[str, Any]]:
+        """Aplica varios cambios de metadatos; por defecto uno a uno y sin atomicidad."""
+        results = []
+        for i, change in enumerate(changes):
+            try:
+                await self.update_metadata(change)
+                results.append({"index": i, "status": "ok"})
+            except Exception as e:
+                results.append({"index": i, "status": "error", "error": str(e)})
+        return results
+
+    async def run_query_arrow(self, sql: str, batch_size: int = 10000):
+        """Devuelve el resultado como ``pyarrow.Table``; por defecto lo convierte desde filas."""
+        rows = await self.run_query(sql)
+        cols = list(rows[0]) if rows else []
+        return record_batches_to_table([rows_to_record_batch([tuple(r.values()) for r in rows], cols)])
+
+    @abstractmethod
+    async def list_schema(self, database=None, schema=None, table=None) -> List[Dict[str, Any]]:
+        """Lista el esquema de la base de datos."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_metadata(self, args: MetadataArgs) -> str:
+        """Actualiza metadatos de tabla o columna."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def run_query(self, sql: str) -> List[Dict[str, Any]]:
+        """Ejecuta una consulta SQL."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def ontology(self, database=None, schema=None) -> Dict[str, Any]:
+        """Devuelve la ontología (relaciones FK) de la base de datos."""
+        raise NotImplementedError
+
+class ThreadedAsyncAdapter(AsyncDBAdapter):
+    """Adaptador asíncrono que ejecuta un :class:`DBAdapter` síncrono en hilos de trabajo."""
+
+    def __init__(self, sync: DBAdapter):
+        self.sync = sync
+
+    async def close(self) -> None:
+        """El pool pertenece al adaptador síncrono compartido; no se cierra aquí."""
+
+    @staticmethod
+    async def _in_thread(fn, *args):
+        import asyncio  # diferido: solo el modo asíncrono lo necesita
+        return await asyncio.to_thread(fn, *args)
+
+    async def list_schema(self, database=None, schema=None, table=None):
+        """Lista el esquema en un hilo de trabajo."""
+        return await self._in_thread(self.sync.list_schema, database, schema, table)
+
+    async def update_metadata(self, args: MetadataArgs) -> str:
+        """Actualiza metadatos en un hilo de trabajo."""
+        return await self._in_thread(self.sync.update_metadata, args)
+
+    async def bulk_update_metadata(self, changes: List[MetadataChange], atomic: bool = False):
+        """Aplica cambios de metadatos en un hilo de trabajo."""
+        return await self._in_thread(self.sync.bulk_update_metadata, changes, atomic)
+
+    async def run_query(self, sql: str):
+        """Ejecuta la consulta en un hilo de trabajo."""
+        return await self._in_thread(self.sync.run_query, sql)
+
+    async def run_query_arrow(self, sql: str, batch_size: int = 10000):
+        """Obtiene el resultado columnar en un hilo de trabajo."""
+        return await self._in_thread(self.sync.run_query_arrow, sql, batch_size)
+
+    async def ontology(self, database=None, schema=None):
+        """Obtiene la ontología en un hilo de trabajo."""
+        return await self._in_thread(self.sync.ontology, database, schema)
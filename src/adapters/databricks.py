@@ -0,0 +1,201 @@
+"""Databricks SQL database adapter.
+
+Results are fetched as Arrow tables (``fetchmany_arrow``/``fetchall_arrow``) and
+converted column by column, never through the connector's per-row ``Row`` objects;
+``arrow_batches`` hands the batches over untouched. Catalog queries read the Unity
+Catalog ``INFORMATION_SCHEMA`` of the session catalog, or of ``database`` when given.
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+from .base import DBAdapter
+from ..models.schemas import Conn, MetadataArgs
+from ..utils import build_postgres_filter_clause
+from ..utils.arrow import require_pyarrow
+from ..queries import query_manager, BoundQuery
+from ..instrumentation import count, span
+
+# Value kinds for Databricks result type names that need converting before JSON encoding;
+# complex types (array, map, struct) are inferred from their values
+_JSON_KINDS = {
+    "decimal": "decimal",
+    "date": "date",
+    "timestamp": "datetime",
+    "timestamp_ntz": "datetime",
+    "binary": "bytes",
+    "array": None,
+    "map": None,
+    "struct": None,
+}
+
+def _quote(*parts: str) -> str:
+    """Backtick-quoted, dot-joined identifier."""
+    return ".".join("`" + p.replace("`", "``") + "`" for p in parts if p)
+
+def _catalog(database=None) -> Dict[str, str]:
+    """Qualify INFORMATION_SCHEMA with a Unity Catalog catalog (the session catalog otherwise)."""
+    return {"catalog": f"{_quote(database)}."} if database else {}
+
+def _rows(table) -> List[tuple]:
+    """Row tuples of an Arrow table, converted column by column."""
+    return list(zip(*(col.to_pylist() for col in table.columns)))
+
+class _Session:
+    """Databricks connection wrapper for the pool: statements autocommit and there is
+    nothing to roll back, so a failed statement does not cost the session."""
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+class DatabricksAdapter(DBAdapter):
+    """Adapter for Databricks SQL warehouses.
+
+    ``connector`` defaults to ``databricks.sql``; any module with a compatible
+    ``connect`` (e.g. a stub for offline tests) can be passed instead.
+    """
+
+    db_type = "databricks"
+
+    def __init__(self, c: Conn, connector: Optional[Any] = None):
+        if connector is None:
+            from databricks import sql as connector
+        self.dbx = connector
+        self.c = c
+
+    def _connect(self):
+        """Open a Databricks SQL session."""
+        return _Session(self.dbx.connect(
+            server_hostname=self.c.databricks_server_hostname or os.getenv("DATABRICKS_SERVER_HOSTNAME"),
+            http_path=self.c.databricks_http_path or os.getenv("DATABRICKS_HTTP_PATH"),
+            access_token=self.c.databricks_token or os.getenv("DATABRICKS_TOKEN"),
+            catalog=self.c.database or os.getenv("DATABRICKS_CATALOG"),
+            schema=self.c.schema_name or os.getenv("DATABRICKS_SCHEMA"),
+        ))
+
+    def _check_connection(self, cn) -> bool:
+        """Reuse a session while the connector reports it open (a ping would cost a warehouse round trip)."""
+        return getattr(cn, "open", True)
+
+    def _interrupt(self, cn, cur) -> None:
+        """Cancel the statement running on ``cur``."""
+        cur.cancel()
+
+    def _fetchall(self, cur) -> list:
+        """Fetch the whole result as Arrow and return row tuples."""
+        with span("db.fetch", db=self.db_type) as sp:
+            rows = _rows(cur.fetchall_arrow())
+            sp.set("rows", len(rows))
+        count("db.rows", len(rows), db=self.db_type)
+        return rows
+
+    def _fetchmany(self, cur, size: int) -> list:
+        """Fetch up to ``size`` rows as one Arrow table and return row tuples."""
+        with span("db.fetch", db=self.db_type) as sp:
+            rows = _rows(cur.fetchmany_arrow(size))
+            sp.set("rows", len(rows))
+        count("db.rows", len(rows), db=self.db_type)
+        return rows
+
+    def _column_kinds(self, description):
+        """JSON value kind per column from the result's type names."""
+        return [_JSON_KINDS.get(str(d[1]).lower(), "native") for d in description]
+
+    def _fetch(self, q: BoundQuery) -> List[tuple]:
+        """Run a catalog query and return its rows."""
+        with self._conn() as cn:
+            cur = cn.cursor()
+            try:
+                self._execute_bound(cur, q)
+                return self._fetchall(cur)
+            finally:
+                cur.close()
+
+    def list_schema(self, database=None, schema=None, table=None):
+        """List Databricks schema information from Unity Catalog."""
+        query = query_manager.render("databricks", "list_schema",
+                                     **build_postgres_filter_clause(schema, table), **_catalog(database))
+        return self._query_rows(query)
+
+    def _page_filters(self, database=None, schema=None, table=None):
+        """Catalog filters for paginated listings, reading the given catalog's INFORMATION_SCHEMA."""
+        return {**build_postgres_filter_clause(schema, table), **_catalog(database)}
+
+    def update_metadata(self, args: MetadataArgs) -> str:
+        """Update metadata in Databricks."""
+        if args.comment is None:
+            return "ok"
+        fq = _quote(args.database, args.schema_name, args.table)
+        if args.level == "table":
+            query = query_manager.render("databricks", "update_table_comment", table_name=fq,
+                                         comment=args.comment)
+        elif not args.column:
+            raise ValueError("Column required for level=column")
+        else:
+            query = query_manager.render("databricks", "update_column_comment", table_name=fq,
+                                         column_name=_quote(args.column), comment=args.comment)
+        with self._conn() as cn:
+            cur = cn.cursor()
+            try:
+                self._execute_bound(cur, query)
+            finally:
+                cur.close()
+        return "ok"
+
+    def run_query(self, sql: str):
+        """Execute a SQL query in Databricks; rows are built from the Arrow result."""
+        with self._conn() as cn:
+            cur = cn.cursor()
+            try:
+                self._timed_execute(cur, sql)
+                if not cur.description:
+                    return []
+                with span("db.fetch", db=self.db_type) as sp:
+                    rows = cur.fetchall_arrow().to_pylist()
+                    sp.set("rows", len(rows))
+                count("db.rows", len(rows), db=self.db_type)
+                return rows
+            finally:
+                cur.close()
+
+    def arrow_batches(self, sql: str, batch_size: int = 10000):
+        """Yield the result's Arrow batches as fetched, without Python rows."""
+        with self._conn() as cn:
+            cur = cn.cursor()
+            try:
+                self._timed_execute(cur, sql)
+                if not cur.description:
+                    return
+                empty = True
+                while True:
+                    with span("db.fetch", db=self.db_type) as sp:
+                        table = cur.fetchmany_arrow(batch_size)
+                        sp.set("rows", table.num_rows)
+                    count("db.rows", table.num_rows, db=self.db_type)
+                    if not table.num_rows:
+                        break
+                    empty = False
+                    yield from table.to_batches(max_chunksize=batch_size)
+                if empty:
+                    yield require_pyarrow().RecordBatch.from_pylist([], schema=table.schema)
+            finally:
+                cur.close()
+
+    def ontology(self, database=None, schema=None):
+        """Get foreign key relationships from Unity Catalog."""
+        query = query_manager.render("databricks", "get_foreign_keys",
+                                     **build_postgres_filter_clause(schema=schema, prefix="kcu."),
+                                     **_catalog(database))
+        return self._fk_edges(self._fetch(query))
+
+    def list_schemas(self):
+        """List (catalog, schema) pairs of the session catalog."""
+        return [tuple(r) for r in self._fetch(query_manager.render("databricks", "list_schemas"))]
@@ -1,15 +1,113 @@
 """Factory For Creating Database Adapters."""
 
-from .base import DBAdapter
-from .snowflake import SnowflakeAdapter
-from .postgres import PostgresAdapter
+import atexit
+import importlib
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from .base import DBAdapter, AsyncDBAdapter, ThreadedAsyncAdapter
+from .pool import PoolConfig
 from ..models.schemas import Conn
+from ..utils import conn_fingerprint, load_env
 
-def get_adapter(conn: Conn) -> DBAdapter:
-    """Create a database adapter based on the connection type."""
-    if conn.type == "snowflake":
-        return SnowflakeAdapter(conn)
-    if conn.type == "postgres":
-        return PostgresAdapter(conn)
-    # TODO: mysql, databricks. Just adde the same condition but changing the adapter name and the import
-    raise ValueError(f"DB not supported yet: {conn.type}")
+# Factory: an adapter class/callable taking a Conn, or a "module:attr" path imported on first use
+AdapterFactory = Union[str, Callable[[Conn], Any]]
+
+# (sync, async) factories by connection type. Dialect modules (and their drivers) are only
+# imported when a connection of that type is first used; async None means threaded sync.
+_factories: Dict[str, Tuple[AdapterFactory, Optional[AdapterFactory]]] = {
+    "snowflake": (".snowflake:SnowflakeAdapter", ".snowflake:AsyncSnowflakeAdapter"),
+    "postgres": (".postgres:PostgresAdapter", ".postgres:AsyncPostgresAdapter"),
+    "mysql": (".mysql:MySQLAdapter", None),
+    "databricks": (".databricks:DatabricksAdapter", None),
+    "sqlite": (".sqlite:SQLiteAdapter", None),
+}
+
+_adapters: Dict[str, DBAdapter] = {}
+_adapters_lock = threading.Lock()
+# Async adapters own event-loop-bound pools, so they are registered per loop.
+_async_adapters: "weakref.WeakKeyDictionary[Any, Dict[str, AsyncDBAdapter]]" = weakref.WeakKeyDictionary()
+
+def register_adapter(db_type: str, factory: AdapterFactory, async_factory: Optional[AdapterFactory] = None) -> None:
+    """Register the adapter factories for a connection type (replacing any existing ones)."""
+    _factories[db_type] = (factory, async_factory)
+
+def _resolve(factory: AdapterFactory) -> Callable[[Conn], Any]:
+    if isinstance(factory, str):
+        module, _, attr = factory.partition(":")
+        factory = getattr(importlib.import_module(module, __package__), attr)
+    return factory
+
+def _factories_for(conn: Conn) -> Tuple[AdapterFactory, Optional[AdapterFactory]]:
+    try:
+        pair = _factories[conn.type]
+    except KeyError:
+        raise ValueError(f"DB not supported yet: {conn.type}") from None
+    # Credentials may come from a .env file; load it before the first connection is built
+    load_env()
+    return pair
+
+def _build_adapter(conn: Conn) -> DBAdapter:
+    """Create a new adapter instance based on the connection type."""
+    return _resolve(_factories_for(conn)[0])(conn)
+
+def get_adapter(conn: Conn, pool_config: Optional[PoolConfig] = None) -> DBAdapter:
+    """Return the shared adapter for this connection, creating it on first use.
+
+    Adapters are registered by connection fingerprint so repeated calls with the
+    same settings reuse the same connection pool.
+    """
+    key = conn_fingerprint(conn)
+    adp = _adapters.get(key)
+    if adp is not None:
+        return adp
+    with _adapters_lock:
+        adp = _adapters.get(key)
+        if adp is None:
+            adp = _build_adapter(conn)
+            adp.pool_config = pool_config
+            _adapters[key] = adp
+    return adp
+
+def get_async_adapter(conn: Conn, pool_config: Optional[PoolConfig] = None) -> AsyncDBAdapter:
+    """Return the shared async adapter for this connection on the running event loop.
+
+    Dialects without a native async driver are served by running the shared sync
+    adapter in worker threads.
+    """
+    import asyncio  # deferred: synchronous callers never pay for it
+    registry = _async_adapters.setdefault(asyncio.get_running_loop(), {})
+    key = conn_fingerprint(conn)
+    adp = registry.get(key)
+    if adp is None:
+        async_factory = _factories_for(conn)[1]
+        if async_factory is not None:
+            adp = _resolve(async_factory)(conn)
+        else:
+            adp = ThreadedAsyncAdapter(get_adapter(conn, pool_config))
+        adp.pool_config = pool_config
+        registry[key] = adp
+    return adp
+
+async def aclose_adapters() -> None:
+    """Close the async adapters registered on the running event loop."""
+    import asyncio
+    registry = _async_adapters.pop(asyncio.get_running_loop(), {})
+    for adp in registry.values():
+        await adp.close()
+
+def evict_idle_connections() -> int:
+    """Close expired idle connections across all registered adapters."""
+    with _adapters_lock:
+        adapters = list(_adapters.values())
+    return sum(adp.pool.evict_idle() for adp in adapters if adp._pool is not None)
+
+def close_adapters() -> None:
+    """Close every pooled connection and forget all registered adapters."""
+    with _adapters_lock:
+        adapters = list(_adapters.values())
+        _adapters.clear()
+    for adp in adapters:
+        adp.close()
+
+atexit.register(close_adapters)
@@ -0,0 +1,113 @@
+"""Background query jobs for dialects without server-side asynchronous execution.
+
+A submitted statement runs on a pooled connection in a daemon thread; its handle is
+``"<backend id>-<token>"`` (the PostgreSQL backend PID, for instance) and the rows
+are kept in memory until fetched. Jobs live in the process that submitted them.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+class QueryCancelled(RuntimeError):
+    """The job was cancelled before its result was complete."""
+
+class QueryJob:
+    """One submitted statement: its state, and its rows or error once finished.
+
+    ``lock`` serializes cancellation with the end of the statement: ``interrupt`` is
+    only called, cleared or replaced by a final state while it is held.
+    """
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.token = uuid.uuid4().hex[:12]
+        self.backend_id: Optional[Any] = None
+        self.state = "running"
+        self.rows: Optional[List[Dict[str, Any]]] = None
+        self.error: Optional[str] = None
+        self.cancel_requested = False
+        self.submitted = time.time()
+        self.finished: Optional[float] = None
+        self.interrupt: Optional[Callable[[], None]] = None  # set while the statement runs
+        self.attached = threading.Event()
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+
+    @property
+    def handle(self) -> str:
+        return f"{self.backend_id}-{self.token}" if self.backend_id is not None else self.token
+
+    def finish(self, rows: List[Dict[str, Any]]) -> None:
+        with self.lock:
+            if self.cancel_requested:  # cancelled after the last rows arrived: honour it
+                self.state, self.error = "cancelled", "Query cancelled"
+            else:
+                self.rows, self.state = rows, "succeeded"
+            self._close()
+
+    def fail(self, exc: BaseException) -> None:
+        with self.lock:
+            self.state = "cancelled" if self.cancel_requested else "failed"
+            self.error = str(exc).strip() or type(exc).__name__
+            self._close()
+
+    def cancel(self) -> bool:
+        """Request cancellation and interrupt the running statement; False if already finished."""
+        with self.lock:
+            if self.done.is_set():
+                return False
+            self.cancel_requested = True
+            if self.interrupt is not None:
+                self.interrupt()
+        return True
+
+    def detach(self) -> None:
+        """Stop interrupts reaching the connection (before it goes back to the pool)."""
+        with self.lock:
+            self.interrupt = None
+
+    def _close(self) -> None:
+        self.finished = time.time()
+        self.interrupt = None
+        self.attached.set()
+        self.done.set()
+
+    def status(self) -> Dict[str, Any]:
+        """State (``running``, ``succeeded``, ``failed`` or ``cancelled``), timings and error."""
+        out = {"handle": self.handle, "state": self.state,
+               "elapsed": round((self.finished or time.time()) - self.submitted, 3)}
+        if self.rows is not None:
+            out["rows"] = len(self.rows)
+        if self.error is not None:
+            out["error"] = self.error
+        return out
+
+class QueryJobs:
+    """Jobs of one adapter by token; at most ``max_finished`` unfetched results are kept."""
+
+    def __init__(self, max_finished: int = 64):
+        self.max_finished = max_finished
+        self._jobs: "OrderedDict[str, QueryJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, job: QueryJob) -> None:
+        with self._lock:
+            self._jobs[job.token] = job
+            finished = [t for t, j in self._jobs.items() if j.done.is_set()]
+            for token in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[token]
+
+    def get(self, handle: str) -> QueryJob:
+        job = self._jobs.get(handle.rsplit("-", 1)[-1])
+        if job is None or job.handle != handle:
+            raise ValueError(f"Unknown query handle: {handle} (jobs live in the process that submitted them)")
+        return job
+
+    def pop(self, handle: str) -> QueryJob:
+        job = self.get(handle)
+        with self._lock:
+            self._jobs.pop(job.token, None)
+        return job
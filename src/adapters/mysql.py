@@ -0,0 +1,197 @@
+"""MySQL / MariaDB database adapter.
+
+Built on PyMySQL. Result reads (``run_query``, ``stream_query``, JSON and Arrow
+results) use unbuffered server-side cursors (``SSCursor``), so rows are pulled from
+the socket batch by batch instead of being buffered client-side first. Any
+PyMySQL-compatible module can be passed as ``driver``, e.g. a fake for offline tests.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional
+from .base import DBAdapter
+from ..models.schemas import Conn, MetadataArgs, MetadataChange
+from ..utils import build_postgres_filter_clause
+from ..queries import query_manager, BoundQuery
+
+# Value kinds for MySQL field types that need converting before JSON encoding; text and
+# blob columns share type codes (bytes or str depending on the collation), so they are inferred
+_JSON_KINDS = {
+    0: "decimal",      # DECIMAL
+    7: "datetime",     # TIMESTAMP
+    10: "date",        # DATE
+    11: "timedelta",   # TIME (PyMySQL returns timedelta)
+    12: "datetime",    # DATETIME
+    14: "date",        # NEWDATE
+    16: "bytes",       # BIT
+    246: "decimal",    # NEWDECIMAL
+    249: None, 250: None, 251: None, 252: None,  # TINY/MEDIUM/LONG/BLOB
+    253: None, 254: None,                        # VAR_STRING, STRING (BINARY/VARBINARY too)
+    255: "bytes",      # GEOMETRY
+}
+
+# COMMENT clause of a column definition in SHOW CREATE TABLE output
+_COMMENT_RE = re.compile(r"\s+COMMENT\s+'(?:[^'\\]|\\.|'')*'", re.I)
+
+def _quote(*parts: str) -> str:
+    """Backtick-quoted, dot-joined identifier."""
+    return ".".join("`" + p.replace("`", "``") + "`" for p in parts if p)
+
+class MySQLAdapter(DBAdapter):
+    """Adapter for MySQL and MariaDB connections.
+
+    ``driver`` defaults to ``pymysql``; it needs ``connect``, ``Error`` and
+    ``cursors.SSCursor``.
+    """
+
+    db_type = "mysql"
+
+    def __init__(self, c: Conn, driver: Optional[Any] = None):
+        if driver is None:
+            import pymysql as driver
+        self.driver = driver
+        self.c = c
+
+    def _connect(self):
+        """Create a MySQL connection (explicit transactions, so the pool commits or rolls back)."""
+        return self.driver.connect(
+            host=self.c.host or os.getenv("MYSQL_HOST", "localhost"),
+            port=self.c.port or int(os.getenv("MYSQL_PORT", "3306")),
+            user=self.c.user or os.getenv("MYSQL_USER"),
+            password=self.c.password or os.getenv("MYSQL_PASSWORD", ""),
+            database=self.c.database or self.c.dbname or os.getenv("MYSQL_DATABASE"),
+            charset="utf8mb4",
+            autocommit=False,
+        )
+
+    def _check_connection(self, cn) -> bool:
+        """Ping an idle MySQL connection (without reconnecting) before reusing it."""
+        try:
+            cn.ping(reconnect=False)
+        except self.driver.Error:
+            return False
+        return True
+
+    def _backend_id(self, cn):
+        """Server connection ID, part of submitted query handles."""
+        return cn.thread_id()
+
+    def _interrupt(self, cn, cur) -> None:
+        """``KILL QUERY`` the statement running on ``cn``, from a separate connection."""
+        killer = self._connect()
+        try:
+            cur = killer.cursor()
+            self._execute_bound(cur, query_manager.render("mysql", "kill_query", connection_id=cn.thread_id()))
+            cur.close()
+        finally:
+            killer.close()
+
+    def _stream_cursor(self, cn, batch_size: int):
+        """Unbuffered cursor: rows stay on the server until fetched."""
+        return cn.cursor(self.driver.cursors.SSCursor)
+
+    def _column_kinds(self, description):
+        """JSON value kind per column from the result's field types."""
+        return [_JSON_KINDS.get(d[1], "native") for d in description]
+
+    def _execute_bound(self, cur, query) -> None:
+        """Always pass the (possibly empty) parameters, so PyMySQL unescapes ``%%`` in the text."""
+        self._timed_execute(cur, query.sql, query.params or {})
+
+    def _fetch(self, q: BoundQuery) -> List[tuple]:
+        """Run a catalog query and return its rows."""
+        with self._conn() as cn:
+            cur = cn.cursor()
+            try:
+                self._execute_bound(cur, q)
+                return self._fetchall(cur)
+            finally:
+                cur.close()
+
+    def list_schema(self, database=None, schema=None, table=None):
+        """List MySQL schema information (a MySQL schema is a database)."""
+        query = query_manager.render("mysql", "list_schema",
+                                     **build_postgres_filter_clause(schema or database, table))
+        return self._query_rows(query)
+
+    def _page_filters(self, database=None, schema=None, table=None):
+        """Catalog filters for paginated listings; ``database`` stands in for the schema."""
+        return build_postgres_filter_clause(schema or database, table)
+
+    def _column_definition(self, cn, change: MetadataChange) -> str:
+        """Current definition of a column without its COMMENT, read from SHOW CREATE TABLE.
+
+        MODIFY COLUMN replaces the whole definition, so the type, nullability and default
+        must be restated to change only the comment.
+        """
+        cur = cn.cursor()
+        try:
+            self._execute_bound(cur, query_manager.render(
+                "mysql", "show_create_table", table_name=_quote(change.schema_name, change.table)))
+            ddl = self._fetchall(cur)[0][1]
+        finally:
+            cur.close()
+        # Column names are case-insensitive in MySQL; SHOW CREATE TABLE spells them as declared
+        head = _quote(change.column).lower() + " "
+        for line in ddl.splitlines():
+            line = line.strip().rstrip(",")
+            if line.lower().startswith(head):
+                return _COMMENT_RE.sub("", line)
+        raise ValueError(f"Column not found: {change.schema_name}.{change.table}.{change.column}")
+
+    def update_metadata(self, args: MetadataArgs) -> str:
+        """Update metadata in MySQL (DDL commits implicitly)."""
+        if args.comment is None:
+            return "ok"
+        fq = _quote(args.schema_name, args.table)
+        with self._conn() as cn:
+            if args.level == "table":
+                query = query_manager.render("mysql", "update_table_comment", table_name=fq,
+                                             comment=args.comment)
+            else:
+                if not args.column:
+                    raise ValueError("Column required for level=column")
+                query = query_manager.render("mysql", "update_column_comment", table_name=fq,
+                                             column_definition=self._column_definition(cn, args),
+                                             comment=args.comment)
+            cur = cn.cursor()
+            try:
+                self._execute_bound(cur, query)
+            finally:
+                cur.close()
+        return "ok"
+
+    def run_query(self, sql: str):
+        """Execute a SQL query in MySQL, reading the result through an unbuffered cursor."""
+        with self._conn() as cn:
+            cur = self._stream_cursor(cn, 0)
+            try:
+                self._timed_execute(cur, sql)
+                if not cur.description:
+                    return []
+                cols = [d[0] for d in cur.description]
+                return [dict(zip(cols, r)) for r in self._fetchall(cur)]
+            finally:
+                cur.close()
+
+    def run_query_json(self, sql: str, batch_size: int = 10000) -> List[Dict[str, Any]]:
+        """Like ``run_query``, converting each batch as it streams off the server."""
+        with self._conn() as cn:
+            cur = self._stream_cursor(cn, batch_size)
+            try:
+                self._timed_execute(cur, sql)
+                if not cur.description:
+                    return []
+                return [row for batch in self._json_rows(cur, batch_size) for row in batch]
+            finally:
+                cur.close()
+
+    def ontology(self, database=None, schema=None):
+        """Get foreign key relationships from MySQL."""
+        query = query_manager.render("mysql", "get_foreign_keys",
+                                     **build_postgres_filter_clause(schema=schema or database, prefix="kcu."))
+        return self._fk_edges(self._fetch(query))
+
+    def list_schemas(self):
+        """List (database, schema) pairs; in MySQL both are the database name."""
+        return [tuple(r) for r in self._fetch(query_manager.render("mysql", "list_schemas"))]
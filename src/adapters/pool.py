@@ -0,0 +1,283 @@
+"""Bounded connection pool shared by the database adapters."""
+
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, List, Optional
+from ..instrumentation import span
+
+@dataclass
+class PoolConfig:
+    """Sizing and recycling policy for a connection pool."""
+    max_size: int = 4
+    acquire_timeout: float = 30.0
+    idle_timeout: float = 300.0
+    max_lifetime: float = 3600.0
+    check_interval: float = 30.0
+
+class _PooledConnection:
+    """Driver connection plus the bookkeeping the pool needs."""
+
+    __slots__ = ("raw", "created_at", "last_used", "last_checked")
+
+    def __init__(self, raw: Any):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+        self.last_checked = now
+
+class ConnectionPool:
+    """Thread-safe pool of driver connections for a single connection fingerprint.
+
+    ``connect`` opens a new driver connection and ``check`` returns True when an
+    idle connection is still usable. Connections idle for longer than
+    ``idle_timeout`` or older than ``max_lifetime`` are closed instead of reused.
+    ``name`` labels the pool's ``pool.acquire`` spans.
+    """
+
+    def __init__(self, connect: Callable[[], Any], check: Optional[Callable[[Any], bool]] = None,
+                 config: Optional[PoolConfig] = None, name: str = "db"):
+        self.name = name
+        self._connect = connect
+        self._check = check
+        self.config = config or PoolConfig()
+        self._idle: List[_PooledConnection] = []
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        """Number of open connections, idle or checked out."""
+        with self._cond:
+            return len(self._idle) + self._in_use
+
+    def grow(self, max_size: int) -> None:
+        """Raise ``max_size`` to at least ``max_size``, waking callers waiting for a slot."""
+        with self._cond:
+            if max_size > self.config.max_size:
+                self.config = replace(self.config, max_size=max_size)
+                self._cond.notify_all()
+
+    def _expired(self, pc: _PooledConnection, now: float) -> bool:
+        cfg = self.config
+        return (now - pc.last_used > cfg.idle_timeout) or (now - pc.created_at > cfg.max_lifetime)
+
+    def _healthy(self, pc: _PooledConnection, now: float) -> bool:
+        if self._check is None or now - pc.last_checked < self.config.check_interval:
+            return True
+        try:
+            ok = bool(self._check(pc.raw))
+        except Exception:
+            ok = False
+        pc.last_checked = now
+        return ok
+
+    @staticmethod
+    def _close_raw(raw: Any) -> None:
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def acquire(self) -> _PooledConnection:
+        """Check out a connection, opening a new one if the pool has room."""
+        with span("pool.acquire", db=self.name) as sp:
+            pc = self._acquire()
+            sp.set("reused", pc.last_used != pc.created_at)  # equal until first released
+        return pc
+
+    def _acquire(self) -> _PooledConnection:
+        deadline = time.monotonic() + self.config.acquire_timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                now = time.monotonic()
+                while self._idle:
+                    pc = self._idle.pop()
+                    if self._expired(pc, now) or not self._healthy(pc, now):
+                        self._close_raw(pc.raw)
+                        continue
+                    self._in_use += 1
+                    return pc
+                if self._in_use < self.config.max_size:
+                    self._in_use += 1
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"Timed out after {self.config.acquire_timeout}s waiting for a pooled connection"
+                    )
+                self._cond.wait(remaining)
+        # Open outside the lock: logins can take seconds.
+        try:
+            return _PooledConnection(self._connect())
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, pc: _PooledConnection, discard: bool = False) -> None:
+        """Return a connection to the pool, or close it when ``discard`` is set."""
+        now = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed or now - pc.created_at > self.config.max_lifetime:
+                self._close_raw(pc.raw)
+            else:
+                pc.last_used = now
+                self._idle.append(pc)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a ``with`` block.
+
+        The transaction is committed on success and rolled back on error; a
+        connection that fails to roll back is discarded rather than reused.
+        """
+        pc = self.acquire()
+        discard = False
+        try:
+            yield pc.raw
+            pc.raw.commit()
+        except BaseException:
+            try:
+                pc.raw.rollback()
+            except Exception:
+                discard = True
+            raise
+        finally:
+            self.release(pc, discard=discard)
+
+    def evict_idle(self) -> int:
+        """Close idle connections that are expired; returns how many were closed."""
+        now = time.monotonic()
+        with self._cond:
+            keep, drop = [], []
+            for pc in self._idle:
+                (drop if self._expired(pc, now) else keep).append(pc)
+            self._idle = keep
+        for pc in drop:
+            self._close_raw(pc.raw)
+        return len(drop)
+
+    def close(self) -> None:
+        """Close idle connections and refuse new checkouts; busy ones close on release."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for pc in idle:
+            self._close_raw(pc.raw)
+
+class AsyncConnectionPool:
+    """asyncio counterpart of :class:`ConnectionPool`.
+
+    ``connect`` and ``check`` are coroutine functions, and pooled connections must
+    expose awaitable ``commit``, ``rollback`` and ``close`` methods. A pool belongs
+    to the event loop it is first used on.
+    """
+
+    def __init__(self, connect: Callable[[], Awaitable[Any]],
+                 check: Optional[Callable[[Any], Awaitable[bool]]] = None,
+                 config: Optional[PoolConfig] = None, name: str = "db"):
+        self.name = name
+        self._connect = connect
+        self._check = check
+        self.config = config or PoolConfig()
+        self._idle: List[_PooledConnection] = []
+        import asyncio  # deferred: only async adapters need it
+        self._slots = asyncio.Semaphore(self.config.max_size)
+        self._closed = False
+
+    def _expired(self, pc: _PooledConnection, now: float) -> bool:
+        cfg = self.config
+        return (now - pc.last_used > cfg.idle_timeout) or (now - pc.created_at > cfg.max_lifetime)
+
+    async def _healthy(self, pc: _PooledConnection, now: float) -> bool:
+        if self._check is None or now - pc.last_checked < self.config.check_interval:
+            return True
+        try:
+            ok = bool(await self._check(pc.raw))
+        except Exception:
+            ok = False
+        pc.last_checked = now
+        return ok
+
+    @staticmethod
+    async def _close_raw(raw: Any) -> None:
+        try:
+            await raw.close()
+        except Exception:
+            pass
+
+    async def acquire(self) -> _PooledConnection:
+        """Check out a connection, waiting for a free slot if the pool is full."""
+        with span("pool.acquire", db=self.name) as sp:
+            pc = await self._acquire()
+            sp.set("reused", pc.last_used != pc.created_at)
+        return pc
+
+    async def _acquire(self) -> _PooledConnection:
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        import asyncio
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.config.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"Timed out after {self.config.acquire_timeout}s waiting for a pooled connection"
+            ) from None
+        try:
+            while self._idle:
+                pc = self._idle.pop()
+                now = time.monotonic()
+                if self._expired(pc, now) or not await self._healthy(pc, now):
+                    await self._close_raw(pc.raw)
+                    continue
+                return pc
+            return _PooledConnection(await self._connect())
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, pc: _PooledConnection, discard: bool = False) -> None:
+        """Return a connection to the pool, or close it when ``discard`` is set."""
+        now = time.monotonic()
+        try:
+            if discard or self._closed or now - pc.created_at > self.config.max_lifetime:
+                await self._close_raw(pc.raw)
+            else:
+                pc.last_used = now
+                self._idle.append(pc)
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Borrow a connection for the duration of an ``async with`` block."""
+        pc = await self.acquire()
+        discard = False
+        try:
+            yield pc.raw
+            await pc.raw.commit()
+        except BaseException:
+            try:
+                await pc.raw.rollback()
+            except Exception:
+                discard = True
+            raise
+        finally:
+            await self.release(pc, discard=discard)
+
+    async def close(self) -> None:
+        """Close idle connections and refuse new checkouts."""
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for pc in idle:
+            await self._close_raw(pc.raw)
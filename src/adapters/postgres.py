@@ -1,72 +1,403 @@
 """PostgreSQL database adapter."""
 
-from typing import List, Dict, Any
-from .base import DBAdapter
-from ..models.schemas import Conn, MetadataArgs
-from ..utils import build_postgres_filter_clause
-from ..queries import query_manager
+import bz2
+import gzip
+import uuid
+from typing import List, Dict, Any, Optional, Tuple
+from .base import DBAdapter, AsyncDBAdapter
+from ..models.schemas import Conn, MetadataArgs, MetadataChange
+from ..utils import build_postgres_filter_clause, build_in_list
+from ..queries import query_manager, BoundQuery
+from ..utils.arrow import pin_types, require_pyarrow, rows_to_record_batch, record_batches_to_table
+from ..instrumentation import count, span
+
+# File openers for COPY-based CSV exports, by compression codec
+_COPY_OPENERS = {
+    None: lambda path: open(path, "wb"),
+    "gzip": lambda path: gzip.open(path, "wb"),
+    "bz2": lambda path: bz2.open(path, "wb"),
+}
+
+# Bytes written between progress callbacks during COPY exports
+_COPY_PROGRESS_BYTES = 1 << 20
+
+# Arrow column types for common PostgreSQL type OIDs; other types are inferred per batch
+_ARROW_TYPES = {
+    16: lambda pa: pa.bool_(),                      # bool
+    17: lambda pa: pa.binary(),                     # bytea
+    20: lambda pa: pa.int64(),                      # int8
+    21: lambda pa: pa.int16(),                      # int2
+    23: lambda pa: pa.int32(),                      # int4
+    25: lambda pa: pa.string(),                     # text
+    700: lambda pa: pa.float32(),                   # float4
+    701: lambda pa: pa.float64(),                   # float8
+    1042: lambda pa: pa.string(),                   # bpchar
+    1043: lambda pa: pa.string(),                   # varchar
+    1082: lambda pa: pa.date32(),                   # date
+    1114: lambda pa: pa.timestamp("us"),            # timestamp
+    1184: lambda pa: pa.timestamp("us", tz="UTC"),  # timestamptz
+}
+
+# Value kinds for PostgreSQL type OIDs that need converting before JSON encoding
+_JSON_KINDS = {
+    17: "bytes",         # bytea
+    1082: "date",        # date
+    1083: "time",        # time
+    1114: "datetime",    # timestamp
+    1184: "datetime",    # timestamptz
+    1186: "timedelta",   # interval
+    1266: "time",        # timetz
+    1700: "decimal",     # numeric
+    2950: "uuid",        # uuid
+}
 
 class PostgresAdapter(DBAdapter):
     """Adapter for PostgreSQL database connections."""
+
+    db_type = "postgres"
+    statement_timeouts = True
     
     def __init__(self, c: Conn):
         import psycopg
         self.pg = psycopg
         self.c = c
 
-    def _conn(self):
-        """Create a PostgreSQL connection."""
-        return self.pg.connect(
+    def _connect_kwargs(self) -> Dict[str, Any]:
+        """Connection settings shared by the sync and async adapters."""
+        return dict(
             host=self.c.host, 
-            port=self.c.port, 
+            port=self.c.port or 5432, 
             user=self.c.user, 
             password=self.c.password, 
             dbname=self.c.dbname, 
             sslmode=self.c.sslmode
         )
 
+    def _connect(self):
+        """Create a PostgreSQL connection."""
+        return self.pg.connect(**self._connect_kwargs())
+
+    def _check_connection(self, cn) -> bool:
+        """Ping an idle PostgreSQL connection before reusing it."""
+        if cn.closed or cn.broken:
+            return False
+        cn.execute("SELECT 1")
+        cn.rollback()
+        return True
+
+    def _timeout_options(self, cur, seconds: float):
+        """``SET LOCAL statement_timeout`` for the rest of the transaction, enforced by the server."""
+        q = query_manager.render("postgres", "set_statement_timeout", timeout=f"{max(1, round(seconds * 1000))}ms")
+        cur.connection.execute(q.sql, q.params)
+        return {}
+
+    def _backend_id(self, cn):
+        """Backend PID of the session, part of submitted query handles."""
+        return cn.info.backend_pid
+
+    def _interrupt(self, cn, cur) -> None:
+        """Send a cancel request for the statement running on ``cn``."""
+        cn.cancel()
+
+    def _stream_cursor(self, cn, batch_size: int):
+        """Use a named (server-side) cursor so rows are fetched from the server in batches."""
+        cur = cn.cursor(name=f"stream_{uuid.uuid4().hex}")
+        cur.itersize = batch_size
+        return cur
+
+    def _arrow_cursor(self, cn, batch_size: int):
+        """Server-side cursor with binary transfer, so values arrive already typed."""
+        cur = cn.cursor(name=f"arrow_{uuid.uuid4().hex}", binary=True)
+        cur.itersize = batch_size
+        return cur
+
+    def _arrow_types(self, description):
+        """Arrow type per column from the result's type OIDs."""
+        pa = require_pyarrow()
+        return [_ARROW_TYPES[d.type_code](pa) if d.type_code in _ARROW_TYPES else None
+                for d in description]
+
+    def _column_kinds(self, description):
+        """JSON value kind per column from the result's type OIDs."""
+        return [_JSON_KINDS.get(d.type_code, "native") for d in description]
+
+    def _cursor(self, cn, q: BoundQuery):
+        """Cursor for a rendered query; utility statements such as COMMENT need client-side binding."""
+        return self.pg.ClientCursor(cn) if q.client_binding else cn.cursor()
+
+    def _execute(self, cur, q: BoundQuery) -> None:
+        """Execute a rendered query with its bind parameters."""
+        self._timed_execute(cur, q.sql, q.params, prepare=q.prepare)
+
+    def _execute_bound(self, cur, query) -> None:
+        self._execute(cur, query)
+
+    def _list_schema_query(self, schema=None, table=None) -> BoundQuery:
+        """Build the list_schema catalog query."""
+        filters = build_postgres_filter_clause(schema, table)
+        return query_manager.render("postgres", "list_schema", **filters)
+
+    def _ontology_query(self, schema=None) -> BoundQuery:
+        """Build the foreign key catalog query."""
+        filters = build_postgres_filter_clause(schema=schema, prefix="tc.")
+        return query_manager.render("postgres", "get_foreign_keys", **filters)
+
     def list_schema(self, database=None, schema=None, table=None):
         """List PostgreSQL schema information."""
-        filters = build_postgres_filter_clause(schema, table)
-        query = query_manager.get_query("postgres", "list_schema", **filters)
+        query = self._list_schema_query(schema, table)
         
         with self._conn() as cn, cn.cursor() as cur:
-            params = tuple([x for x in (schema, table) if x])
-            cur.execute(query, params)
+            self._execute(cur, query)
             cols = [d[0] for d in cur.description]
-            return [dict(zip(cols, r)) for r in cur.fetchall()]
+            return [dict(zip(cols, r)) for r in self._fetchall(cur)]
 
     def update_metadata(self, args: MetadataArgs) -> str:
         """Update metadata in PostgreSQL."""
-        with self._conn() as cn, cn.cursor() as cur:
-            fq = f"{args.schema_name}.{args.table}"
-            
-            if args.level == "table" and args.comment is not None:
-                query = query_manager.get_query("postgres", "update_table_comment",
-                                               table_name=fq, comment=args.comment)
-                cur.execute(query)
-            if args.level == "column" and args.column and args.comment is not None:
-                query = query_manager.get_query("postgres", "update_column_comment",
-                                               table_name=fq, column_name=args.column, comment=args.comment)
-                cur.execute(query)
-            cn.commit()
-            return "ok"
+        query = self._metadata_statement(args)
+        if query is not None:
+            with self._conn() as cn, self._cursor(cn, query) as cur:
+                self._execute(cur, query)
+        return "ok"
+
+    def _metadata_statement(self, change: MetadataChange) -> Optional[BoundQuery]:
+        """Build the COMMENT statement for one change (None when there is nothing to do)."""
+        fq = f"{change.schema_name}.{change.table}"
+        if change.comment is None:
+            return None
+        if change.level == "table":
+            return query_manager.render("postgres", "update_table_comment",
+                                        table_name=fq, comment=change.comment)
+        if not change.column:
+            raise ValueError("Column required for level=column")
+        return query_manager.render("postgres", "update_column_comment",
+                                    table_name=fq, column_name=change.column, comment=change.comment)
+
+    def _metadata_plan(self, changes: List[MetadataChange]
+                       ) -> Tuple[List[Dict[str, Any]], List[Tuple[int, BoundQuery]]]:
+        """Per-item results (validation errors already recorded) and the (index, statement) pairs to run."""
+        results: List[Dict[str, Any]] = [{"index": i, "status": "ok"} for i in range(len(changes))]
+        stmts = []
+        for i, change in enumerate(changes):
+            try:
+                q = self._metadata_statement(change)
+            except ValueError as e:
+                results[i] = {"index": i, "status": "error", "error": str(e)}
+                continue
+            if q is not None:
+                stmts.append((i, q))
+        return results, stmts
+
+    @staticmethod
+    def _failed(results: List[Dict[str, Any]]) -> bool:
+        return any(r["status"] == "error" for r in results)
+
+    @staticmethod
+    def _roll_back(results: List[Dict[str, Any]]) -> None:
+        """Mark the items that had succeeded as rolled back (an atomic batch with failures)."""
+        for r in results:
+            if r["status"] == "ok":
+                r["status"] = "rolled_back"
+
+    def bulk_update_metadata(self, changes: List[MetadataChange], atomic: bool = False):
+        """Apply many COMMENT statements in one transaction using pipeline mode.
+
+        If the pipelined batch fails, the statements are replayed one savepoint at a
+        time to find which items failed; with ``atomic`` nothing is kept in that case,
+        and nothing runs at all when an item is invalid.
+        """
+        results, stmts = self._metadata_plan(changes)
+        if atomic and self._failed(results):
+            self._roll_back(results)  # an invalid item: nothing to run
+            return results
+        with self._conn() as cn:
+            try:
+                with cn.pipeline(), self.pg.ClientCursor(cn) as cur:
+                    for _, q in stmts:
+                        self._execute(cur, q)
+                cn.commit()
+                return results
+            except self.pg.Error:
+                cn.rollback()
+
+            # Locate the failing statements, one savepoint each.
+            with cn.transaction() as tx, self.pg.ClientCursor(cn) as cur:
+                for i, q in stmts:
+                    try:
+                        with cn.transaction():
+                            self._execute(cur, q)
+                    except self.pg.Error as e:
+                        results[i] = {"index": i, "status": "error", "error": str(e).strip()}
+                if atomic and self._failed(results):
+                    self._roll_back(results)
+                    raise self.pg.Rollback(tx)
+        return results
 
     def run_query(self, sql: str):
         """Execute a SQL query in PostgreSQL."""
         with self._conn() as cn, cn.cursor() as cur:
-            cur.execute(sql)
+            self._timed_execute(cur, sql)
             if cur.description:
                 cols = [d[0] for d in cur.description]
-                return [dict(zip(cols, r)) for r in cur.fetchall()]
+                return [dict(zip(cols, r)) for r in self._fetchall(cur)]
             return []
 
+    def export_query(self, sql: str, output: str, fmt: str = "parquet", compression=None,
+                     rows_per_file=None, batch_size: int = 10000, progress=None):
+        """Export a query result; single-file CSV streams ``COPY ... TO STDOUT`` straight to disk."""
+        opener = _COPY_OPENERS.get(compression)
+        if fmt != "csv" or rows_per_file or opener is None:
+            # COPY blocks are not row-aligned, so chunked files go through Arrow batches.
+            return super().export_query(sql, output, fmt, compression, rows_per_file, batch_size, progress)
+        written = reported = 0
+        copy_sql = f"COPY ({sql.strip().rstrip(';')}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+        with self._conn() as cn, cn.cursor() as cur, opener(output) as f, \
+                span("db.copy", db=self.db_type) as sp:
+            with cur.copy(copy_sql) as copy:
+                for block in copy:
+                    f.write(block)
+                    written += len(block)
+                    if progress is not None and written - reported >= _COPY_PROGRESS_BYTES:
+                        reported = written
+                        progress({"rows": None, "bytes": written, "files": 1})
+            rows = cur.rowcount
+            sp.set("rows", rows)
+            sp.set("bytes", written)
+        count("db.rows", rows, db=self.db_type)
+        if progress is not None:
+            progress({"rows": rows, "bytes": written, "files": 1})
+        return {"rows": rows, "files": [output]}
+
     def ontology(self, database=None, schema=None):
         """Get foreign key relationships from PostgreSQL."""
-        filters = build_postgres_filter_clause(schema=schema)
-        query = query_manager.get_query("postgres", "get_foreign_keys", **filters)
+        query = self._ontology_query(schema)
         
         with self._conn() as cn, cn.cursor() as cur:
-            cur.execute(query, (schema,) if schema else None)
-            edges = [{"from": f"{r[0]}.{r[1]}.{r[2]}", "to": f"{r[3]}.{r[4]}.{r[5]}"} for r in cur.fetchall()]
-        return {"edges": edges}
+            self._execute(cur, query)
+            return self._fk_edges(self._fetchall(cur))
+
+    def list_schemas(self):
+        """List (database, schema) pairs of the connected database."""
+        with self._conn() as cn, cn.cursor() as cur:
+            self._execute(cur, query_manager.render("postgres", "list_schemas"))
+            return [tuple(r) for r in self._fetchall(cur)]
+
+    def table_signatures(self, database=None, schema=None):
+        """FK constraint signature (oid:xmin) per table; PostgreSQL keeps no DDL timestamps."""
+        filters = build_postgres_filter_clause(schema=schema)
+        query = query_manager.render("postgres", "table_change_signatures", **filters)
+        with self._conn() as cn, cn.cursor() as cur:
+            self._execute(cur, query)
+            return {f"{r[0]}.{r[1]}": r[2] for r in self._fetchall(cur)}
+
+    def ontology_for_tables(self, tables, database=None):
+        """Get the foreign keys declared by the given tables."""
+        query = query_manager.render("postgres", "get_foreign_keys_for_tables",
+                                     **build_in_list("table_list", tables))
+        with self._conn() as cn, cn.cursor() as cur:
+            self._execute(cur, query)
+            return self._fk_edges(self._fetchall(cur))
+
+class AsyncPostgresAdapter(AsyncDBAdapter):
+    """Asynchronous PostgreSQL adapter built on psycopg's AsyncConnection."""
+
+    db_type = "postgres"
+
+    def __init__(self, c: Conn):
+        # The sync adapter is only used to build queries; its pool is never opened.
+        self.sync = PostgresAdapter(c)
+        self.pg = self.sync.pg
+        self.c = c
+
+    async def _connect(self):
+        """Create an asynchronous PostgreSQL connection."""
+        return await self.pg.AsyncConnection.connect(**self.sync._connect_kwargs())
+
+    async def _check_connection(self, cn) -> bool:
+        """Ping an idle PostgreSQL connection before reusing it."""
+        if cn.closed or cn.broken:
+            return False
+        await cn.execute("SELECT 1")
+        await cn.rollback()
+        return True
+
+    async def _fetch(self, query: BoundQuery):
+        """Run a query and return its rows as dicts (empty for statements without results)."""
+        async with self._conn() as cn, cn.cursor() as cur:
+            await self._timed_execute(cur, query.sql, query.params, prepare=query.prepare)
+            if not cur.description:
+                return []
+            cols = [d[0] for d in cur.description]
+            return [dict(zip(cols, r)) for r in await self._fetchall(cur)]
+
+    async def list_schema(self, database=None, schema=None, table=None):
+        """List PostgreSQL schema information."""
+        return await self._fetch(self.sync._list_schema_query(schema, table))
+
+    async def update_metadata(self, args: MetadataArgs) -> str:
+        """Update metadata in PostgreSQL."""
+        query = self.sync._metadata_statement(args)
+        if query is not None:
+            async with self._conn() as cn, self.pg.AsyncClientCursor(cn) as cur:
+                await self._timed_execute(cur, query.sql, query.params)
+        return "ok"
+
+    async def bulk_update_metadata(self, changes: List[MetadataChange], atomic: bool = False):
+        """Pipelined equivalent of :meth:`PostgresAdapter.bulk_update_metadata`."""
+        results, stmts = self.sync._metadata_plan(changes)
+        if atomic and self.sync._failed(results):
+            self.sync._roll_back(results)
+            return results
+        async with self._conn() as cn:
+            try:
+                async with cn.pipeline(), self.pg.AsyncClientCursor(cn) as cur:
+                    for _, q in stmts:
+                        await self._timed_execute(cur, q.sql, q.params)
+                await cn.commit()
+                return results
+            except self.pg.Error:
+                await cn.rollback()
+
+            async with cn.transaction() as tx, self.pg.AsyncClientCursor(cn) as cur:
+                for i, q in stmts:
+                    try:
+                        async with cn.transaction():
+                            await self._timed_execute(cur, q.sql, q.params)
+                    except self.pg.Error as e:
+                        results[i] = {"index": i, "status": "error", "error": str(e).strip()}
+                if atomic and self.sync._failed(results):
+                    self.sync._roll_back(results)
+                    raise self.pg.Rollback(tx)
+        return results
+
+    async def run_query(self, sql: str):
+        """Execute a SQL query in PostgreSQL."""
+        return await self._fetch(BoundQuery(sql, None))
+
+    async def run_query_arrow(self, sql: str, batch_size: int = 10000):
+        """Execute a SQL query and return a ``pyarrow.Table`` built column by column."""
+        batches = []
+        async with self._conn() as cn, cn.cursor(binary=True) as cur:
+            await self._timed_execute(cur, sql)
+            if not cur.description:
+                return record_batches_to_table(batches)
+            cols = [d[0] for d in cur.description]
+            types = self.sync._arrow_types(cur.description)
+            while True:
+                with span("db.fetch", db=self.db_type) as sp:
+                    rows = await cur.fetchmany(batch_size)
+                    sp.set("rows", len(rows))
+                count("db.rows", len(rows), db=self.db_type)
+                if not rows:
+                    break
+                batches.append(rows_to_record_batch(rows, cols, types))
+                types = pin_types(types, batches[-1])
+            if not batches:
+                batches.append(rows_to_record_batch([], cols, types))
+        return record_batches_to_table(batches)
+
+    async def ontology(self, database=None, schema=None):
+        """Get foreign key relationships from PostgreSQL."""
+        async with self._conn() as cn, cn.cursor() as cur:
+            query = self.sync._ontology_query(schema)
+            await self._timed_execute(cur, query.sql, query.params, prepare=query.prepare)
+            return self.sync._fk_edges(await self._fetchall(cur))
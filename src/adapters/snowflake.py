@@ -1,21 +1,53 @@
 """Snowflake database adapter."""
 
-import snowflake.connector as sf
-from typing import List, Dict, Any
-from .base import DBAdapter
-from ..models.schemas import Conn, MetadataArgs
-from ..utils import ident, build_filter_clause
-from ..queries import query_manager
+import asyncio
+import itertools
+import math
+from typing import List, Dict, Any, Tuple
+from .base import DBAdapter, AsyncDBAdapter
+from ..models.schemas import Conn, MetadataArgs, MetadataChange
+from ..utils import ident, build_filter_clause, build_in_list
+from ..queries import query_manager, BoundQuery
+from ..utils.arrow import rows_to_record_batch
+from ..instrumentation import count, span
 import os
 
+# Max statements sent in one multi-statement request by bulk_update_metadata
+_MULTI_STATEMENT_BATCH = 200
+
+def _catalog(database=None) -> Dict[str, str]:
+    """Qualify INFORMATION_SCHEMA with the database, so any database is readable from one session."""
+    return {"catalog": f"{ident(database)}."} if database else {}
+
+# Bounds for the query-status polling interval used by the async adapter (seconds)
+_POLL_MIN = 0.05
+_POLL_MAX = 1.0
+
+# Value kinds for Snowflake result type codes that need converting before JSON encoding
+# (FIXED is handled by scale: Decimal when scale > 0, int otherwise)
+_JSON_KINDS = {
+    3: "date",       # DATE
+    4: "datetime",   # TIMESTAMP
+    6: "datetime",   # TIMESTAMP_LTZ
+    7: "datetime",   # TIMESTAMP_TZ
+    8: "datetime",   # TIMESTAMP_NTZ
+    11: "bytes",     # BINARY
+    12: "time",      # TIME
+}
+
 class SnowflakeAdapter(DBAdapter):
     """Adapter for Snowflake database connections."""
+
+    db_type = "snowflake"
+    statement_timeouts = True
+    detached_queries = True
     
     def __init__(self, c: Conn):
+        import snowflake.connector as sf
         self._sf = sf
         self.c = c
 
-    def _conn(self):
+    def _connect(self):
         """Create a Snowflake connection."""
         return self._sf.connect(
             account=self.c.account or os.getenv("SNOWFLAKE_ACCOUNT"), 
@@ -27,67 +59,404 @@ class SnowflakeAdapter(DBAdapter):
             role=self.c.role or os.getenv("SNOWFLAKE_ROLE")
         )
 
+    def _check_connection(self, cn) -> bool:
+        """Check that an idle Snowflake session is still alive."""
+        return not cn.is_closed() and cn.is_valid()
+
+    @staticmethod
+    def fold_identifier(name: str) -> str:
+        """Snowflake upper-cases unquoted identifiers, result column names included."""
+        return name.upper()
+
+    def _column_kinds(self, description):
+        """JSON value kind per column from the result's type codes."""
+        return [("decimal" if d[5] else "native") if d[1] == 0 else _JSON_KINDS.get(d[1], "native")
+                for d in description]
+
+    def _list_schema_query(self, database=None, schema=None, table=None) -> BoundQuery:
+        """Build the list_schema catalog query."""
+        # An unscoped listing uses the custom query if available; a scoped one (a crawl of one
+        # database or schema, say) always needs the filtered standard query
+        if not (database or schema or table):
+            try:
+                return query_manager.render("snowflake", "list_schema_custom")
+            except (KeyError, FileNotFoundError):
+                pass
+        filters = build_filter_clause(database, schema, table)
+        return query_manager.render("snowflake", "list_schema", **filters, **_catalog(database))
+
+    def _page_filters(self, database=None, schema=None, table=None):
+        """Catalog filters for paginated listings, reading the given database's INFORMATION_SCHEMA."""
+        return {**build_filter_clause(database, schema, table), **_catalog(database)}
+
+    def _ontology_query(self, schema=None, database=None) -> BoundQuery:
+        """Build the foreign key catalog query."""
+        filters = build_filter_clause(schema=schema, prefix="tc.")
+        return query_manager.render("snowflake", "get_foreign_keys", **filters, **_catalog(database))
+
     def list_schema(self, database=None, schema=None, table=None):
         """List Snowflake schema information."""
-        print("Executing Snowflake list_schema")
-        
-        # Use custom query if available, otherwise use standard schema query
-        try:
-            query = query_manager.get_query("snowflake", "list_schema_custom")
-        except (KeyError, FileNotFoundError):
-            # Fallback to standard schema query
-            filters = build_filter_clause(database, schema, table)
-            query = query_manager.get_query("snowflake", "list_schema", **filters)
+        query = self._list_schema_query(database, schema, table)
         
         with self._conn() as cn:
             cur = cn.cursor()
-            cur.execute(query)
+            self._timed_execute(cur, query.sql, query.params)
             cols = [d[0] for d in cur.description]
-            return [dict(zip(cols, r)) for r in cur.fetchall()]
+            return [dict(zip(cols, r)) for r in self._fetchall(cur)]
 
     def update_metadata(self, args: MetadataArgs) -> str:
         """Update metadata in Snowflake."""
+        fq = ident(args.database or self.c.database, args.schema_name, args.table)
+        stmts = self._metadata_statements(fq, args)
         with self._conn() as cn:
             cur = cn.cursor()
-            fq = ident(args.database or self.c.database, args.schema_name, args.table)
-            
-            if args.level == "table":
-                if args.comment is not None:
-                    query = query_manager.get_query("snowflake", "update_table_comment", 
-                                                  table_name=fq, comment=args.comment)
-                    cur.execute(query)
-                if args.tags:
-                    for k, v in args.tags.items():
-                        query = query_manager.get_query("snowflake", "set_table_tag",
-                                                       table_name=fq, tag_name=k, tag_value=v)
-                        cur.execute(query)
-            else:  # column
-                col = args.column or ""
-                if not col:
-                    raise ValueError("Column required for level=column")
-                if args.comment is not None:
-                    query = query_manager.get_query("snowflake", "update_column_comment",
-                                                   table_name=fq, column_name=col, comment=args.comment)
-                    cur.execute(query)
+            for query in stmts:
+                self._timed_execute(cur, query.sql, query.params)
             return "ok"
 
+    def _metadata_statements(self, fq: str, change: MetadataChange) -> List[BoundQuery]:
+        """Individual ALTER statements for one change, as update_metadata would run them."""
+        stmts = []
+        if change.level == "table":
+            if change.comment is not None:
+                stmts.append(query_manager.render("snowflake", "update_table_comment",
+                                                  table_name=fq, comment=change.comment))
+            for k, v in (change.tags or {}).items():
+                stmts.append(query_manager.render("snowflake", "set_table_tag", table_name=fq,
+                                                  tag_name=ident(k), tag_value=v))
+        else:
+            if not change.column:
+                raise ValueError("Column required for level=column")
+            if change.comment is not None:
+                stmts.append(query_manager.render("snowflake", "update_column_comment", table_name=fq,
+                                                  column_name=ident(change.column), comment=change.comment))
+        return stmts
+
+    def bulk_update_metadata(self, changes: List[MetadataChange], atomic: bool = False):
+        """Apply many metadata changes, combining them into one ALTER per table and kind.
+
+        Column comments for a table become a single multi-column ``ALTER ... MODIFY``,
+        tags a single ``SET TAG``, and the statements are sent as multi-statement
+        requests. When a request fails, its statements are retried item by item to
+        report exactly which changes failed. Snowflake DDL commits implicitly, so
+        ``atomic`` cannot roll back changes that already succeeded.
+        """
+        results: List[Dict[str, Any]] = [{"index": i, "status": "ok"} for i in range(len(changes))]
+        single: Dict[int, List[BoundQuery]] = {}
+        tables: Dict[str, Dict[str, Any]] = {}
+        for i, change in enumerate(changes):
+            try:
+                fq = ident(change.database or self.c.database, change.schema_name, change.table)
+                single[i] = self._metadata_statements(fq, change)
+            except ValueError as e:
+                results[i] = {"index": i, "status": "error", "error": str(e)}
+                continue
+            g = tables.setdefault(fq, {"comment": None, "tags": {}, "columns": {}, "items": {}})
+            if change.level == "table":
+                if change.comment is not None:
+                    g["comment"] = change.comment
+                    g["items"].setdefault("comment", []).append(i)
+                if change.tags:
+                    g["tags"].update(change.tags)
+                    g["items"].setdefault("tags", []).append(i)
+            elif change.comment is not None:
+                g["columns"][change.column] = change.comment
+                g["items"].setdefault("columns", []).append(i)
+
+        if atomic and any(r["status"] == "error" for r in results):
+            for r in results:
+                if r["status"] == "ok":
+                    r["status"] = "skipped"
+            return results
+
+        # Multi-statement requests cannot carry bind parameters, so values are inlined escaped.
+        combined: List[Tuple[str, List[int]]] = []
+        for fq, g in tables.items():
+            if g["comment"] is not None:
+                combined.append((query_manager.get_query("snowflake", "update_table_comment",
+                                                         table_name=fq, comment=g["comment"]),
+                                 g["items"]["comment"]))
+            if g["tags"]:
+                values = {f"tag_{n}": v for n, v in enumerate(g["tags"].values())}
+                assignments = ", ".join(f"{ident(k)} = '{{tag_{n}}}'" for n, k in enumerate(g["tags"]))
+                combined.append((query_manager.get_query("snowflake", "set_table_tags", table_name=fq,
+                                                         tag_assignments=assignments, **values),
+                                 g["items"]["tags"]))
+            if g["columns"]:
+                values = {f"comment_{n}": v for n, v in enumerate(g["columns"].values())}
+                columns = ", ".join(f"COLUMN {ident(c)} COMMENT '{{comment_{n}}}'" for n, c in enumerate(g["columns"]))
+                combined.append((query_manager.get_query("snowflake", "update_column_comments", table_name=fq,
+                                                         column_comments=columns, **values),
+                                 g["items"]["columns"]))
+
+        with self._conn() as cn:
+            cur = cn.cursor()
+            for start in range(0, len(combined), _MULTI_STATEMENT_BATCH):
+                chunk = combined[start:start + _MULTI_STATEMENT_BATCH]
+                try:
+                    self._timed_execute(cur, ";\n".join(sql for sql, _ in chunk), num_statements=len(chunk))
+                    while cur.nextset():
+                        pass
+                    continue
+                except self._sf.Error:
+                    pass
+                for sql, items in chunk:
+                    try:
+                        self._timed_execute(cur, sql)
+                        continue
+                    except self._sf.Error as e:
+                        if len(items) == 1:
+                            results[items[0]] = {"index": items[0], "status": "error", "error": str(e)}
+                            continue
+                    for i in items:
+                        try:
+                            for stmt in single[i]:
+                                self._timed_execute(cur, stmt.sql, stmt.params)
+                        except self._sf.Error as e:
+                            results[i] = {"index": i, "status": "error", "error": str(e)}
+        return results
+
     def run_query(self, sql: str):
         """Execute a SQL query in Snowflake."""
         with self._conn() as cn:
             cur = cn.cursor()
-            cur.execute(sql)
+            self._timed_execute(cur, sql)
             if cur.description:
                 cols = [d[0] for d in cur.description]
-                return [dict(zip(cols, r)) for r in cur.fetchall()]
+                return [dict(zip(cols, r)) for r in self._fetchall(cur)]
             return []
 
+    def arrow_batches(self, sql: str, batch_size: int = 10000):
+        """Fetch the result natively as Arrow batches (``fetch_arrow_batches``), without Python rows."""
+        with self._conn() as cn:
+            cur = cn.cursor()
+            try:
+                self._timed_execute(cur, sql)
+                if not cur.description:
+                    return
+                try:
+                    tables = cur.fetch_arrow_batches()
+                    first = next(tables, None)
+                except self._sf.NotSupportedError:
+                    # Results not returned in Arrow format (e.g. SHOW/DESCRIBE)
+                    yield from self._arrow_from_rows(cur, batch_size)
+                    return
+                if first is None:
+                    yield rows_to_record_batch([], [d[0] for d in cur.description])
+                    return
+                for table in itertools.chain([first], tables):
+                    yield from table.to_batches(max_chunksize=batch_size)
+            finally:
+                cur.close()
+
     def ontology(self, database=None, schema=None):
         """Get foreign key relationships from Snowflake."""
-        filters = build_filter_clause(schema=schema)
-        query = query_manager.get_query("snowflake", "get_foreign_keys", **filters)
+        query = self._ontology_query(schema, database)
         
         with self._conn() as cn:
             cur = cn.cursor()
-            cur.execute(query)
-            edges = [{"from": f"{r[0]}.{r[1]}.{r[2]}", "to": f"{r[3]}.{r[4]}.{r[5]}"} for r in cur.fetchall()]
-        return {"edges": edges}
+            self._timed_execute(cur, query.sql, query.params)
+            return self._fk_edges(self._fetchall(cur))
+
+    def list_schemas(self):
+        """List (database, schema) pairs across the account (``SHOW TERSE SCHEMAS``)."""
+        query = query_manager.render("snowflake", "list_schemas")
+        with self._conn() as cn:
+            cur = cn.cursor()
+            self._timed_execute(cur, query.sql, query.params)
+            cols = [d[0].lower() for d in cur.description]
+            db, name = cols.index("database_name"), cols.index("name")
+            return [(r[db], r[name]) for r in self._fetchall(cur) if r[name] != "INFORMATION_SCHEMA"]
+
+    def table_signatures(self, database=None, schema=None):
+        """LAST_ALTERED per table, used as its change marker."""
+        filters = build_filter_clause(database, schema)
+        query = query_manager.render("snowflake", "table_change_signatures", **filters, **_catalog(database))
+        with self._conn() as cn:
+            cur = cn.cursor()
+            self._timed_execute(cur, query.sql, query.params)
+            return {f"{r[0]}.{r[1]}": r[2] for r in self._fetchall(cur)}
+
+    def ontology_for_tables(self, tables, database=None):
+        """Get the foreign keys declared by the given tables."""
+        query = query_manager.render("snowflake", "get_foreign_keys_for_tables",
+                                     **build_in_list("table_list", tables), **_catalog(database))
+        with self._conn() as cn:
+            cur = cn.cursor()
+            self._timed_execute(cur, query.sql, query.params)
+            return self._fk_edges(self._fetchall(cur))
+
+    # ----- asynchronous submission: the query ID is the handle -----
+
+    def _timeout_options(self, cur, seconds: float):
+        """Per-statement STATEMENT_TIMEOUT_IN_SECONDS, enforced by the warehouse."""
+        return {"_statement_params": {"STATEMENT_TIMEOUT_IN_SECONDS": max(1, math.ceil(seconds))}}
+
+    def submit_query(self, sql: str, timeout=None, batch_size: int = 10000) -> str:
+        """Submit with ``execute_async`` and return the query ID without waiting.
+
+        The query runs detached on the warehouse, so its ID can be polled, cancelled
+        and fetched from any session of the same user, including other processes.
+        """
+        with self._conn() as cn:
+            cur = cn.cursor()
+            options = self._timeout_options(cur, timeout) if timeout is not None else {}
+            with span("db.execute", db=self.db_type):
+                cur.execute_async(sql, **options)
+            return cur.sfqid
+
+    def _status(self, cn, handle: str) -> Dict[str, Any]:
+        status = cn.get_query_status(handle)
+        if cn.is_still_running(status):
+            state = "running"
+        elif status.name == "SUCCESS":
+            state = "succeeded"
+        else:
+            state = "cancelled" if status.name in ("ABORTING", "ABORTED") else "failed"
+        out = {"handle": handle, "state": state, "detail": status.name}
+        if state == "failed":
+            try:
+                cn.get_query_status_throw_if_error(handle)
+            except self._sf.Error as e:
+                out["error"] = str(e)
+        return out
+
+    def query_status(self, handle: str) -> Dict[str, Any]:
+        """Normalized state of a submitted query, plus Snowflake's own status name."""
+        with self._conn() as cn:
+            return self._status(cn, handle)
+
+    def cancel_query(self, handle: str) -> bool:
+        """Cancel a running query with ``SYSTEM$CANCEL_QUERY``; False if it had already finished."""
+        with self._conn() as cn:
+            if self._status(cn, handle)["state"] != "running":
+                return False
+            cur = cn.cursor()
+            query = query_manager.render("snowflake", "cancel_query", query_id=handle)
+            self._timed_execute(cur, query.sql, query.params)
+        return True
+
+    def fetch_query(self, handle: str, batch_size: int = 10000):
+        """Rows of a finished query, read from its result set (kept by Snowflake for 24 hours)."""
+        with self._conn() as cn:
+            status = self._status(cn, handle)
+            if status["state"] == "running":
+                raise ValueError(f"Query {handle} is still running")
+            if status["state"] != "succeeded":
+                raise ValueError(f"Query {handle} {status['state']}: {status.get('error', status['detail'])}")
+            cur = cn.cursor()
+            with span("db.execute", db=self.db_type):
+                cur.get_results_from_sfqid(handle)
+            if not cur.description:
+                return []
+            return [row for batch in self._json_rows(cur, batch_size) for row in batch]
+
+class _ThreadedConnection:
+    """Awaitable facade over a blocking Snowflake connection, for the async pool."""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    async def commit(self):
+        """Commit in a worker thread."""
+        await asyncio.to_thread(self.raw.commit)
+
+    async def rollback(self):
+        """Roll back in a worker thread."""
+        await asyncio.to_thread(self.raw.rollback)
+
+    async def close(self):
+        """Close in a worker thread."""
+        await asyncio.to_thread(self.raw.close)
+
+class AsyncSnowflakeAdapter(AsyncDBAdapter):
+    """Asynchronous Snowflake adapter.
+
+    Statements are submitted with ``execute_async`` and the event loop polls the
+    query status instead of blocking a thread for the whole warehouse run.
+    """
+
+    db_type = "snowflake"
+
+    def __init__(self, c: Conn):
+        # The sync adapter builds queries and opens sessions; bulk_update_metadata and
+        # run_query_arrow also run on its own pool in worker threads, so close() closes it.
+        self.sync = SnowflakeAdapter(c)
+        self.c = c
+
+    async def close(self) -> None:
+        """Close the async pool and the sync adapter's pool."""
+        await super().close()
+        await asyncio.to_thread(self.sync.close)
+
+    async def _connect(self):
+        """Create a Snowflake connection without blocking the event loop."""
+        return _ThreadedConnection(await asyncio.to_thread(self.sync._connect))
+
+    async def _check_connection(self, cn) -> bool:
+        """Check that an idle Snowflake session is still alive."""
+        return await asyncio.to_thread(self.sync._check_connection, cn.raw)
+
+    async def _execute(self, cn, query: BoundQuery):
+        """Submit a statement asynchronously and wait for it by polling its status."""
+        with span("db.execute", db=self.db_type):
+            cur = cn.cursor()
+            await asyncio.to_thread(cur.execute_async, query.sql, query.params)
+            qid = cur.sfqid
+            delay = _POLL_MIN
+            while True:
+                status = await asyncio.to_thread(cn.get_query_status_throw_if_error, qid)
+                if not cn.is_still_running(status):
+                    break
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _POLL_MAX)
+            await asyncio.to_thread(cur.get_results_from_sfqid, qid)
+        return cur
+
+    async def _fetchall(self, cur) -> list:
+        """Fetch every row in a worker thread, recording the ``db.fetch`` phase."""
+        with span("db.fetch", db=self.db_type) as sp:
+            rows = await asyncio.to_thread(cur.fetchall)
+            sp.set("rows", len(rows))
+        count("db.rows", len(rows), db=self.db_type)
+        return rows
+
+    async def _fetch(self, query: BoundQuery):
+        """Run a query and return its rows as dicts (empty for statements without results)."""
+        async with self._conn() as cn:
+            cur = await self._execute(cn.raw, query)
+            if not cur.description:
+                return []
+            cols = [d[0] for d in cur.description]
+            return [dict(zip(cols, r)) for r in await self._fetchall(cur)]
+
+    async def list_schema(self, database=None, schema=None, table=None):
+        """List Snowflake schema information."""
+        return await self._fetch(self.sync._list_schema_query(database, schema, table))
+
+    async def update_metadata(self, args: MetadataArgs) -> str:
+        """Update metadata in Snowflake."""
+        fq = ident(args.database or self.c.database, args.schema_name, args.table)
+        stmts = self.sync._metadata_statements(fq, args)
+        async with self._conn() as cn:
+            for query in stmts:
+                await self._execute(cn.raw, query)
+        return "ok"
+
+    async def bulk_update_metadata(self, changes: List[MetadataChange], atomic: bool = False):
+        """Run the sync multi-statement implementation in a worker thread."""
+        return await asyncio.to_thread(self.sync.bulk_update_metadata, changes, atomic)
+
+    async def run_query_arrow(self, sql: str, batch_size: int = 10000):
+        """Run the sync Arrow fetch in a worker thread."""
+        return await asyncio.to_thread(self.sync.run_query_arrow, sql, batch_size)
+
+    async def run_query(self, sql: str):
+        """Execute a SQL query in Snowflake."""
+        return await self._fetch(BoundQuery(sql, None))
+
+    async def ontology(self, database=None, schema=None):
+        """Get foreign key relationships from Snowflake."""
+        async with self._conn() as cn:
+            cur = await self._execute(cn.raw, self.sync._ontology_query(schema, database))
+            return self.sync._fk_edges(await self._fetchall(cur))
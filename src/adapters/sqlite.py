@@ -0,0 +1,226 @@
+"""SQLite database adapter.
+
+Runs against a local database file with no server, so the tools, adapters and query
+manager can be exercised and benchmarked offline. SQLite has a single schema, ``main``,
+and no COMMENT statement: comments live in a ``_db_agent_comments`` side table.
+"""
+
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+from .base import DBAdapter
+from ..models.schemas import Conn, MetadataArgs, MetadataChange
+from ..utils import build_postgres_filter_clause, build_in_list
+from ..queries import query_manager, BoundQuery
+
+class _LatencyCursor:
+    """Cursor proxy that waits ``latency`` seconds per simulated round trip (execute, fetch)."""
+
+    def __init__(self, cur, latency: float):
+        self._cur = cur
+        self._latency = latency
+
+    def execute(self, sql, params=()):
+        time.sleep(self._latency)
+        self._cur.execute(sql, params)
+        return self
+
+    def executemany(self, sql, seq):
+        time.sleep(self._latency)
+        self._cur.executemany(sql, seq)
+        return self
+
+    def fetchmany(self, size=None):
+        time.sleep(self._latency)
+        return self._cur.fetchmany(size or self._cur.arraysize)
+
+    def fetchall(self):
+        time.sleep(self._latency)
+        return self._cur.fetchall()
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+class _LatencyConnection:
+    """Connection proxy adding a fixed delay to each round trip, to model a remote server."""
+
+    def __init__(self, raw, latency: float):
+        self._raw = raw
+        self._latency = latency
+
+    def cursor(self):
+        return _LatencyCursor(self._raw.cursor(), self._latency)
+
+    def commit(self):
+        time.sleep(self._latency)
+        self._raw.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+class SQLiteAdapter(DBAdapter):
+    """Adapter for SQLite database files.
+
+    ``latency`` (seconds) is added to every execute, fetch and commit, so benchmarks
+    can model network round trips.
+    """
+
+    db_type = "sqlite"
+
+    def __init__(self, c: Conn, latency: float = 0.0):
+        if not c.path:
+            raise ValueError("SQLite connections require 'path'")
+        self.c = c
+        self.latency = latency
+
+    def _connect(self):
+        """Open the database file and make sure the comments table exists."""
+        raw = sqlite3.connect(self.c.path, check_same_thread=False)
+        raw.execute(query_manager.render("sqlite", "create_comments_table").sql)
+        raw.commit()
+        return _LatencyConnection(raw, self.latency) if self.latency else raw
+
+    def _interrupt(self, cn, cur) -> None:
+        """Abort the statement running on ``cn`` (thread-safe in sqlite3).
+
+        ``interrupt`` alone is lost when the statement has not started yet, so a
+        progress handler also aborts it as soon as it runs. It is set second: it waits
+        for the connection's mutex, which a running statement holds until interrupted.
+        """
+        cn.interrupt()
+        cn.set_progress_handler(lambda: 1, 1000)
+
+    def _end_job(self, cn) -> None:
+        """Remove the progress handler set by ``_interrupt``."""
+        cn.set_progress_handler(None, 0)
+
+    def _execute(self, cur, q: BoundQuery) -> None:
+        """Execute a rendered query with its bind parameters."""
+        self._timed_execute(cur, q.sql, q.params or {})
+
+    def _fetch(self, q: BoundQuery) -> List[tuple]:
+        """Run a catalog query and return its rows."""
+        with self._conn() as cn:
+            cur = cn.cursor()
+            try:
+                self._execute(cur, q)
+                return self._fetchall(cur)
+            finally:
+                cur.close()
+
+    def list_schema(self, database=None, schema=None, table=None):
+        """List SQLite schema information."""
+        query = query_manager.render("sqlite", "list_schema", **build_postgres_filter_clause(schema, table))
+        with self._conn() as cn:
+            cur = cn.cursor()
+            try:
+                self._execute(cur, query)
+                cols = [d[0] for d in cur.description]
+                return [dict(zip(cols, r)) for r in self._fetchall(cur)]
+            finally:
+                cur.close()
+
+    def _metadata_statement(self, change: MetadataChange) -> Optional[BoundQuery]:
+        """Build the comment upsert for one change (None when there is nothing to do)."""
+        if change.comment is None:
+            return None
+        if change.level == "column" and not change.column:
+            raise ValueError("Column required for level=column")
+        return query_manager.render("sqlite", "upsert_comment", schema=change.schema_name, table=change.table,
+                                    column=change.column if change.level == "column" else "",
+                                    comment=change.comment)
+
+    @staticmethod
+    def _target(change: MetadataChange) -> str:
+        return ".".join(p for p in (change.schema_name, change.table, change.column) if p)
+
+    def update_metadata(self, args: MetadataArgs) -> str:
+        """Update metadata in SQLite."""
+        query = self._metadata_statement(args)
+        if query is not None:
+            with self._conn() as cn:
+                cur = cn.cursor()
+                try:
+                    self._execute(cur, query)
+                    if cur.rowcount == 0:
+                        raise ValueError(f"Table or column not found: {self._target(args)}")
+                finally:
+                    cur.close()
+        return "ok"
+
+    def bulk_update_metadata(self, changes: List[MetadataChange], atomic: bool = False):
+        """Apply many comment upserts in one transaction.
+
+        A failed statement only undoes itself in SQLite, so failures are recorded per
+        item; with ``atomic`` nothing is kept if any item fails.
+        """
+        results: List[Dict[str, Any]] = [{"index": i, "status": "ok"} for i in range(len(changes))]
+        stmts = []
+        for i, change in enumerate(changes):
+            try:
+                q = self._metadata_statement(change)
+            except ValueError as e:
+                results[i] = {"index": i, "status": "error", "error": str(e)}
+                continue
+            if q is not None:
+                stmts.append((i, q))
+
+        def failed():
+            return any(r["status"] == "error" for r in results)
+
+        if not (atomic and failed()):
+            with self._conn() as cn:
+                cur = cn.cursor()
+                try:
+                    for i, q in stmts:
+                        try:
+                            self._execute(cur, q)
+                        except sqlite3.Error as e:
+                            results[i] = {"index": i, "status": "error", "error": str(e)}
+                            continue
+                        if cur.rowcount == 0:
+                            results[i] = {"index": i, "status": "error",
+                                          "error": f"Table or column not found: {self._target(changes[i])}"}
+                finally:
+                    cur.close()
+                if atomic and failed():
+                    cn.rollback()
+        if atomic and failed():
+            for r in results:
+                if r["status"] == "ok":
+                    r["status"] = "rolled_back"
+        return results
+
+    def run_query(self, sql: str):
+        """Execute a SQL query in SQLite."""
+        with self._conn() as cn:
+            cur = cn.cursor()
+            try:
+                self._timed_execute(cur, sql)
+                if cur.description:
+                    cols = [d[0] for d in cur.description]
+                    return [dict(zip(cols, r)) for r in self._fetchall(cur)]
+                return []
+            finally:
+                cur.close()
+
+    def ontology(self, database=None, schema=None):
+        """Get foreign key relationships from SQLite."""
+        query = query_manager.render("sqlite", "get_foreign_keys", **build_postgres_filter_clause(schema=schema))
+        return self._fk_edges(self._fetch(query))
+
+    def list_schemas(self):
+        """List (database, schema) pairs; a SQLite file has the single schema ``main``."""
+        return [tuple(r) for r in self._fetch(query_manager.render("sqlite", "list_schemas"))]
+
+    def table_signatures(self, database=None, schema=None):
+        """Foreign key list signature per table."""
+        query = query_manager.render("sqlite", "table_change_signatures",
+                                     **build_postgres_filter_clause(schema=schema))
+        return {f"{r[0]}.{r[1]}": r[2] for r in self._fetch(query)}
+
+    def ontology_for_tables(self, tables, database=None):
+        """Get the foreign keys declared by the given tables."""
+        query = query_manager.render("sqlite", "get_foreign_keys_for_tables",
+                                     **build_in_list("table_list", tables))
+        return self._fk_edges(self._fetch(query))
@@ -20,8 +20,10 @@ except ImportError:
         def __init__(self, **kwargs):
             pass
 
-from ..models.schemas import Conn, DBType
+from ..models.schemas import DBType
 from ..tools import run_deterministic
+from ..utils import load_env
+from .intent import DEFAULT_CACHE_PATH, IntentCache, IntentResolver
 
 class DatabaseActionRequest(BaseModel):
     """Structured request for database operations."""
@@ -33,11 +35,15 @@ class DatabaseActionRequest(BaseModel):
 class DatabaseAgent:
     """Intelligent agent that processes natural language requests and determines database operations."""
     
-    def __init__(self, openai_api_key: Optional[str] = None):
-        """Initialize the database agent with OpenAI integration."""
+    def __init__(self, openai_api_key: Optional[str] = None, intent_cache_path: Optional[str] = None):
+        """Initialize the database agent with OpenAI integration.
+
+        ``intent_cache_path`` defaults to ``DB_AGENT_INTENT_CACHE`` or ~/.cache/db_agent; "" disables persistence.
+        """
         if not LANGCHAIN_AVAILABLE:
             raise ImportError("LangChain is not installed. Install with: pip install langchain langchain-openai langchain-core")
         
+        load_env()
         self.api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable or pass it directly.")
@@ -86,15 +92,27 @@ Respond with a JSON object containing the action, database_type, connection_para
 """)
         
         self.chain = self.prompt | self.llm | self.parser
+        self.format_instructions = self.parser.get_format_instructions()
+
+        if intent_cache_path is None:
+            intent_cache_path = os.getenv("DB_AGENT_INTENT_CACHE", DEFAULT_CACHE_PATH)
+        self.resolver = IntentResolver(self._llm_resolve, IntentCache(intent_cache_path or None))
+    
+    def _llm_resolve(self, user_request: str) -> Dict[str, Any]:
+        """Ask the model for the structured operation."""
+        return self.chain.invoke({
+            "user_request": user_request,
+            "format_instructions": self.format_instructions
+        })
     
     def process_request(self, user_request: str) -> DatabaseActionRequest:
-        """Process a natural language request and return structured database operation."""
+        """Process a natural language request and return structured database operation.
+
+        Unambiguous requests are resolved by rules and repeated ones from the intent cache;
+        only the rest reach the model.
+        """
         try:
-            result = self.chain.invoke({
-                "user_request": user_request,
-                "format_instructions": self.parser.get_format_instructions()
-            })
-            return result
+            return self.resolver.resolve(user_request)
         except Exception as e:
             raise ValueError(f"Failed to process request: {str(e)}")
     
@@ -103,15 +121,9 @@ Respond with a JSON object containing the action, database_type, connection_para
         # Parse the user request
         parsed_request = self.process_request(user_request)
         
-        # Build the connection object
-        conn = Conn(
-            type=parsed_request["database_type"],
-            **parsed_request["connection_params"]
-        )
-        
-        # Prepare the payload for the deterministic execution
+        # Prepare the payload for the deterministic execution (validated once, connection included)
         payload = {
-            "conn": conn.model_dump(by_alias=True)
+            "conn": {"type": parsed_request["database_type"], **parsed_request["connection_params"]}
         }
         
         # Add additional parameters if any
@@ -157,7 +169,8 @@ class DatabaseAgentManager:
             "available_actions": self.agent.get_available_actions(),
             "supported_databases": self.agent.get_supported_databases(),
             "model": "gpt-4",
-            "temperature": 0.1
+            "temperature": 0.1,
+            "intent_resolution": dict(self.agent.resolver.stats)
         }
 
 # Utility function to check if LangChain is available
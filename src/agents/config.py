@@ -4,9 +4,7 @@ import json
 import os
 from typing import Dict, Any, Optional
 from dataclasses import dataclass
-from dotenv import load_dotenv
-
-load_dotenv()
+from ..utils import load_env
 
 @dataclass
 class AgentConfig:
@@ -18,6 +16,7 @@ class AgentConfig:
     
     def __post_init__(self):
         """Initialize configuration with environment variables if not provided."""
+        load_env()
         if not self.openai_api_key:
             self.openai_api_key = os.getenv("OPENAI_API_KEY")
         
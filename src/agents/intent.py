@@ -0,0 +1,238 @@
+"""Tiered intent resolution for natural-language database requests.
+
+Requests are resolved by the cheapest tier that is confident:
+
+1. Rules: unambiguous keyword matches plus extracted SQL/connection settings.
+2. Intent cache: bounded LRU keyed by the normalized request, persisted to disk.
+3. The LLM, for everything else.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import unquote, urlparse
+
+# Bump when the rules or the intent format change, so persisted entries are discarded
+INTENT_CACHE_VERSION = 1
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "db_agent", "intent_cache.json")
+
+# Strong signals only: generic verbs (show, list, run...) match too many requests to decide alone.
+_ACTION_PATTERNS = {
+    "view_current_ontology": r"current ontology|knowledge graph|\bkg\b",
+    "get_ontology": r"\bontology\b|\brelationships?\b|\bforeign keys?\b|\bfks?\b",
+    "list_schema": r"\bschemas?\b|\btables\b|\bcolumns\b|\bdescribe\b",
+    "update_metadata": r"\bcomments?\b|\bmetadata\b|\btags?\b",
+}
+_ACTION_RE = {a: re.compile(p, re.IGNORECASE) for a, p in _ACTION_PATTERNS.items()}
+
+_DB_PATTERNS = {
+    "snowflake": r"\bsnowflake\b",
+    "postgres": r"\bpostgres(?:ql)?\b|\bpg\b",
+    "mysql": r"\bmysql\b|\bmy sql\b",
+    "databricks": r"\bdatabricks\b",
+}
+_DB_RE = {d: re.compile(p, re.IGNORECASE) for d, p in _DB_PATTERNS.items()}
+
+# list_schema is only taken from a short listing command: a list/show/describe verb right
+# before what to list ("show the tables in postgres"), not any mention of tables or columns
+_LISTING_RE = re.compile(r"^\s*(?:please\s+)?(?:list|show|describe|display)\s+(?:me\s+)?(?:all\s+)?"
+                         r"(?:of\s+)?(?:the\s+)?(?:schemas?|tables?|columns)\b", re.IGNORECASE)
+# Questions, aggregates and row reads ask for data, which only the model can turn into SQL
+_ANALYTICAL_RE = re.compile(r"\b(?:how|which|what|why|who|when|where|count|counts|number|sum|total|average|avg|"
+                            r"min|max|top|most|least|per|group|rank|null|nulls|rows?|revenue)\b|"
+                            r"\bfrom\s+(?:the\s+)?(?!(?:snowflake|postgres|postgresql|pg|mysql|databricks)\b)\w+|\?",
+                            re.IGNORECASE)
+
+# A SQL statement running to the end of the request: any case after a colon, otherwise
+# only with uppercase keywords, so English like "select the columns from..." is not taken for SQL
+_SQL_AFTER_COLON_RE = re.compile(r":\s*`?((?:select|with)\b[\s\S]+)$", re.IGNORECASE)
+_SQL_UPPER_RE = re.compile(r"`?\b((?:SELECT|WITH\s+\w+\s+AS\s*\()[\s\S]+)$")
+_FROM_RE = re.compile(r"\bfrom\b", re.IGNORECASE)
+
+_CONN_KEYS = ("account", "user", "password", "warehouse", "database", "schema", "role",
+              "host", "port", "dbname", "sslmode")
+_CONN_RE = re.compile(r"\b(%s)\s*[=:]\s*(\"[^\"]*\"|'[^']*'|[^\s,;]+)" % "|".join(_CONN_KEYS), re.IGNORECASE)
+_URL_RE = re.compile(r"\b(postgres(?:ql)?|mysql)://\S+", re.IGNORECASE)
+
+_SECRET_RE = re.compile(r"password|token|secret|://[^/\s]*:[^@\s]*@", re.IGNORECASE)
+
+_QUOTED_RE = re.compile(r"('[^']*'|\"[^\"]*\")")
+
+def normalize_request(request: str) -> str:
+    """Cache key for a request: case and whitespace folded, quoted literals kept verbatim."""
+    parts = _QUOTED_RE.split(request.strip())
+    out = [p if i % 2 else " ".join(p.casefold().split()) for i, p in enumerate(parts)]
+    return "".join(out).rstrip(" .!?")
+
+def has_secrets(request: str) -> bool:
+    """Whether a request carries credentials (such intents are never written to disk)."""
+    return bool(_SECRET_RE.search(request))
+
+def _find_sql(request: str):
+    """(start offset, statement) of the SQL in a request, or None."""
+    for rx in (_SQL_AFTER_COLON_RE, _SQL_UPPER_RE):
+        m = rx.search(request)
+        if m and _FROM_RE.search(m.group(1)):
+            return m.start(1), m.group(1).strip().rstrip("`;").strip()
+    return None
+
+def _connection_params(request: str) -> Optional[Dict[str, Any]]:
+    """``key=value`` / ``key: value`` settings and connection URLs found in the request."""
+    params: Dict[str, Any] = {}
+    for m in _URL_RE.finditer(request):
+        url = urlparse(m.group(0))
+        params.update({k: v for k, v in {
+            "host": url.hostname, "port": url.port,
+            "user": unquote(url.username) if url.username else None,
+            "password": unquote(url.password) if url.password else None,
+            "dbname": url.path.lstrip("/") or None,
+        }.items() if v is not None})
+    for key, value in _CONN_RE.findall(request):
+        value = value.strip("\"'")
+        key = key.lower()
+        if key == "port":
+            if not value.isdigit():
+                return None
+            value = int(value)
+        params[key] = value
+    return params
+
+class RuleResolver:
+    """Resolves requests whose action and database type are unambiguous; None otherwise."""
+
+    def resolve(self, request: str) -> Optional[Dict[str, Any]]:
+        """Structured intent for a request, or None when the rules are not confident."""
+        dbs = [d for d, rx in _DB_RE.items() if rx.search(request)]
+        if len(dbs) != 1:
+            return None
+        sql = _find_sql(request)
+        actions = [a for a, rx in _ACTION_RE.items() if rx.search(request)]
+        if "view_current_ontology" in actions and "get_ontology" in actions:
+            actions.remove("get_ontology")
+        if sql:
+            # Keywords inside the SQL text (e.g. "columns") do not count as a second action.
+            outside = request[:sql[0]]
+            actions = [a for a in actions if _ACTION_RE[a].search(outside)] + ["execute_query"]
+        # update_metadata needs targets and values that only the model can extract reliably
+        if len(actions) != 1 or actions[0] == "update_metadata":
+            return None
+        action = actions[0]
+        if action != "execute_query" and _ANALYTICAL_RE.search(request):
+            return None
+        if action == "list_schema" and not _LISTING_RE.search(request):
+            return None
+
+        conn = _connection_params(request[:sql[0]] if sql else request)
+        if conn is None:
+            return None
+        additional: Dict[str, Any] = {}
+        if action == "execute_query":
+            additional["sql"] = sql[1]
+        elif "schema" in conn and action in ("list_schema", "get_ontology"):
+            additional["schema"] = conn["schema"]
+        return {
+            "action": action,
+            "database_type": dbs[0],
+            "connection_params": conn,
+            "additional_params": additional or None,
+        }
+
+class IntentCache:
+    """Bounded LRU of resolved intents keyed by normalized request, optionally persisted as JSON.
+
+    Intents for requests that carry credentials stay in memory only.
+    """
+
+    def __init__(self, path: Optional[str] = None, maxsize: int = 1024):
+        self.path = path
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._volatile: set = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        if raw.get("version") != INTENT_CACHE_VERSION:
+            return
+        for key, intent in raw.get("entries", [])[-self.maxsize:]:
+            self._data[key] = intent
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        entries = [[k, v] for k, v in self._data.items() if k not in self._volatile]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": INTENT_CACHE_VERSION, "entries": entries}, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def get(self, request: str) -> Optional[Dict[str, Any]]:
+        """Cached intent for a request (or an equivalent one), if any."""
+        key = normalize_request(request)
+        with self._lock:
+            intent = self._data.get(key)
+            if intent is not None:
+                self._data.move_to_end(key)
+            return intent
+
+    def put(self, request: str, intent: Dict[str, Any]) -> None:
+        """Store an intent, evicting the least recently used beyond ``maxsize``."""
+        key = normalize_request(request)
+        with self._lock:
+            self._data[key] = intent
+            self._data.move_to_end(key)
+            if has_secrets(request):
+                self._volatile.add(key)
+            else:
+                self._volatile.discard(key)
+            while len(self._data) > self.maxsize:
+                old, _ = self._data.popitem(last=False)
+                self._volatile.discard(old)
+            self._save()
+
+    def clear(self) -> None:
+        """Drop every cached intent, including the persisted file."""
+        with self._lock:
+            self._data.clear()
+            self._volatile.clear()
+            self._save()
+
+class IntentResolver:
+    """Rules first, then the intent cache, then the model; tracks which tier answered."""
+
+    def __init__(self, llm_resolve: Callable[[str], Dict[str, Any]], cache: Optional[IntentCache] = None,
+                 rules: Optional[RuleResolver] = None):
+        self.llm_resolve = llm_resolve
+        self.cache = cache if cache is not None else IntentCache()
+        self.rules = rules if rules is not None else RuleResolver()
+        self.stats = {"rules": 0, "cache": 0, "llm": 0}
+
+    def resolve(self, request: str) -> Dict[str, Any]:
+        """Structured intent for a natural-language request."""
+        intent = self.rules.resolve(request)
+        if intent is not None:
+            self.stats["rules"] += 1
+            return intent
+        intent = self.cache.get(request)
+        if intent is not None:
+            self.stats["cache"] += 1
+            return intent
+        intent = self.llm_resolve(request)
+        self.stats["llm"] += 1
+        self.cache.put(request, intent)
+        return intent
@@ -0,0 +1,152 @@
+"""In-process caches for catalog metadata and query results."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from ..models.schemas import MetadataArgs
+from ..instrumentation import count
+from .results import ResultCache, result_cache, is_read_only, is_cacheable, normalize_sql
+
+_MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry and mark it as recently used."""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING or item[0] < time.monotonic():
+                if item is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Insert or replace an entry, evicting the least recently used ones if full."""
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry and return its value."""
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        return default if item is _MISSING else item[1]
+
+    def keys(self) -> list:
+        """Snapshot of the current keys (expired entries included until touched)."""
+        with self._lock:
+            return list(self._data.keys())
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+def _same(a: Optional[str], b: Optional[str]) -> bool:
+    """Identifier match that treats None as a wildcard and ignores case."""
+    return a is None or b is None or a.lower() == b.lower()
+
+def _field(row: Dict[str, Any], *names: str) -> Optional[str]:
+    """Find a column in a catalog row regardless of the driver's key casing."""
+    for k in row:
+        if k.lower() in names:
+            return k
+    return None
+
+class SchemaCache:
+    """Catalog metadata cache keyed by (kind, connection fingerprint, database, schema, table).
+
+    ``kind`` separates the different catalog reads (``list_schema``, ``ontology``,
+    ...). Metadata writes go through :meth:`apply_metadata`, which patches cached
+    column comments in place and invalidates anything it cannot patch.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    def get(self, kind: str, fingerprint: str, database=None, schema=None, table=None) -> Any:
+        """Return the cached value for a catalog read, or None."""
+        value = self._cache.get((kind, fingerprint, database, schema, table))
+        count("cache.miss" if value is None else "cache.hit", kind=kind)
+        return value
+
+    def put(self, kind: str, fingerprint: str, value: Any, database=None, schema=None, table=None) -> None:
+        """Store the result of a catalog read."""
+        self._cache.set((kind, fingerprint, database, schema, table), value)
+
+    def _covering(self, fingerprint: str, database=None, schema=None, table=None, kinds=None):
+        """Keys whose scope includes the given table."""
+        for key in self._cache.keys():
+            kind, fp, db, sch, tbl = key
+            if fp != fingerprint or (kinds is not None and kind not in kinds):
+                continue
+            if _same(db, database) and _same(sch, schema) and _same(tbl, table):
+                yield key
+
+    def invalidate(self, fingerprint: str, database=None, schema=None, table=None, kinds=None) -> int:
+        """Drop every entry that covers the given scope; returns how many were dropped."""
+        keys = list(self._covering(fingerprint, database, schema, table, kinds))
+        for key in keys:
+            self._cache.pop(key)
+        return len(keys)
+
+    def apply_metadata(self, fingerprint: str, args: MetadataArgs) -> None:
+        """Reflect a successful update_metadata call in the cached catalog reads."""
+        if args.level != "column" or args.comment is None or not args.column:
+            # Table comments and tags are in no cached read (list_schema rows are columns,
+            # and table listings are not cached), so there is nothing to patch or drop.
+            return
+        for key in list(self._covering(fingerprint, args.database, args.schema_name, args.table,
+                                       kinds={"list_schema"})):
+            rows = self._cache.get(key)
+            if rows is None or not self._patch_column_comment(rows, args):
+                self._cache.pop(key)
+
+    @staticmethod
+    def _patch_column_comment(rows, args: MetadataArgs) -> bool:
+        """Set the comment on matching column rows; False if the rows have an unknown shape."""
+        if not rows:
+            return True
+        first = rows[0]
+        k_schema = _field(first, "table_schema")
+        k_table = _field(first, "table_name")
+        k_column = _field(first, "column_name")
+        k_comment = _field(first, "comment", "column_comment")
+        if not (k_schema and k_table and k_column and k_comment):
+            return False
+        for row in rows:
+            if (_same(row[k_table], args.table) and _same(row[k_schema], args.schema_name)
+                    and _same(row[k_column], args.column)):
+                row[k_comment] = args.comment
+        return True
+
+# Global schema cache instance
+schema_cache = SchemaCache()
@@ -0,0 +1,269 @@
+"""Query result cache for ``execute_query``: read-only statements only, single-flight.
+
+Entries are serialized results keyed by (connection fingerprint, normalized SQL,
+variant). Memory is bounded by bytes (LRU); entries evicted from memory, or too large
+for it, can spill to a directory on disk. Concurrent requests for the same key share
+one execution.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+from ..instrumentation import count
+
+# Literals, quoted identifiers, and runs of comments and whitespace, matched as whole tokens
+_SQL_TOKEN = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|(?:--[^\n]*|/\*.*?\*/|\s+)+""", re.S)
+
+_READ_ONLY_START = {"SELECT", "WITH", "SHOW", "DESCRIBE", "DESC", "EXPLAIN", "VALUES", "TABLE"}
+# Statements (or clauses) that write, lock or advance sequences, even inside a SELECT/WITH
+_WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|UPSERT|INTO|CREATE|DROP|ALTER|TRUNCATE|GRANT|REVOKE|"
+                     r"COPY|CALL|LOCK|SHARE|NEXTVAL|SETVAL)\b", re.I)
+# Functions whose result changes between executions, so caching would change the answer.
+# UUID only counts as a call, since it is also a common column name.
+_VOLATILE = re.compile(r"\b(?:(?:RANDOM|RAND|UUID_STRING|GEN_RANDOM_UUID|NEWID|SEQ[1248]|NOW|SYSDATE|GETDATE|"
+                       r"CURRENT_TIMESTAMP|LOCALTIMESTAMP|CLOCK_TIMESTAMP|SYSTIMESTAMP|CURRENT_TIME|"
+                       r"CURRENT_DATE|LOCALTIME|UNIX_TIMESTAMP)\b|UUID\s*\()", re.I)
+
+def normalize_sql(sql: str) -> str:
+    """Drop comments, collapse whitespace and trailing semicolons; literals are kept verbatim."""
+    def sub(m):
+        token = m.group(0)
+        return token if token[0] in "'\"" else " "
+    return _SQL_TOKEN.sub(sub, sql).strip().rstrip(";").strip()
+
+def _code(sql: str) -> str:
+    """Normalized SQL with literals and quoted identifiers blanked, for keyword checks."""
+    return _SQL_TOKEN.sub(lambda m: "''" if m.group(0)[0] in "'\"" else " ", sql).strip().rstrip(";").strip()
+
+def is_read_only(sql: str) -> bool:
+    """Whether ``sql`` is a single statement that only reads."""
+    code = _code(sql)
+    first = code.split(None, 1)[0].upper() if code else ""
+    return first in _READ_ONLY_START and ";" not in code and not _WRITES.search(code)
+
+def _nbytes(value: str) -> int:
+    """UTF-8 size of ``value`` (its length when it is ASCII, which needs no encoding)."""
+    return len(value) if value.isascii() else len(value.encode("utf-8"))
+
+def is_cacheable(sql: str) -> bool:
+    """Read-only and free of volatile functions (random values, the current time...)."""
+    return is_read_only(sql) and not _VOLATILE.search(_code(sql))
+
+class ResultCache:
+    """Byte-bounded LRU of serialized query results with TTL, optional disk spill and single-flight.
+
+    ``max_bytes`` bounds the in-memory entries (by UTF-8 size). Entries larger than ``max_entry_bytes``
+    skip memory. With ``spill_dir``, entries evicted from memory (and oversized ones)
+    are written there, bounded by ``spill_max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2**20, ttl: float = 60.0, max_entry_bytes: Optional[int] = None,
+                 spill_dir: Optional[str] = None, spill_max_bytes: int = 2**30):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 4
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        self._mem: "OrderedDict[Hashable, Tuple[float, str, int]]" = OrderedDict()
+        self._disk: "OrderedDict[Hashable, Tuple[float, str, int]]" = OrderedDict()
+        self._mem_bytes = 0
+        self._disk_bytes = 0
+        self._inflight: Dict[Hashable, Future] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "shared": 0, "evictions": 0, "spills": 0}
+
+    def __len__(self) -> int:
+        return len(self._mem) + len(self._disk)
+
+    def info(self) -> Dict[str, int]:
+        """Counters plus current entry counts and sizes."""
+        with self._lock:
+            return {**self.stats, "entries": len(self._mem), "bytes": self._mem_bytes,
+                    "disk_entries": len(self._disk), "disk_bytes": self._disk_bytes}
+
+    # ----- lookup -----
+
+    def _mem_get(self, key: Hashable, now: float) -> Optional[str]:
+        item = self._mem.get(key)
+        if item is None:
+            return None
+        if item[0] < now:
+            self._mem_bytes -= self._mem.pop(key)[2]
+            return None
+        self._mem.move_to_end(key)
+        return item[1]
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Return a live cached result, promoting spilled entries back to memory."""
+        now = time.monotonic()
+        with self._lock:
+            value = self._mem_get(key, now)
+            if value is not None:
+                self.stats["hits"] += 1
+                count("cache.hit", kind="result")
+                return value
+            spilled = self._disk.pop(key, None)
+            if spilled is not None:
+                self._disk_bytes -= spilled[2]
+            generation = self._generation
+        if spilled is not None and spilled[0] >= now:
+            try:
+                with open(spilled[1], encoding="utf-8") as f:
+                    value = f.read()
+            except OSError:
+                value = None
+            self._unlink(spilled[1])
+            if value is not None:
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                count("cache.hit", kind="result_disk")
+                self._store(key, value, spilled[0], generation)
+                return value
+        elif spilled is not None:
+            self._unlink(spilled[1])
+        with self._lock:
+            self.stats["misses"] += 1
+        count("cache.miss", kind="result")
+        return None
+
+    # ----- storage -----
+
+    def put(self, key: Hashable, value: str, ttl: Optional[float] = None) -> None:
+        """Store a result for ``ttl`` seconds (the cache default when None)."""
+        self._store(key, value, time.monotonic() + (self.ttl if ttl is None else ttl))
+
+    def _store(self, key: Hashable, value: str, expires: float, generation: Optional[int] = None) -> None:
+        size = _nbytes(value)
+        victims: List[Tuple[Hashable, Tuple[float, str, int]]] = []
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return  # invalidated while the result was being computed
+            generation = self._generation
+            if size > self.max_entry_bytes:
+                victims.append((key, (expires, value, size)))  # too large for memory: spill only
+            else:
+                old = self._mem.pop(key, None)
+                if old is not None:
+                    self._mem_bytes -= old[2]
+                self._mem[key] = (expires, value, size)
+                self._mem_bytes += size
+                while self._mem_bytes > self.max_bytes:
+                    victim = self._mem.popitem(last=False)
+                    self._mem_bytes -= victim[1][2]
+                    self.stats["evictions"] += 1
+                    victims.append(victim)
+        now = time.monotonic()
+        for vkey, (vexpires, vvalue, vsize) in victims:
+            if vexpires >= now:
+                self._spill(vkey, vvalue, vexpires, vsize, generation)
+
+    def _spill(self, key: Hashable, value: str, expires: float, size: int, generation: int) -> None:
+        """Write an entry to ``spill_dir``, unless the cache is invalidated meanwhile."""
+        if not self.spill_dir or size > self.spill_max_bytes:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, hashlib.sha256(repr(key).encode("utf-8")).hexdigest() + ".json")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(value)
+            os.replace(tmp, path)
+        except OSError:
+            self._unlink(tmp)
+            return
+        dropped = []
+        with self._lock:
+            if generation != self._generation:
+                # Invalidated while it was being written; keep the file if a newer spill owns it
+                if key not in self._disk:
+                    dropped.append(path)
+            else:
+                old = self._disk.pop(key, None)
+                if old is not None:
+                    self._disk_bytes -= old[2]
+                self._disk[key] = (expires, path, size)
+                self._disk_bytes += size
+                self.stats["spills"] += 1
+            while self._disk_bytes > self.spill_max_bytes:
+                _, (_, vpath, vsize) = self._disk.popitem(last=False)
+                self._disk_bytes -= vsize
+                dropped.append(vpath)
+        for vpath in dropped:
+            self._unlink(vpath)
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # ----- single-flight -----
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], str], ttl: Optional[float] = None) -> str:
+        """Return the cached result, or compute it once for all concurrent callers of ``key``.
+
+        Callers that arrive while the result is being computed wait for it (and share
+        its exception, which is not cached).
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            value = self._mem_get(key, time.monotonic())
+            if value is not None:
+                return value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = Future()
+                generation = self._generation
+            else:
+                self.stats["shared"] += 1
+        if not leader:
+            count("cache.shared", kind="result")
+            return flight.result()
+        try:
+            value = compute()
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            self._store(key, value, time.monotonic() + (self.ttl if ttl is None else ttl), generation)
+            flight.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    # ----- invalidation -----
+
+    def invalidate(self, fingerprint: Optional[str] = None) -> int:
+        """Drop the entries read over one connection fingerprint (all when None)."""
+        with self._lock:
+            self._generation += 1
+            mem = [k for k in self._mem if fingerprint is None or k[0] == fingerprint]
+            disk = [k for k in self._disk if fingerprint is None or k[0] == fingerprint]
+            for k in mem:
+                self._mem_bytes -= self._mem.pop(k)[2]
+            paths = []
+            for k in disk:
+                _, path, size = self._disk.pop(k)
+                self._disk_bytes -= size
+                paths.append(path)
+        for path in paths:
+            self._unlink(path)
+        return len(mem) + len(disk)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self.invalidate()
+
+# Global result cache instance; DB_AGENT_RESULT_SPILL_DIR enables spilling to disk
+result_cache = ResultCache(spill_dir=os.getenv("DB_AGENT_RESULT_SPILL_DIR") or None)
@@ -0,0 +1,283 @@
+"""Hook-based instrumentation: timing spans and counters exported to pluggable sinks.
+
+Code under measurement calls :func:`span` (a context manager timing one phase) and
+:func:`count` (rows, bytes, cache hits...). With no sink registered both return
+immediately (``span`` hands back a shared no-op object), so instrumentation costs a
+function call and a truthiness check per phase.
+
+Span names used by the package:
+
+* ``action`` — one ``run_deterministic``/``arun_deterministic`` call (``action``, ``bytes``)
+* ``pool.acquire`` — waiting for a pooled connection (``db``, ``reused``)
+* ``db.connect`` / ``db.execute`` / ``db.fetch`` — driver phases (``db``, ``rows``)
+* ``query.render`` — ``QueryManager`` template rendering (``db``, ``query``)
+* ``serialize`` / ``serialize.encode`` — JSON encoding of results (``rows``, ``bytes``)
+
+Counters: ``db.rows``, ``serialize.bytes``, ``cache.hit``, ``cache.miss``, ``query.compile``.
+"""
+
+import contextvars
+import itertools
+import json
+import math
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, TextIO
+
+_sinks: tuple = ()
+_sinks_lock = threading.Lock()
+_current: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("db_agent_span", default=None)
+_ids = itertools.count(1)
+
+class Sink:
+    """Receives finished spans and counter increments; override what you need."""
+
+    def on_start(self, span: "Span") -> None:
+        pass
+
+    def on_end(self, span: "Span") -> None:
+        pass
+
+    def on_count(self, name: str, value: float, attrs: Dict[str, Any]) -> None:
+        pass
+
+class Span:
+    """One timed phase. ``attrs`` holds labels (strings) and measurements (numbers)."""
+
+    __slots__ = ("name", "attrs", "span_id", "parent", "start", "duration", "_token")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+        self.span_id = next(_ids)
+        self.parent: Optional[Span] = None
+        self.start = 0.0
+        self.duration = 0.0
+
+    def set(self, key: str, value: Any) -> None:
+        """Set an attribute while the span is open."""
+        self.attrs[key] = value
+
+    def __enter__(self) -> "Span":
+        self.parent = _current.get()
+        self._token = _current.set(self)
+        self.start = time.perf_counter()
+        _emit("on_start", self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration = time.perf_counter() - self.start
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        _emit("on_end", self)
+        return False
+
+class _NoopSpan:
+    """Shared stand-in returned by :func:`span` when instrumentation is disabled."""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+_NOOP = _NoopSpan()
+
+def _emit(hook: str, *args) -> None:
+    for sink in _sinks:
+        try:
+            getattr(sink, hook)(*args)
+        except Exception:  # a failing sink must never break the instrumented call
+            pass
+
+def enabled() -> bool:
+    """Whether any sink is registered."""
+    return bool(_sinks)
+
+def span(name: str, **attrs):
+    """Context manager timing one phase (a no-op while no sink is registered)."""
+    if not _sinks:
+        return _NOOP
+    return Span(name, attrs)
+
+def count(name: str, value: float = 1, **attrs) -> None:
+    """Add ``value`` to a counter (ignored while no sink is registered)."""
+    if _sinks:
+        _emit("on_count", name, value, attrs)
+
+def current_span():
+    """The innermost open span of this thread/task, or the no-op span."""
+    return (_current.get() if _sinks else None) or _NOOP
+
+def add_sink(sink: Sink) -> Sink:
+    """Register a sink; instrumentation is enabled while at least one is registered."""
+    global _sinks
+    with _sinks_lock:
+        _sinks = _sinks + (sink,)
+    return sink
+
+def remove_sink(sink: Sink) -> None:
+    """Unregister a sink."""
+    global _sinks
+    with _sinks_lock:
+        _sinks = tuple(s for s in _sinks if s is not sink)
+
+def clear_sinks() -> None:
+    """Unregister every sink (disables instrumentation)."""
+    global _sinks
+    with _sinks_lock:
+        _sinks = ()
+
+# ---------- Sinks ----------
+
+def _key(name: str, attrs: Dict[str, Any]) -> str:
+    """Aggregation key: the name plus its string labels, e.g. ``db.execute{db=postgres}``."""
+    labels = ",".join(f"{k}={v}" for k, v in sorted(attrs.items()) if isinstance(v, str))
+    return f"{name}{{{labels}}}" if labels else name
+
+# Log-scale latency buckets: 8 per power of two (~9% resolution) starting at 1 microsecond
+_BUCKETS_PER_OCTAVE = 8
+
+class _Histogram:
+    __slots__ = ("count", "total", "min", "max", "buckets", "sums")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.buckets: Dict[int, int] = {}
+        self.sums: Dict[str, float] = {}
+
+    def add(self, seconds: float, attrs: Dict[str, Any]) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        b = max(0, int(math.log2(max(seconds * 1e6, 1.0)) * _BUCKETS_PER_OCTAVE))
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+        for k, v in attrs.items():
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                self.sums[k] = self.sums.get(k, 0) + v
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile, in seconds (capped at max)."""
+        rank = math.ceil(q / 100 * self.count)
+        seen = 0
+        for b in sorted(self.buckets):
+            seen += self.buckets[b]
+            if seen >= rank:
+                return min(2 ** ((b + 1) / _BUCKETS_PER_OCTAVE) / 1e6, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        out = {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000,
+            "min_ms": self.min * 1000,
+            "p50_ms": self.percentile(50) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+        out.update(self.sums)
+        return out
+
+class HistogramSink(Sink):
+    """In-memory latency histograms per span name/labels, plus counter totals."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans: Dict[str, _Histogram] = {}
+        self._counters: Dict[str, float] = {}
+
+    def on_end(self, span: Span) -> None:
+        key = _key(span.name, span.attrs)
+        with self._lock:
+            h = self._spans.get(key)
+            if h is None:
+                h = self._spans[key] = _Histogram()
+            h.add(span.duration, span.attrs)
+
+    def on_count(self, name: str, value: float, attrs: Dict[str, Any]) -> None:
+        key = _key(name, attrs)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """``{"spans": {key: latency summary and summed measurements}, "counters": {key: total}}``."""
+        with self._lock:
+            return {"spans": {k: h.summary() for k, h in sorted(self._spans.items())},
+                    "counters": dict(sorted(self._counters.items()))}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+    def format(self) -> str:
+        """Human-readable table of the snapshot."""
+        snap = self.snapshot()
+        lines = [f"{'span':<48} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'total ms':>10}"]
+        for key, s in snap["spans"].items():
+            lines.append(f"{key:<48} {s['count']:>7} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} "
+                         f"{s['p99_ms']:>9.2f} {s['total_ms']:>10.1f}")
+        for key, total in snap["counters"].items():
+            lines.append(f"{key:<48} {total:>7,.0f}")
+        return "\n".join(lines)
+
+class JSONLogSink(Sink):
+    """Writes one JSON line per finished span (and per counter increment with ``counters``)."""
+
+    def __init__(self, stream: Optional[TextIO] = None, counters: bool = False):
+        self.stream = stream
+        self.counters = counters
+        self._lock = threading.Lock()
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, default=str)
+        with self._lock:
+            out = self.stream or sys.stderr
+            out.write(line + "\n")
+            out.flush()
+
+    def on_end(self, span: Span) -> None:
+        self._write({"span": span.name, "id": span.span_id,
+                     "parent": span.parent.span_id if span.parent else None,
+                     "ms": round(span.duration * 1000, 3), **span.attrs})
+
+    def on_count(self, name: str, value: float, attrs: Dict[str, Any]) -> None:
+        if self.counters:
+            self._write({"counter": name, "value": value, **attrs})
+
+class OTelSink(Sink):
+    """Mirrors spans into OpenTelemetry (requires ``opentelemetry-api``; configure the SDK separately)."""
+
+    def __init__(self, tracer=None):
+        from opentelemetry import trace
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("db_agent")
+        self._live: Dict[int, Any] = {}
+
+    def on_start(self, span: Span) -> None:
+        parent = self._live.get(span.parent.span_id) if span.parent else None
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        self._live[span.span_id] = self.tracer.start_span(span.name, context=context)
+
+    def on_end(self, span: Span) -> None:
+        otel = self._live.pop(span.span_id, None)
+        if otel is None:
+            return
+        otel.set_attributes({k: v for k, v in span.attrs.items() if isinstance(v, (str, bool, int, float))})
+        otel.end()
+
+__all__ = ["Sink", "Span", "span", "count", "current_span", "enabled", "add_sink", "remove_sink",
+           "clear_sinks", "HistogramSink", "JSONLogSink", "OTelSink"]
@@ -1,12 +1,20 @@
 """Pydantic models for the database agent system."""
 
-from .schemas import Conn, SchemaArgs, MetadataArgs, QueryArgs, OntologyArgs, DBType
+from .schemas import Conn, SchemaArgs, CrawlArgs, MetadataArgs, MetadataChange, BulkMetadataArgs, QueryArgs, SubmitQueryArgs, QueryHandleArgs, ExportArgs, OntologyArgs, SaveOntologyArgs, OntologyQueryArgs, DBType
 
 __all__ = [
     "Conn",
     "SchemaArgs", 
+    "CrawlArgs",
     "MetadataArgs",
+    "MetadataChange",
+    "BulkMetadataArgs",
     "QueryArgs",
+    "SubmitQueryArgs",
+    "QueryHandleArgs",
+    "ExportArgs",
     "OntologyArgs",
+    "SaveOntologyArgs",
+    "OntologyQueryArgs",
     "DBType"
 ]
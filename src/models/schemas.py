@@ -1,11 +1,11 @@
 """Pydantic schemas for the database agent system."""
 
 from __future__ import annotations
-from typing import Optional, Literal, Dict, Any
+from typing import Optional, Literal, Dict, Any, List
 from pydantic import BaseModel, Field, ConfigDict
 
 # ---------- Common Types ----------
-DBType = Literal["snowflake", "postgres", "mysql", "databricks"]
+DBType = Literal["snowflake", "postgres", "mysql", "databricks", "sqlite"]
 
 class Conn(BaseModel):
     """Database connection model."""
@@ -22,7 +22,7 @@ class Conn(BaseModel):
     role: Optional[str] = None
     # Postgres
     host: Optional[str] = None
-    port: Optional[int] = 5432
+    port: Optional[int] = None  # dialect default when unset (5432 Postgres, 3306 MySQL)
     dbname: Optional[str] = None
     sslmode: Optional[str] = "prefer"
     # MySQL
@@ -30,6 +30,8 @@ class Conn(BaseModel):
     databricks_server_hostname: Optional[str] = None
     databricks_http_path: Optional[str] = None
     databricks_token: Optional[str] = None
+    # SQLite
+    path: Optional[str] = None  # database file
 
 class SchemaArgs(BaseModel):
     """Arguments for schema operations."""
@@ -39,12 +41,31 @@ class SchemaArgs(BaseModel):
     database: Optional[str] = None
     schema_name: Optional[str] = Field(None, alias='schema')
     table: Optional[str] = None
+    refresh: bool = False  # bypass the schema cache and re-read the catalog
+    incremental: bool = False  # get_ontology: re-derive edges only for tables changed since the last snapshot
+    # list_schema pagination: pages of `page_size` rows continued with the returned `next_cursor`
+    mode: Literal["columns", "tables"] = "columns"  # "tables": one row per table, without columns
+    page_size: Optional[int] = Field(None, gt=0, le=100000)
+    cursor: Optional[str] = None
 
-class MetadataArgs(BaseModel):
-    """Arguments for metadata operations."""
+class CrawlArgs(BaseModel):
+    """Arguments for reading the catalog of many databases/schemas concurrently."""
     model_config = ConfigDict(extra='forbid', json_schema_extra={'additionalProperties': False})
     
     conn: Conn
+    databases: Optional[List[str]] = None  # names or globs ("SALES_*"); default: the connection's database
+    schemas: Optional[List[str]] = None  # names or globs; default: every schema
+    include: List[Literal["list_schema", "ontology"]] = ["list_schema"]
+    concurrency: int = Field(4, ge=1)  # concurrent catalog reads per connection
+    refresh: bool = False  # bypass the schema cache
+    # Streaming mode: one NDJSON record per scope is written to `output` (stdout when omitted or "-") as it finishes
+    stream: bool = False
+    output: Optional[str] = None
+
+class MetadataChange(BaseModel):
+    """A single table or column metadata change."""
+    model_config = ConfigDict(extra='forbid', json_schema_extra={'additionalProperties': False})
+    
     level: Literal["table", "column"]
     database: Optional[str] = None
     schema_name: str = Field(alias='schema')
@@ -53,12 +74,68 @@ class MetadataArgs(BaseModel):
     comment: Optional[str] = None
     tags: Optional[Dict[str, str]] = None  # Snowflake
 
+class MetadataArgs(MetadataChange):
+    """Arguments for metadata operations."""
+    
+    conn: Conn
+
+class BulkMetadataArgs(BaseModel):
+    """Arguments for applying many metadata changes in one session."""
+    model_config = ConfigDict(extra='forbid', json_schema_extra={'additionalProperties': False})
+    
+    conn: Conn
+    changes: List[MetadataChange]
+    atomic: bool = False  # roll back every change if any fails (where the dialect is transactional)
+
 class QueryArgs(BaseModel):
     """Arguments for SQL query execution."""
     model_config = ConfigDict(extra='forbid', json_schema_extra={'additionalProperties': False})
     
     conn: Conn
     sql: str
+    # Streaming mode: rows are written in batches to `output` (file path, or stdout when omitted or "-")
+    stream: bool = False
+    batch_size: int = Field(10000, gt=0)
+    output: Optional[str] = None
+    # "arrow" writes an Arrow IPC stream file (requires `output`)
+    output_format: Literal["ndjson", "json", "arrow"] = "ndjson"
+    # Columnar mode: results are fetched as Arrow batches and returned column-oriented
+    columnar: bool = False
+    # Result cache: reuse the result of an identical read-only query run less than `cache_ttl` seconds ago
+    cache: bool = False
+    cache_ttl: Optional[float] = Field(None, gt=0)
+    # Statement timeout in seconds, enforced by the server (Snowflake, PostgreSQL)
+    timeout: Optional[float] = Field(None, gt=0)
+
+class SubmitQueryArgs(BaseModel):
+    """Arguments for submitting a query without waiting for its result."""
+    model_config = ConfigDict(extra='forbid', json_schema_extra={'additionalProperties': False})
+    
+    conn: Conn
+    sql: str
+    timeout: Optional[float] = Field(None, gt=0)  # statement timeout in seconds (Snowflake, PostgreSQL)
+    batch_size: int = Field(10000, gt=0)
+
+class QueryHandleArgs(BaseModel):
+    """Arguments for polling, cancelling or fetching a submitted query."""
+    model_config = ConfigDict(extra='forbid', json_schema_extra={'additionalProperties': False})
+    
+    conn: Conn
+    handle: str  # returned by submit_query: Snowflake query ID, or "<backend PID>-<token>"
+    wait: float = Field(0, ge=0, le=3600)  # query_status/fetch_query: seconds to wait for the query to finish
+    batch_size: int = Field(10000, gt=0)
+
+class ExportArgs(BaseModel):
+    """Arguments for bulk-exporting a query result to files."""
+    model_config = ConfigDict(extra='forbid', json_schema_extra={'additionalProperties': False})
+    
+    conn: Conn
+    sql: str
+    output: str  # file path; with rows_per_file it is the base name of the numbered chunks
+    format: Literal["parquet", "csv"] = "parquet"
+    compression: Optional[str] = None  # parquet codec (default snappy) or CSV stream codec (gzip, zstd, ...)
+    rows_per_file: Optional[int] = Field(None, gt=0)
+    batch_size: int = Field(10000, gt=0)
 
 class OntologyArgs(BaseModel):
     """Arguments for ontology operations."""
@@ -66,3 +143,33 @@ class OntologyArgs(BaseModel):
     
     conn: Conn
     schema: Optional[str] = None
+    path: Optional[str] = None  # dotted path into the knowledge graph ("tables.ORDERS"); whole document when omitted
+    refresh: bool = False  # refetch the document even if its version is cached
+    version: Optional[str] = None  # read a save_ontology version (an id, or "latest") instead of JSON_STORAGE
+
+class SaveOntologyArgs(BaseModel):
+    """Arguments for storing a knowledge graph version as compressed chunks."""
+    model_config = ConfigDict(extra='forbid', json_schema_extra={'additionalProperties': False})
+    
+    conn: Conn
+    graph: Optional[Any] = None  # JSON document (or its text); the FK ontology of database/schema when omitted
+    database: Optional[str] = None
+    schema_name: Optional[str] = Field(None, alias='schema')
+    delta: bool = True  # store only the sections that changed since the latest version
+    snapshot_every: int = Field(10, ge=1)  # a full snapshot at least every N versions
+    chunk_size: int = Field(2**20, ge=4096, le=4 * 2**20)  # upper bound of a chunk's uncompressed size
+
+class OntologyQueryArgs(BaseModel):
+    """Arguments for graph queries over the foreign key ontology."""
+    model_config = ConfigDict(extra='forbid', json_schema_extra={'additionalProperties': False})
+    
+    conn: Conn
+    database: Optional[str] = None
+    schema_name: Optional[str] = Field(None, alias='schema')
+    refresh: bool = False
+    incremental: bool = False
+    op: Literal["neighbors", "reachable", "join_path", "components"]
+    table: Optional[str] = None  # "schema.table"
+    target: Optional[str] = None  # "schema.table", for join_path
+    hops: int = Field(1, ge=1)
+    direction: Literal["in", "out", "both"] = "both"
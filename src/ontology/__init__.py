@@ -0,0 +1,10 @@
+"""Ontology (foreign key graph) indexing."""
+
+from .graph import OntologyGraph
+from .incremental import OntologySnapshot, OntologySnapshotStore, ontology_snapshots
+from .knowledge_graph import KnowledgeGraphCache, KnowledgeGraphDocument, knowledge_graphs
+from .store import KnowledgeGraphStore, knowledge_graph_store
+
+__all__ = ["OntologyGraph", "OntologySnapshot", "OntologySnapshotStore", "ontology_snapshots",
+           "KnowledgeGraphCache", "KnowledgeGraphDocument", "knowledge_graphs",
+           "KnowledgeGraphStore", "knowledge_graph_store"]
@@ -0,0 +1,228 @@
+"""Compact in-memory index over foreign key relationships."""
+
+from array import array
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+def _split(ref: str) -> Tuple[str, str]:
+    """Split ``schema.table.column`` into (``schema.table``, ``column``)."""
+    table, _, column = ref.rpartition(".")
+    return table, column
+
+class OntologyGraph:
+    """Table-level FK graph with interned integer node IDs and CSR adjacency.
+
+    Nodes are ``schema.table`` names. Each edge points from the referencing table
+    to the referenced one and keeps both column names, so the original
+    ``{"from": "s.t.c", "to": "s.t.c"}`` edge list can be reproduced exactly.
+    The graph is immutable once built.
+    """
+
+    def __init__(self, edges: Iterable[Tuple[str, str, str, str]] = ()):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._column_ids: Dict[str, int] = {}
+        self._columns: List[str] = []
+        self.src = array("i")
+        self.dst = array("i")
+        self.src_col = array("i")
+        self.dst_col = array("i")
+        for s_table, s_col, d_table, d_col in edges:
+            self.src.append(self._intern_table(s_table))
+            self.dst.append(self._intern_table(d_table))
+            self.src_col.append(self._intern_column(s_col))
+            self.dst_col.append(self._intern_column(d_col))
+        self._out_off, self._out = self._csr(self.src)
+        self._in_off, self._in = self._csr(self.dst)
+        self._comp: Optional[Tuple[array, List[List[str]]]] = None
+
+    # ---------- Construction ----------
+
+    @classmethod
+    def from_edges(cls, edges) -> "OntologyGraph":
+        """Build from the ``{"edges": [...]}`` output of ``ontology()`` (or the bare list)."""
+        if isinstance(edges, dict):
+            edges = edges.get("edges", [])
+
+        def parse():
+            for e in edges:
+                s_table, s_col = _split(e["from"])
+                d_table, d_col = _split(e["to"])
+                yield s_table, s_col, d_table, d_col
+        return cls(parse())
+
+    @classmethod
+    def from_fk_rows(cls, rows: Iterable[Sequence[Any]]) -> "OntologyGraph":
+        """Build straight from ``get_foreign_keys`` rows, without formatting strings first."""
+        return cls((f"{r[0]}.{r[1]}", r[2], f"{r[3]}.{r[4]}", r[5]) for r in rows)
+
+    def _intern_table(self, name: str) -> int:
+        i = self._ids.get(name)
+        if i is None:
+            i = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return i
+
+    def _intern_column(self, name: str) -> int:
+        i = self._column_ids.get(name)
+        if i is None:
+            i = self._column_ids[name] = len(self._columns)
+            self._columns.append(name)
+        return i
+
+    def _csr(self, keys: array) -> Tuple[array, array]:
+        """Offsets and edge indexes grouped by ``keys`` (compressed sparse rows)."""
+        n = len(self._names)
+        offsets = array("i", bytes(4 * (n + 1)))
+        for k in keys:
+            offsets[k + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        fill = array("i", offsets[:n])
+        out = array("i", bytes(4 * len(keys)))
+        for e, k in enumerate(keys):
+            out[fill[k]] = e
+            fill[k] += 1
+        return offsets, out
+
+    # ---------- Introspection ----------
+
+    @property
+    def tables(self) -> List[str]:
+        """All table names, in node ID order."""
+        return list(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, table: str) -> bool:
+        return table in self._ids
+
+    def node_id(self, table: str) -> int:
+        """Integer ID of a table; raises KeyError for unknown tables."""
+        try:
+            return self._ids[table]
+        except KeyError:
+            raise KeyError(f"Table not in ontology: {table}") from None
+
+    def edge(self, e: int) -> Dict[str, str]:
+        """Edge ``e`` in the original edge-list format."""
+        return {
+            "from": f"{self._names[self.src[e]]}.{self._columns[self.src_col[e]]}",
+            "to": f"{self._names[self.dst[e]]}.{self._columns[self.dst_col[e]]}",
+        }
+
+    def _adjacent(self, n: int, direction: str):
+        """Yield (edge index, neighbour id) pairs for node ``n``."""
+        if direction in ("out", "both"):
+            for k in range(self._out_off[n], self._out_off[n + 1]):
+                e = self._out[k]
+                yield e, self.dst[e]
+        if direction in ("in", "both"):
+            for k in range(self._in_off[n], self._in_off[n + 1]):
+                e = self._in[k]
+                yield e, self.src[e]
+
+    # ---------- Queries ----------
+
+    def neighbors(self, table: str, direction: str = "both") -> List[Dict[str, str]]:
+        """Edges touching ``table``: ``out`` (it references), ``in`` (referenced by) or ``both``."""
+        n = self.node_id(table)
+        return [self.edge(e) for e, _ in self._adjacent(n, direction)]
+
+    def reachable(self, table: str, hops: int = 1, direction: str = "both") -> Dict[str, int]:
+        """Tables reachable within ``hops`` joins, mapped to their distance."""
+        start = self.node_id(table)
+        dist = {start: 0}
+        queue = deque([start])
+        while queue:
+            n = queue.popleft()
+            d = dist[n]
+            if d == hops:
+                continue
+            for _, m in self._adjacent(n, direction):
+                if m not in dist:
+                    dist[m] = d + 1
+                    queue.append(m)
+        return {self._names[n]: d for n, d in dist.items() if n != start}
+
+    def _walk(self, prev: Dict[int, int], n: int) -> List[int]:
+        """Edge indexes from ``n`` back to the root of a BFS tree."""
+        edges = []
+        while prev[n] != -1:
+            e = prev[n]
+            edges.append(e)
+            n = self.src[e] if self.dst[e] == n else self.dst[e]
+        return edges
+
+    def _expand(self, frontier: List[int], prev: Dict[int, int], other: Dict[int, int]):
+        """Advance one BFS level; returns the new frontier and a meeting node, if any."""
+        nxt = []
+        for n in frontier:
+            for e, m in self._adjacent(n, "both"):
+                if m in prev:
+                    continue
+                prev[m] = e
+                if m in other:
+                    return nxt, m
+                nxt.append(m)
+        return nxt, None
+
+    def shortest_join_path(self, source: str, target: str) -> Optional[List[Dict[str, str]]]:
+        """Fewest-joins path between two tables as a list of FK edges, or None.
+
+        Edges may be traversed in either direction; each one is returned in its
+        original from/to orientation so it reads as a join condition. Runs a
+        bidirectional BFS, and tables in different components are rejected
+        without searching.
+        """
+        s, t = self.node_id(source), self.node_id(target)
+        if s == t:
+            return []
+        comp = self._components()[0]
+        if comp[s] != comp[t]:
+            return None
+        prev_s, prev_t = {s: -1}, {t: -1}
+        fs, ft = [s], [t]
+        while fs and ft:
+            if len(fs) <= len(ft):
+                fs, meet = self._expand(fs, prev_s, prev_t)
+            else:
+                ft, meet = self._expand(ft, prev_t, prev_s)
+            if meet is not None:
+                path = self._walk(prev_s, meet)[::-1] + self._walk(prev_t, meet)
+                return [self.edge(e) for e in path]
+        return None
+
+    def _components(self) -> Tuple[array, List[List[str]]]:
+        """Component ID per node and the grouped table names, computed once."""
+        if self._comp is None:
+            n = len(self._names)
+            parent = list(range(n))
+
+            def find(x: int) -> int:
+                while parent[x] != x:
+                    parent[x] = parent[parent[x]]
+                    x = parent[x]
+                return x
+
+            for a, b in zip(self.src, self.dst):
+                ra, rb = find(a), find(b)
+                if ra != rb:
+                    parent[ra] = rb
+            comp = array("i", (find(i) for i in range(n)))
+            groups: Dict[int, List[str]] = {}
+            for i in range(n):
+                groups.setdefault(comp[i], []).append(self._names[i])
+            self._comp = (comp, sorted(groups.values(), key=len, reverse=True))
+        return self._comp
+
+    def connected_components(self) -> List[List[str]]:
+        """Weakly connected groups of tables, largest first."""
+        return [list(g) for g in self._components()[1]]
+
+    # ---------- Serialization ----------
+
+    def to_edges(self) -> Dict[str, List[Dict[str, str]]]:
+        """Serialize back to the ``{"edges": [...]}`` format returned by ``ontology()``."""
+        return {"edges": [self.edge(e) for e in range(len(self.src))]}
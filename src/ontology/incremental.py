@@ -0,0 +1,89 @@
+"""Incremental ontology refresh driven by per-table catalog change markers."""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from ..adapters.base import DBAdapter
+
+# Max tables per get_foreign_keys_for_tables query
+_TABLES_PER_QUERY = 500
+
+@dataclass
+class OntologySnapshot:
+    """Last known FK edges grouped by referencing table, plus each table's change marker."""
+    edges_by_table: Dict[str, List[Dict[str, str]]] = field(default_factory=dict)
+    signatures: Dict[str, Any] = field(default_factory=dict)
+    refreshed_at: float = 0.0
+
+    def edges(self) -> Dict[str, List[Dict[str, str]]]:
+        """Snapshot in the ``{"edges": [...]}`` format returned by ``ontology()``."""
+        return {"edges": [e for edges in self.edges_by_table.values() for e in edges]}
+
+def _group_by_table(edges: Dict[str, Any]) -> Dict[str, List[Dict[str, str]]]:
+    """Group edges by the ``schema.table`` they start from."""
+    grouped: Dict[str, List[Dict[str, str]]] = {}
+    for e in edges.get("edges", []):
+        grouped.setdefault(e["from"].rpartition(".")[0], []).append(e)
+    return grouped
+
+class OntologySnapshotStore:
+    """Keeps one snapshot per (connection fingerprint, database, schema) and refreshes it by churn.
+
+    Each refresh asks the catalog only for the per-table change markers
+    (``table_signatures``); edges are re-derived just for tables whose marker
+    changed, and dropped tables are removed. Adapters without change markers
+    fall back to a full ``ontology()`` read.
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[Tuple[str, Optional[str], Optional[str]], OntologySnapshot] = {}
+        self._locks: Dict[Tuple[str, Optional[str], Optional[str]], threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, fingerprint: str, database=None, schema=None) -> Optional[OntologySnapshot]:
+        """Current snapshot for a scope, if one has been taken."""
+        return self._snapshots.get((fingerprint, database, schema))
+
+    def discard(self, fingerprint: str, database=None, schema=None) -> None:
+        """Forget a snapshot so the next refresh is a full one."""
+        self._snapshots.pop((fingerprint, database, schema), None)
+
+    def refresh(self, adp: DBAdapter, fingerprint: str, database=None,
+                schema=None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Bring the snapshot up to date; returns (edges, stats)."""
+        key = (fingerprint, database, schema)
+        with self._lock_for(key):
+            snap = self._snapshots.get(key)
+            try:
+                # Read markers before edges so a change racing the refresh is seen next time.
+                signatures = adp.table_signatures(database, schema)
+            except NotImplementedError:
+                edges = adp.ontology(database, schema)
+                self._snapshots.pop(key, None)
+                return edges, {"mode": "full", "changed_tables": None}
+
+            if snap is None:
+                edges = adp.ontology(database, schema)
+                snap = OntologySnapshot(_group_by_table(edges), signatures, time.time())
+                self._snapshots[key] = snap
+                return snap.edges(), {"mode": "full", "changed_tables": len(signatures)}
+
+            changed = [t for t, sig in signatures.items() if snap.signatures.get(t) != sig]
+            dropped = [t for t in snap.signatures if t not in signatures]
+            for t in changed + dropped:
+                snap.edges_by_table.pop(t, None)
+            for i in range(0, len(changed), _TABLES_PER_QUERY):
+                fresh = adp.ontology_for_tables(changed[i:i + _TABLES_PER_QUERY], database)
+                snap.edges_by_table.update(_group_by_table(fresh))
+            snap.signatures = signatures
+            snap.refreshed_at = time.time()
+            return snap.edges(), {"mode": "incremental", "changed_tables": len(changed),
+                                  "dropped_tables": len(dropped)}
+
+# Global snapshot store
+ontology_snapshots = OntologySnapshotStore()
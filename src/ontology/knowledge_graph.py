@@ -0,0 +1,191 @@
+"""Versioned local cache of the stored knowledge graph (``view_current_ontology``).
+
+The latest stored document is identified by its ``(id, created_at)`` version. A cheap
+probe reads only that pair; the document itself is fetched when the version changes.
+Documents are kept split into top-level sections (each key's value as raw JSON), in
+memory and in a file per connection, so a lookup decodes only the section it touches
+and the full text can be re-emitted without decoding anything.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Union
+from ..adapters.base import DBAdapter
+from ..instrumentation import count
+from ..utils.serialize import HAS_ORJSON, dumps
+
+if HAS_ORJSON:
+    import orjson
+    _loads = orjson.loads
+else:  # pragma: no cover - optional dependency
+    _loads = json.loads
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "db_agent", "knowledge_graph")
+
+# Section key used when the document is not a JSON object
+_WHOLE = ""
+
+def _version(vid: Any, created_at: Any) -> Tuple[str, str]:
+    """Comparable, serializable form of an ``(id, created_at)`` version."""
+    stamp = created_at.isoformat() if hasattr(created_at, "isoformat") else str(created_at)
+    return str(vid), stamp
+
+class KnowledgeGraphDocument:
+    """One stored knowledge graph version, decoded section by section on demand."""
+
+    def __init__(self, version: Tuple[str, str], sections: Dict[str, Union[bytes, memoryview]],
+                 is_object: bool = True):
+        self.version = version
+        self.is_object = is_object
+        self._sections = sections
+        self._decoded: Dict[str, Any] = {}
+
+    @property
+    def id(self) -> str:
+        return self.version[0]
+
+    @property
+    def created_at(self) -> str:
+        return self.version[1]
+
+    @classmethod
+    def from_blob(cls, version: Tuple[str, str], blob: Union[str, bytes, Dict[str, Any], List[Any]]
+                  ) -> "KnowledgeGraphDocument":
+        """Split a fetched document (JSON text or an already decoded value) into sections."""
+        value = _loads(blob) if isinstance(blob, (str, bytes, bytearray)) else blob
+        if isinstance(value, dict):
+            return cls(version, {str(k): dumps(v) for k, v in value.items()})
+        return cls(version, {_WHOLE: dumps(value)}, is_object=False)
+
+    def keys(self) -> List[str]:
+        """Top-level keys (empty when the document is not a JSON object)."""
+        return list(self._sections) if self.is_object else []
+
+    def section(self, key: str) -> Any:
+        """Decoded value of one top-level key (KeyError when missing)."""
+        value = self._decoded.get(key)
+        if value is None and key not in self._decoded:
+            raw = self._sections[key]
+            value = self._decoded[key] = _loads(raw if HAS_ORJSON else bytes(raw))
+        return value
+
+    def at(self, path: str) -> Any:
+        """Value at a dotted path (``"tables.ORDERS.columns.0"``); only the first segment's section is decoded."""
+        parts = path.split(".") if path else []
+        if self.is_object:
+            if not parts:
+                return {k: self.section(k) for k in self._sections}
+            value = self.section(parts.pop(0))
+        else:
+            value = self.section(_WHOLE)
+        for part in parts:
+            value = value[int(part)] if isinstance(value, list) else value[part]
+        return value
+
+    def text(self) -> str:
+        """The whole document as JSON text, assembled from the raw sections."""
+        if not self.is_object:
+            return str(self._sections[_WHOLE], "utf-8")
+        return "{" + ",".join(f"{json.dumps(k)}:{str(v, 'utf-8')}" for k, v in self._sections.items()) + "}"
+
+    # ----- file format: one JSON header line, then the sections back to back -----
+
+    def to_bytes(self) -> bytes:
+        offsets, pos = {}, 0
+        for k, v in self._sections.items():
+            offsets[k] = [pos, len(v)]
+            pos += len(v)
+        header = json.dumps({"version": list(self.version), "object": self.is_object, "sections": offsets})
+        return header.encode("utf-8") + b"\n" + b"".join(self._sections.values())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "KnowledgeGraphDocument":
+        end = data.index(b"\n")
+        header = json.loads(data[:end])
+        body = memoryview(data)[end + 1:]
+        # Sections stay views over the file contents until decoded
+        sections = {k: body[start:start + size] for k, (start, size) in header["sections"].items()}
+        return cls(tuple(header["version"]), sections, header["object"])
+
+class KnowledgeGraphCache:
+    """Latest knowledge graph per connection fingerprint, refreshed only when its version changes.
+
+    ``directory`` keeps the sections on disk so one-shot CLI runs also skip the
+    fetch; None keeps them in memory only.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._docs: Dict[str, KnowledgeGraphDocument] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, fingerprint: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(fingerprint, threading.Lock())
+
+    def _path(self, fingerprint: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:32] + ".kg")
+
+    def _read(self, fingerprint: str, version: Tuple[str, str]) -> Optional[KnowledgeGraphDocument]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(fingerprint), "rb") as f:
+                header = json.loads(f.readline())
+                if tuple(header["version"]) != version:
+                    return None
+                f.seek(0)
+                return KnowledgeGraphDocument.from_bytes(f.read())
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write(self, fingerprint: str, doc: KnowledgeGraphDocument) -> None:
+        if not self.directory:
+            return
+        path = self._path(fingerprint)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(doc.to_bytes())
+            os.replace(tmp, path)
+        except OSError:  # the cache is an optimisation; a read-only home must not fail the call
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def current(self, adp: DBAdapter, fingerprint: str, refresh: bool = False) -> Optional[KnowledgeGraphDocument]:
+        """The latest stored document (None when nothing is stored), fetched only if its version changed."""
+        probe = adp.ontology_version()
+        if probe is None:
+            return None
+        version = _version(*probe)
+        with self._lock_for(fingerprint):
+            doc = None if refresh else self._docs.get(fingerprint)
+            if doc is not None and doc.version == version:
+                count("cache.hit", kind="knowledge_graph")
+                return doc
+            doc = None if refresh else self._read(fingerprint, version)
+            if doc is None:
+                count("cache.miss", kind="knowledge_graph")
+                row = adp.ontology_document(probe[0])
+                if row is None:  # replaced between the probe and the fetch
+                    return None
+                doc = KnowledgeGraphDocument.from_blob(version, row["knowledge_graph"])
+                self._write(fingerprint, doc)
+            else:
+                count("cache.hit", kind="knowledge_graph_disk")
+            self._docs[fingerprint] = doc
+            return doc
+
+    def clear(self) -> None:
+        """Forget the in-memory documents (files are replaced on the next fetch)."""
+        with self._guard:
+            self._docs.clear()
+
+# Global knowledge graph cache; DB_AGENT_KG_CACHE overrides the directory, "" keeps it in memory only
+knowledge_graphs = KnowledgeGraphCache(os.getenv("DB_AGENT_KG_CACHE", DEFAULT_CACHE_DIR) or None)
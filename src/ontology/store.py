@@ -0,0 +1,359 @@
+"""Chunked, compressed knowledge graph storage (``save_ontology``).
+
+A saved version is a manifest listing, per top-level key of the document, the
+chunks its JSON is made of. Chunks are compressed and stored once by content
+digest, so a new version only writes the chunks that changed. Chunk boundaries
+are chosen from the entries' content, not their position, so inserting or
+removing entries only changes the chunks around them.
+
+Versions are full snapshots or deltas that list only the sections that differ
+from the previous version; a snapshot is written every ``snapshot_every``
+versions so rebuilding never replays a long chain. Resolved manifests and chunks
+are also kept on disk (they never change), so a version seen before is rebuilt
+without reading anything from the database.
+"""
+
+import hashlib
+import os
+import random
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from ..adapters.base import DBAdapter
+from ..instrumentation import count, span
+from ..queries import query_manager
+from ..utils import build_in_list
+from ..utils.serialize import dumps
+from .knowledge_graph import DEFAULT_CACHE_DIR, KnowledgeGraphDocument, _WHOLE, _loads, _version
+
+DEFAULT_CHUNK_SIZE = 2**20
+
+# Tables are created on the first save over each connection
+_DDL = ("create_graph_schema", "create_graph_versions_table", "create_graph_chunks_table",
+        "create_graph_versions_seq_index")
+
+# Saves that lose the race for the next sequence number are rebased and retried this many times,
+# after a short random pause that grows with each attempt
+_SAVE_ATTEMPTS = 10
+_SAVE_BACKOFF = 0.02
+
+# Digests per IN (...) list when checking or fetching chunks
+_DIGEST_BATCH = 200
+
+def _compress(raw: bytes) -> Tuple[str, bytes]:
+    """Compress with zstd when ``zstandard`` is installed, zlib otherwise."""
+    try:
+        import zstandard
+    except ImportError:
+        return "zlib", zlib.compress(raw, 6)
+    return "zstd", zstandard.ZstdCompressor(level=6).compress(raw)
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown chunk codec: {codec}")
+
+def _entries(value: Any) -> Tuple[str, List[bytes]]:
+    """A section's kind and its JSON entries (``"key":value`` pairs, array items or the value itself)."""
+    if isinstance(value, dict):
+        return "object", [dumps(str(k)) + b":" + dumps(v) for k, v in value.items()]
+    if isinstance(value, list):
+        return "array", [dumps(v) for v in value]
+    return "value", [dumps(value)]
+
+def _split(entries: List[bytes], chunk_size: int) -> List[bytes]:
+    """Group entries into chunks of roughly ``chunk_size // 2`` bytes with content-defined boundaries.
+
+    A chunk ends after an entry whose CRC matches a mask sized for the target (once
+    the chunk holds ``chunk_size // 8`` bytes), or when it reaches ``chunk_size``.
+    """
+    if len(entries) <= 1:
+        return entries
+    total = sum(len(e) for e in entries)
+    if total <= chunk_size // 2:
+        return [b",".join(entries)]
+    per_chunk = max(1, (chunk_size // 2) * len(entries) // total)
+    mask = (1 << max(0, per_chunk.bit_length() - 1)) - 1
+    low = chunk_size // 8
+    chunks, group, size = [], [], 0
+    for e in entries:
+        group.append(e)
+        size += len(e) + 1
+        if size >= chunk_size or (size >= low and zlib.crc32(e) & mask == 0):
+            chunks.append(b",".join(group))
+            group, size = [], 0
+    if group:
+        chunks.append(b",".join(group))
+    return chunks
+
+def _assemble(kind: str, parts: List[bytes]) -> bytes:
+    if kind == "object":
+        return b"{" + b",".join(parts) + b"}"
+    if kind == "array":
+        return b"[" + b",".join(parts) + b"]"
+    return b"".join(parts)
+
+def _digests(sections: Dict[str, List[Any]]) -> Set[str]:
+    return {d for _, ds in sections.values() for d in ds}
+
+class KnowledgeGraphStore:
+    """Saves knowledge graph versions as chunks and rebuilds any version from them.
+
+    ``directory`` keeps chunks and resolved manifests on disk (shared by every
+    connection, since chunks are addressed by content); None keeps only the last
+    few rebuilt documents in memory.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_documents: int = 4):
+        self.directory = directory
+        self.max_documents = max_documents
+        self._manifests: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._docs: "OrderedDict[Tuple[str, str], KnowledgeGraphDocument]" = OrderedDict()
+        self._ready: Set[str] = set()
+        self._lock = threading.Lock()
+
+    # ----- local files -----
+
+    def _chunk_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "chunks", digest[:2], digest)
+
+    def _manifest_path(self, fingerprint: str, version_id: str) -> str:
+        scope = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, "versions", scope, f"{version_id}.json")
+
+    def _write_file(self, path: str, data: bytes) -> None:
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:  # the local copy is an optimisation only
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def _read_file(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    # ----- manifests -----
+
+    def _remember(self, fingerprint: str, manifest: Dict[str, Any], persist: bool = True) -> None:
+        with self._lock:
+            self._manifests[(fingerprint, manifest["id"])] = manifest
+        if persist and self.directory:
+            self._write_file(self._manifest_path(fingerprint, manifest["id"]), dumps(manifest))
+
+    def manifest(self, adp: DBAdapter, fingerprint: str, version_id: str) -> Dict[str, Any]:
+        """Resolved (full) manifest of a version; deltas are applied on top of their snapshot."""
+        version_id = str(version_id)
+        found = self._manifests.get((fingerprint, version_id))
+        if found is not None:
+            return found
+        if self.directory:
+            data = self._read_file(self._manifest_path(fingerprint, version_id))
+            if data is not None:
+                found = _loads(data)
+                self._remember(fingerprint, found, persist=False)
+                return found
+        rows = {str(r["id"]): r for r in adp.query_rows("graph_version_chain", id=version_id)}
+        if version_id not in rows:
+            raise ValueError(f"Unknown knowledge graph version: {version_id}")
+        chain, vid = [], version_id
+        while vid is not None:
+            row = rows.get(vid)
+            if row is None:
+                raise ValueError(f"Knowledge graph version {version_id} has a missing base version: {vid}")
+            chain.append(row)
+            vid = str(row["base_id"]) if row["kind"] == "delta" else None
+        resolved: Optional[Dict[str, Any]] = None
+        for row in reversed(chain):
+            body = _loads(row["manifest"])
+            sections = dict(resolved["sections"]) if resolved else {}
+            sections.update(body["sections"])
+            resolved = {
+                "id": str(row["id"]), "seq": int(row["seq"]), "created_at": _version(row["id"], row["created_at"])[1],
+                "depth": resolved["depth"] + 1 if resolved else 0, "snapshot_id": str(chain[-1]["id"]),
+                "object": body["object"],
+                "sections": {k: sections[k] for k in body["order"]},
+            }
+            self._remember(fingerprint, resolved)
+        return resolved
+
+    def latest(self, adp: DBAdapter, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Resolved manifest of the newest saved version (one probe when it is cached), or None."""
+        rows = adp.query_rows("latest_graph_version")
+        return self.manifest(adp, fingerprint, str(rows[0]["id"])) if rows else None
+
+    # ----- chunks -----
+
+    def _fetch_chunks(self, adp: DBAdapter, digests: Iterable[str]) -> Dict[str, bytes]:
+        """Raw chunk contents, from the local directory first and the database for the rest."""
+        out: Dict[str, bytes] = {}
+        missing = []
+        for d in digests:
+            data = self._read_file(self._chunk_path(d)) if self.directory else None
+            if data is None:
+                missing.append(d)
+            else:
+                codec, _, payload = data.partition(b"\n")
+                out[d] = _decompress(codec.decode("ascii"), payload)
+        count("cache.hit", len(out), kind="graph_chunk")
+        if missing:
+            count("cache.miss", len(missing), kind="graph_chunk")
+        for i in range(0, len(missing), _DIGEST_BATCH):
+            batch = missing[i:i + _DIGEST_BATCH]
+            for row in adp.query_rows("graph_chunks_by_digest", **build_in_list("digest_list", batch)):
+                digest, codec, data = str(row["digest"]), str(row["codec"]), bytes(row["data"])
+                out[digest] = _decompress(codec, data)
+                if self.directory:
+                    self._write_file(self._chunk_path(digest), codec.encode("ascii") + b"\n" + data)
+        lost = [d for d in missing if d not in out]
+        if lost:
+            raise ValueError(f"Knowledge graph chunks missing from storage: {', '.join(lost[:5])}")
+        return out
+
+    def load(self, adp: DBAdapter, fingerprint: str, version_id: Optional[str] = None
+             ) -> Optional[KnowledgeGraphDocument]:
+        """Rebuild a saved version (the latest when None) from its chunks; None when nothing is saved."""
+        manifest = (self.latest(adp, fingerprint) if version_id is None
+                    else self.manifest(adp, fingerprint, version_id))
+        if manifest is None:
+            return None
+        key = (fingerprint, manifest["id"])
+        with self._lock:
+            doc = self._docs.get(key)
+            if doc is not None:
+                self._docs.move_to_end(key)
+                return doc
+        with span("graph.rebuild", sections=len(manifest["sections"])):
+            chunks = self._fetch_chunks(adp, _digests(manifest["sections"]))
+            sections = {k: _assemble(kind, [chunks[d] for d in ds]) for k, (kind, ds) in manifest["sections"].items()}
+        doc = KnowledgeGraphDocument((manifest["id"], manifest["created_at"]), sections, manifest["object"])
+        with self._lock:
+            self._docs[key] = doc
+            while len(self._docs) > self.max_documents:
+                self._docs.popitem(last=False)
+        return doc
+
+    # ----- saving -----
+
+    def _ensure_tables(self, adp: DBAdapter, fingerprint: str) -> None:
+        if fingerprint in self._ready:
+            return
+        available = set(query_manager.list_available_queries(adp.db_type))
+        adp.execute_statements([(name, {}) for name in _DDL if name in available])
+        self._ready.add(fingerprint)
+
+    def save(self, adp: DBAdapter, fingerprint: str, value: Any, delta: bool = True, snapshot_every: int = 10,
+             chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+        """Store ``value`` (a JSON document or its text) as a new version.
+
+        Only chunks that are not stored yet are written. The version is a delta
+        against the latest one unless ``delta`` is False, there is no previous
+        version, or the previous snapshot is ``snapshot_every`` versions old.
+        Saving a document identical to the latest version writes nothing.
+        """
+        if isinstance(value, (str, bytes, bytearray)):
+            value = _loads(value)
+        self._ensure_tables(adp, fingerprint)
+
+        with span("graph.chunk") as sp:
+            tops = value.items() if isinstance(value, dict) else [(_WHOLE, value)]
+            raw: Dict[str, bytes] = {}
+            sections: Dict[str, List[Any]] = {}
+            for key, part in tops:
+                kind, entries = _entries(part)
+                digests = []
+                for chunk in _split(entries, chunk_size):
+                    d = hashlib.sha256(chunk).hexdigest()
+                    raw[d] = chunk
+                    digests.append(d)
+                sections[str(key)] = [kind, digests]
+            sp.set("chunks", len(raw))
+
+        is_object = isinstance(value, dict)
+        chunks_written = bytes_written = 0
+        for attempt in range(_SAVE_ATTEMPTS):
+            if attempt:
+                time.sleep(random.uniform(0, _SAVE_BACKOFF * attempt))
+            prev = self.latest(adp, fingerprint)
+            if prev is not None and prev["sections"] == sections and prev["object"] == is_object:
+                return {"id": prev["id"], "seq": prev["seq"], "created_at": prev["created_at"], "unchanged": True}
+            snapshot = not delta or prev is None or prev["depth"] + 1 >= snapshot_every
+            changed = sections if snapshot else {k: s for k, s in sections.items() if prev["sections"].get(k) != s}
+            new = self._unstored_chunks(adp, set(raw) - (_digests(prev["sections"]) if prev else set()))
+
+            statements = []
+            with span("graph.compress", chunks=len(new)):
+                for d in sorted(new):
+                    codec, data = _compress(raw[d])
+                    bytes_written += len(data)
+                    statements.append(("insert_graph_chunk", {"digest": d, "codec": codec,
+                                                              "raw_size": len(raw[d]), "data": data}))
+                    if self.directory:
+                        self._write_file(self._chunk_path(d), codec.encode("ascii") + b"\n" + data)
+            chunks_written += len(new)
+
+            vid = uuid.uuid4().hex
+            seq = prev["seq"] + 1 if prev else 1
+            created_at = datetime.now(timezone.utc).isoformat()
+            body = {"object": is_object, "order": list(sections), "sections": changed}
+            # Chunks go first: a failure before the version row leaves only unreferenced chunks.
+            # The version row is skipped when another save already took ``seq``.
+            statements.append(("insert_graph_version", {
+                "id": vid, "seq": seq, "created_at": created_at, "kind": "snapshot" if snapshot else "delta",
+                "base_id": None if snapshot else prev["id"], "snapshot_id": vid if snapshot else prev["snapshot_id"],
+                "manifest": dumps(body).decode("utf-8")}))
+            adp.execute_statements(statements)
+            if self._won_seq(adp, vid, seq):
+                break
+            count("graph.save_retry")
+        else:
+            raise RuntimeError(f"Could not save the knowledge graph: {_SAVE_ATTEMPTS} concurrent saves took "
+                               f"its sequence number first")
+
+        self._remember(fingerprint, {"id": vid, "seq": seq, "created_at": created_at,
+                                     "depth": 0 if snapshot else prev["depth"] + 1,
+                                     "snapshot_id": vid if snapshot else prev["snapshot_id"],
+                                     "object": is_object, "sections": sections})
+        return {"id": vid, "seq": seq, "created_at": created_at, "kind": "snapshot" if snapshot else "delta",
+                "base_id": None if snapshot else prev["id"], "sections_changed": len(changed),
+                "chunks": len(raw), "chunks_written": chunks_written, "bytes_written": bytes_written,
+                "raw_bytes": sum(len(c) for c in raw.values())}
+
+    @staticmethod
+    def _unstored_chunks(adp: DBAdapter, digests: Set[str]) -> Set[str]:
+        """The digests with no stored chunk yet."""
+        candidates = sorted(digests)
+        for i in range(0, len(candidates), _DIGEST_BATCH):
+            batch = candidates[i:i + _DIGEST_BATCH]
+            digests = digests - {str(r["digest"]) for r in adp.query_rows("existing_graph_chunks",
+                                                                           **build_in_list("digest_list", batch))}
+        return digests
+
+    @staticmethod
+    def _won_seq(adp: DBAdapter, vid: str, seq: int) -> bool:
+        """Whether version ``vid`` holds ``seq``; a losing row (possible where uniqueness is not
+        enforced, e.g. Snowflake) is deleted so the save can retry on top of the winner."""
+        ids = sorted(str(r["id"]) for r in adp.query_rows("graph_versions_at_seq", seq=seq))
+        if ids and ids[0] == vid:
+            return True
+        if vid in ids:
+            adp.execute_statements([("delete_graph_version", {"id": vid})])
+        return False
+
+# Global knowledge graph store; shares the DB_AGENT_KG_CACHE directory ("" keeps nothing on disk)
+knowledge_graph_store = KnowledgeGraphStore(os.getenv("DB_AGENT_KG_CACHE", DEFAULT_CACHE_DIR) or None)
@@ -1,65 +1,261 @@
 """Query base management system for database operations."""
 
 import json
-import os
+import re
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
-from functools import lru_cache
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+from ..instrumentation import count, span
+
+# Bind parameter style used by each dialect's driver
+PARAMSTYLES = {
+    "postgres": "pyformat",    # psycopg
+    "snowflake": "pyformat",   # snowflake-connector-python (default paramstyle)
+    "mysql": "pyformat",       # PyMySQL
+    "databricks": "named",     # databricks-sql-connector native parameters
+    "sqlite": "named",         # sqlite3
+}
+
+# Dialects where a backslash escapes inside string literals
+_BACKSLASH_ESCAPES = {"snowflake", "mysql", "databricks"}
+
+# A single-quoted SQL literal or a {name} / {name:default} placeholder
+_TOKEN = re.compile(r"'(?:[^']|'')*'|\{(\w+)(?::([^}]*))?\}")
+_PLACEHOLDER = re.compile(r"\{(\w+)(?::([^}]*))?\}")
+
+class BoundQuery(NamedTuple):
+    """Rendered SQL text with its driver-native bind parameters."""
+    sql: str
+    params: Optional[Dict[str, Any]]
+    prepare: Optional[bool] = None
+    client_binding: bool = False
+
+def _escape(value: Any, backslashes: bool) -> str:
+    value = str(value)
+    if backslashes:
+        value = value.replace("\\", "\\\\")
+    return value.replace("'", "''")
+
+class CompiledQuery:
+    """A query template parsed once into segments.
+
+    Placeholder kinds:
+
+    * ``'{name}'`` — a whole quoted literal: rendered as a bind parameter.
+    * ``{name}`` inside a longer literal — inlined as an escaped string.
+    * ``{name}`` outside literals — a trusted SQL fragment (filters, identifiers),
+      inserted as-is. Fragments may contain placeholders of their own.
+
+    ``{name:default}`` supplies a default used when the parameter is missing or None.
+    """
+
+    __slots__ = ("name", "segments", "prepare", "client_binding", "_texts", "_lock")
+
+    def __init__(self, name: str, template: str, prepare: Optional[bool] = None,
+                 client_binding: bool = False):
+        self.name = name
+        self.prepare = prepare
+        self.client_binding = client_binding
+        self.segments: List[Tuple[str, str, Optional[str]]] = self._parse(template)
+        self._texts: Dict[tuple, Tuple[str, Tuple[str, ...], bool]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _parse(template: str) -> List[Tuple[str, str, Optional[str]]]:
+        segments: List[Tuple[str, str, Optional[str]]] = []
+
+        def text(t: str):
+            if t:
+                if segments and segments[-1][0] == "text":
+                    segments[-1] = ("text", segments[-1][1] + t, None)
+                else:
+                    segments.append(("text", t, None))
+
+        pos = 0
+        for m in _TOKEN.finditer(template):
+            text(template[pos:m.start()])
+            pos = m.end()
+            token = m.group(0)
+            if m.group(1):
+                segments.append(("fragment", m.group(1), m.group(2)))
+                continue
+            inner = _PLACEHOLDER.fullmatch(token[1:-1])
+            if inner:
+                segments.append(("value", inner.group(1), inner.group(2)))
+                continue
+            # A literal with placeholders embedded in other text: inline them escaped.
+            lit_pos = 0
+            for p in _PLACEHOLDER.finditer(token):
+                text(token[lit_pos:p.start()])
+                segments.append(("inline", p.group(1), p.group(2)))
+                lit_pos = p.end()
+            text(token[lit_pos:])
+        text(template[pos:])
+        return segments
+
+    @property
+    def fragment_names(self) -> Tuple[str, ...]:
+        """Names of the top-level fragment placeholders."""
+        return tuple(n for kind, n, _ in self.segments if kind == "fragment")
+
+    def _param(self, params: Dict[str, Any], name: str, default: Optional[str]) -> Any:
+        value = params.get(name)
+        if value is None:
+            if default is None:
+                raise KeyError(f"Missing parameter '{name}' for query '{self.name}'")
+            return default
+        return value
+
+    def _build(self, manager: "QueryManager", params: Dict[str, Any], style: str,
+               backslashes: bool) -> Tuple[str, Tuple[str, ...], Dict[str, Optional[str]], bool]:
+        """Render to (SQL text with bind markers, bound value names, their defaults, cacheable)."""
+        parts: List[Tuple[str, Optional[str]]] = []  # (sql, bind name)
+        state = {"nested": False}
+        defaults: Dict[str, Optional[str]] = {}
+        self._collect(manager, params, backslashes, parts, state, defaults, depth=0)
+        names = tuple(n for _, n in parts if n is not None)
+        if not names:
+            sql = "".join(sql for sql, _ in parts)
+        elif style == "named":
+            sql = "".join(f":{n}" if n else sql for sql, n in parts)
+        else:
+            sql = "".join(f"%({n})s" if n else sql.replace("%", "%%") for sql, n in parts)
+        return sql, names, defaults, not state["nested"]
+
+    def _collect(self, manager: "QueryManager", params: Dict[str, Any], backslashes: bool,
+                 parts: List[Tuple[str, Optional[str]]], state: Dict[str, bool],
+                 defaults: Dict[str, Optional[str]], depth: int) -> None:
+        """Append (sql, bind name) parts; ``defaults`` gets each bound value's default,
+        including those declared inside nested fragments."""
+        if depth > 8:
+            raise ValueError(f"Fragments nested too deeply in query '{self.name}'")
+        for kind, name, default in self.segments:
+            if kind == "text":
+                parts.append((name, None))
+            elif kind == "fragment":
+                if depth:
+                    state["nested"] = True
+                fragment = str(self._param(params, name, default))
+                if "{" in fragment:
+                    manager.compile_text(fragment)._collect(manager, params, backslashes, parts, state,
+                                                            defaults, depth + 1)
+                else:
+                    parts.append((fragment, None))
+            elif kind == "value":
+                self._param(params, name, default)
+                if defaults.get(name) is None:
+                    defaults[name] = default
+                parts.append(("", name))
+            else:
+                state["nested"] = True  # inlined values change the text
+                parts.append((_escape(self._param(params, name, default), backslashes), None))
+
+    def render(self, manager: "QueryManager", params: Dict[str, Any], style: str = "pyformat",
+               backslashes: bool = False) -> BoundQuery:
+        """Render with bind parameters; SQL text is reused for identical fragments."""
+        key = (style, backslashes) + tuple(str(params.get(n)) for n in self.fragment_names)
+        cached = self._texts.get(key)
+        if cached is None:
+            cached = self._build(manager, params, style, backslashes)
+            if cached[3]:
+                with self._lock:
+                    if len(self._texts) < 256:
+                        self._texts[key] = cached
+        sql, names, defaults, _ = cached
+        bound = {n: params[n] if params.get(n) is not None else defaults[n] for n in names}
+        return BoundQuery(sql, bound or None, self.prepare, self.client_binding)
+
+    def inline(self, manager: "QueryManager", params: Dict[str, Any], backslashes: bool = False) -> str:
+        """Render with every value inlined as an escaped literal (no bind parameters)."""
+        parts: List[Tuple[str, Optional[str]]] = []
+        defaults: Dict[str, Optional[str]] = {}
+        self._collect(manager, params, backslashes, parts, {"nested": False}, defaults, depth=0)
+        out = []
+        for sql, name in parts:
+            if name is None:
+                out.append(sql)
+            else:
+                value = params.get(name)
+                out.append("'" + _escape(value if value is not None else defaults[name], backslashes) + "'")
+        return "".join(out)
 
 class QueryManager:
     """Manages database queries loaded from JSON files."""
-    
-    def __init__(self, queries_dir: str = "src/queries"):
-        self.queries_dir = Path(queries_dir)
+
+    def __init__(self, queries_dir: Optional[str] = None):
+        self.queries_dir = Path(queries_dir) if queries_dir else Path(__file__).parent
         self._queries_cache: Dict[str, Dict[str, Any]] = {}
-    
-    @lru_cache(maxsize=128)
+        self._compiled: Dict[Tuple[str, str], CompiledQuery] = {}
+        self._fragments: Dict[str, CompiledQuery] = {}
+        self._lock = threading.Lock()
+
     def load_queries(self, db_type: str) -> Dict[str, Any]:
         """Load queries for a specific database type."""
+        queries = self._queries_cache.get(db_type)
+        if queries is not None:
+            return queries
+
         queries_file = self.queries_dir / db_type / "queries.json"
-        
+
         if not queries_file.exists():
             raise FileNotFoundError(f"Queries file not found: {queries_file}")
-        
+
         with open(queries_file, 'r', encoding='utf-8') as f:
             queries = json.load(f)
-        
+
+        self._queries_cache[db_type] = queries
         return queries
-    
-    def get_query(self, db_type: str, query_name: str, **params) -> str:
-        """Get a query by name with parameter substitution."""
+
+    def compile(self, db_type: str, query_name: str) -> CompiledQuery:
+        """Return the compiled template for a query, parsing it on first use."""
+        key = (db_type, query_name)
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            return compiled
+
         queries = self.load_queries(db_type)
-        
         if query_name not in queries:
             raise KeyError(f"Query '{query_name}' not found for database type '{db_type}'")
-        
+
         query_template = queries[query_name]
-        
+
         # Handle different query formats
         if isinstance(query_template, str):
-            return self._substitute_params(query_template, **params)
+            compiled = CompiledQuery(query_name, query_template)
         elif isinstance(query_template, dict):
             # Support for more complex query structures
             query_text = query_template.get('sql', query_template.get('query', ''))
-            return self._substitute_params(query_text, **params)
+            compiled = CompiledQuery(query_name, query_text,
+                                     prepare=query_template.get('prepare'),
+                                     client_binding=query_template.get('binding') == 'client')
         else:
             raise ValueError(f"Invalid query format for '{query_name}'")
-    
-    def _substitute_params(self, query: str, **params) -> str:
-        """Substitute parameters in query template."""
-        # Simple parameter substitution
-        # Format: {param_name} or {param_name:default_value}
-        for key, value in params.items():
-            if value is not None:
-                query = query.replace(f"{{{key}}}", str(value))
-            else:
-                # Handle default values in format {param:default}
-                import re
-                pattern = f"{{{key}:[^}}]+}}"
-                query = re.sub(pattern, '', query)
-        
-        return query
-    
+
+        count("query.compile", db=db_type)
+        with self._lock:
+            return self._compiled.setdefault(key, compiled)
+
+    def compile_text(self, template: str) -> CompiledQuery:
+        """Compile an ad-hoc fragment (e.g. a filter clause), cached by its text."""
+        compiled = self._fragments.get(template)
+        if compiled is None:
+            compiled = CompiledQuery("<fragment>", template)
+            with self._lock:
+                if len(self._fragments) < 1024:
+                    self._fragments[template] = compiled
+        return compiled
+
+    def render(self, db_type: str, query_name: str, **params) -> BoundQuery:
+        """Render a query with driver-native bind parameters for its dialect."""
+        with span("query.render", db=db_type, query=query_name):
+            return self.compile(db_type, query_name).render(
+                self, params, PARAMSTYLES.get(db_type, "pyformat"), db_type in _BACKSLASH_ESCAPES)
+
+    def get_query(self, db_type: str, query_name: str, **params) -> str:
+        """Get a query by name with parameters inlined as escaped literals."""
+        with span("query.render", db=db_type, query=query_name):
+            return self.compile(db_type, query_name).inline(self, params, db_type in _BACKSLASH_ESCAPES)
+
     def list_available_queries(self, db_type: str) -> list:
         """List all available queries for a database type."""
         try:
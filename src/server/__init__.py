@@ -0,0 +1,287 @@
+"""Long-running server mode: serve ``run_deterministic`` actions over local HTTP or stdio JSON-RPC.
+
+One process keeps connection pools, the schema cache and the ``DatabaseAgent`` (LLM
+client and intent cache) warm across requests. Requests run on a bounded worker pool.
+When every worker and pending slot is taken, HTTP answers 503 and stdio stops reading
+input until a slot frees up. SIGTERM/SIGINT (or EOF on stdin) stop intake, let
+in-flight requests finish and close the pools.
+"""
+
+import json
+import signal
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, TextIO, Tuple, Union, get_args
+
+from pydantic import ValidationError
+from ..adapters.factory import close_adapters, evict_idle_connections
+from ..instrumentation import count
+from ..tools import run_deterministic, validate_payload
+
+ACTIONS = frozenset(get_args(run_deterministic.__annotations__["action"]))
+
+@dataclass
+class ServerConfig:
+    """Concurrency and housekeeping settings for the action server."""
+    workers: int = 8
+    max_pending: int = 64
+    drain_timeout: float = 30.0
+    evict_interval: float = 60.0
+
+class ServerBusy(RuntimeError):
+    """Every worker and pending slot is taken."""
+
+class ServerClosed(RuntimeError):
+    """The server is shutting down and no longer accepts requests."""
+
+class UnknownMethod(LookupError):
+    """The request names neither an action nor a server method."""
+
+# (exception type, HTTP status, JSON-RPC error code), first match wins
+_ERRORS = [
+    (UnknownMethod, 404, -32601),
+    (ValidationError, 422, -32602),
+    (ServerBusy, 503, -32001),
+    (ServerClosed, 503, -32002),
+    (ValueError, 400, -32000),
+]
+
+def _classify(exc: BaseException) -> Tuple[int, int]:
+    for kind, status, code in _ERRORS:
+        if isinstance(exc, kind):
+            return status, code
+    return 500, -32603
+
+def _as_json(result: str) -> str:
+    """Tool results are JSON text, except plain strings such as ``"ok"`` which get quoted."""
+    return result if result[:1] in ("{", "[") else json.dumps(result)
+
+class ActionServer:
+    """Runs actions on a bounded worker pool and owns the warm, process-wide state.
+
+    At most ``workers`` requests run at once and ``max_pending`` more may wait for a
+    worker; further submissions raise :class:`ServerBusy` (or block with ``block=True``).
+    Besides the ``run_deterministic`` actions, ``agent`` runs a natural language
+    ``request`` through a shared ``DatabaseAgent`` and ``stats`` reports server counters.
+    """
+
+    def __init__(self, config: Optional[ServerConfig] = None, openai_api_key: Optional[str] = None):
+        self.config = config or ServerConfig()
+        self._executor = ThreadPoolExecutor(self.config.workers, thread_name_prefix="db-agent")
+        self._slots = threading.BoundedSemaphore(self.config.workers + self.config.max_pending)
+        self._closing = threading.Event()
+        self._idle = threading.Condition()
+        self._inflight = 0
+        self._stats = {"served": 0, "failed": 0, "rejected": 0}
+        self._agent = None
+        self._agent_lock = threading.Lock()
+        self._openai_api_key = openai_api_key
+        threading.Thread(target=self._evict_loop, name="db-agent-evict", daemon=True).start()
+
+    def agent(self):
+        """The shared ``DatabaseAgent``, built on first use."""
+        if self._agent is None:
+            with self._agent_lock:
+                if self._agent is None:
+                    from ..agents import DatabaseAgent
+                    self._agent = DatabaseAgent(self._openai_api_key)
+        return self._agent
+
+    def info(self) -> Dict[str, Any]:
+        """Worker limits and request counters."""
+        with self._idle:
+            return {"workers": self.config.workers, "max_pending": self.config.max_pending,
+                    "inflight": self._inflight, "closing": self._closing.is_set(), **self._stats}
+
+    def call(self, method: str, params: Union[Dict[str, Any], bytes]) -> str:
+        """Run one request in the calling thread; ``params`` may be the raw JSON body."""
+        if method == "agent":
+            if isinstance(params, (bytes, str)):
+                params = json.loads(params)
+            if not params.get("request"):
+                raise ValueError("'request' is required for the agent method")
+            return self.agent().execute_request(params["request"])
+        args = validate_payload(method, params)
+        # Streaming to stdout would write rows into the JSON-RPC channel (or the daemon's terminal)
+        if getattr(args, "stream", False) and getattr(args, "output", None) in (None, "-"):
+            raise ValueError(f"{method} with stream=true needs an output file in server mode")
+        return run_deterministic(method, args)
+
+    def submit(self, method: str, params: Union[Dict[str, Any], bytes], block: bool = False) -> Future:
+        """Queue a request on the worker pool and return its future."""
+        if method == "stats":
+            fut = Future()
+            fut.set_result(json.dumps(self.info()))
+            return fut
+        if method not in ACTIONS and method != "agent":
+            raise UnknownMethod(f"Unknown action: {method}")
+        if self._closing.is_set() or not self._slots.acquire(blocking=block):
+            if self._closing.is_set():
+                raise ServerClosed("Server is shutting down")
+            with self._idle:
+                self._stats["rejected"] += 1
+            count("server.rejected")
+            raise ServerBusy(f"All {self.config.workers} workers and {self.config.max_pending} "
+                             "pending slots are busy")
+        with self._idle:
+            self._inflight += 1
+        try:
+            fut = self._executor.submit(self.call, method, params)
+        except RuntimeError:  # the executor shut down between the check and the submit
+            self._release()
+            raise ServerClosed("Server is shutting down")
+        fut.add_done_callback(self._done)
+        return fut
+
+    def handle(self, method: str, params: Union[Dict[str, Any], bytes]) -> str:
+        """Submit a request and wait for its result."""
+        return self.submit(method, params).result()
+
+    def _done(self, fut: Future) -> None:
+        failed = fut.cancelled() or fut.exception() is not None
+        with self._idle:
+            self._stats["failed" if failed else "served"] += 1
+        self._release()
+
+    def _release(self) -> None:
+        self._slots.release()
+        with self._idle:
+            self._inflight -= 1
+            self._idle.notify_all()
+
+    def _evict_loop(self) -> None:
+        # Close expired idle connections so a quiet server does not sit on stale sessions
+        while not self._closing.wait(self.config.evict_interval):
+            evict_idle_connections()
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting requests, wait up to ``timeout`` for in-flight ones, then close the pools."""
+        self._closing.set()
+        with self._idle:
+            self._idle.wait_for(lambda: self._inflight == 0,
+                                self.config.drain_timeout if timeout is None else timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        close_adapters()
+
+# ---------- HTTP transport ----------
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    """``POST /<action>`` with the payload as the JSON body; ``GET /health`` returns server stats."""
+
+    server_version = "db-agent"
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/health":
+            self._reply(200, json.dumps(self.server.app.info()))
+        else:
+            self._reply(404, json.dumps({"error": f"Not found: {self.path}"}))
+
+    def do_POST(self):
+        method = self.path.strip("/")
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            # Actions validate the raw body directly (no intermediate dict)
+            result = self.server.app.handle(method, body or b"{}")
+        except Exception as e:
+            status, _ = _classify(e)
+            self._reply(status, json.dumps({"error": str(e), "action": method}))
+            return
+        self._reply(200, _as_json(result))
+
+    def _reply(self, status: int, text: str) -> None:
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 503:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_http(app: ActionServer, host: str = "127.0.0.1", port: int = 8765) -> None:
+    """Serve actions over HTTP until SIGTERM/SIGINT, then drain and close."""
+    httpd = ThreadingHTTPServer((host, port), _HTTPHandler)
+    httpd.app = app
+
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever, which runs in this (the main) thread
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"Serving on http://{host}:{httpd.server_address[1]}", file=sys.stderr)
+    try:
+        httpd.serve_forever()
+    finally:
+        app.shutdown()
+        httpd.server_close()  # joins the handler threads still writing responses
+
+# ---------- stdio JSON-RPC transport ----------
+
+def _rpc_error(rid: Any, code: int, message: str) -> str:
+    return json.dumps({"jsonrpc": "2.0", "id": rid, "error": {"code": code, "message": message}})
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def serve_stdio(app: ActionServer, stdin: Optional[TextIO] = None, stdout: Optional[TextIO] = None) -> None:
+    """Serve JSON-RPC 2.0 requests, one per line, until EOF or SIGTERM/SIGINT.
+
+    ``method`` is an action (or ``agent``/``stats``) and ``params`` its payload.
+    Responses are written as requests complete, so they may come out of order;
+    requests without an ``id`` are notifications and get no response.
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    lock = threading.Lock()
+
+    def write(line: str) -> None:
+        with lock:
+            stdout.write(line + "\n")
+            stdout.flush()
+
+    def respond(rid: Any, fut: Future) -> None:
+        try:
+            result = fut.result()
+        except BaseException as e:
+            write(_rpc_error(rid, _classify(e)[1], str(e)))
+            return
+        write(f'{{"jsonrpc":"2.0","id":{json.dumps(rid)},"result":{_as_json(result)}}}')
+
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        for line in stdin:
+            if not line.strip():
+                continue
+            try:
+                req = json.loads(line)
+            except ValueError:
+                write(_rpc_error(None, -32700, "Parse error"))
+                continue
+            rid = req.get("id") if isinstance(req, dict) else None
+            if not isinstance(req, dict) or not isinstance(req.get("method"), str) \
+                    or not isinstance(req.get("params", {}), dict):
+                write(_rpc_error(rid, -32600, "Invalid request"))
+                continue
+            try:
+                # Blocking here is the backpressure: no more input is read until a slot frees up
+                fut = app.submit(req["method"], req.get("params") or {}, block=True)
+            except Exception as e:
+                if rid is not None:
+                    write(_rpc_error(rid, _classify(e)[1], str(e)))
+                continue
+            if rid is not None:
+                fut.add_done_callback(lambda f, rid=rid: respond(rid, f))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.shutdown()
+
+__all__ = ["ActionServer", "ServerConfig", "ServerBusy", "ServerClosed", "UnknownMethod", "ACTIONS",
+           "serve_http", "serve_stdio"]
@@ -1,63 +1,494 @@
 """Database agent tools."""
 
-from typing import Literal
-from ..models.schemas import SchemaArgs, MetadataArgs, QueryArgs, OntologyArgs
-from ..adapters.factory import get_adapter
-from ..utils import safe_json_dumps
-from ..queries import query_manager
+import base64
+import fnmatch
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Literal, Optional, Tuple, Type, Union
+from pydantic import BaseModel, TypeAdapter
+from ..models.schemas import Conn, SchemaArgs, CrawlArgs, MetadataArgs, BulkMetadataArgs, QueryArgs, SubmitQueryArgs, QueryHandleArgs, ExportArgs, OntologyArgs, SaveOntologyArgs, OntologyQueryArgs
+from ..adapters.base import statement_timeout
+from ..adapters.factory import get_adapter, get_async_adapter
+from ..utils import safe_json_dumps, write_json_stream, write_arrow_stream, conn_fingerprint
+from ..utils.export import ProgressCallback
+from ..cache import schema_cache, result_cache, is_cacheable, is_read_only, normalize_sql
+from ..ontology import OntologyGraph, ontology_snapshots, knowledge_graphs, knowledge_graph_store
+from ..instrumentation import span
+
+def _load_schema(args: SchemaArgs) -> list:
+    """Columns for the args' scope, served from the schema cache when possible."""
+    fp = conn_fingerprint(args.conn)
+    scope = (args.database, args.schema_name, args.table)
+    data = None if args.refresh else schema_cache.get("list_schema", fp, *scope)
+    if data is None:
+        adp = get_adapter(args.conn)
+        data = adp.list_schema(*scope)
+        schema_cache.put("list_schema", fp, data, *scope)
+    return data
 
 def list_schema(args: SchemaArgs) -> str:
     """List schema: tables/columns with types and comments."""
-    adp = get_adapter(args.conn)
-    data = adp.list_schema(args.database, args.schema_name, args.table)
-    return safe_json_dumps(data)
+    if args.page_size is not None or args.cursor is not None or args.mode == "tables":
+        return safe_json_dumps(_list_schema_page(args))
+    return safe_json_dumps(_load_schema(args))
+
+DEFAULT_PAGE_SIZE = 1000
+
+def _encode_cursor(scope: list, key: list) -> str:
+    return base64.urlsafe_b64encode(safe_json_dumps([scope, key]).encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str, scope: list) -> list:
+    try:
+        issued, key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid list_schema cursor") from None
+    if issued != scope:
+        raise ValueError("The cursor belongs to a list_schema call with a different mode or scope")
+    return key
+
+def _list_schema_page(args: SchemaArgs) -> Dict[str, Any]:
+    """One keyset page of columns (or tables) plus the cursor of the next page (None on the last)."""
+    scope = [args.mode, args.database, args.schema_name, args.table]
+    after = _decode_cursor(args.cursor, scope) if args.cursor else None
+    rows, last = get_adapter(args.conn).catalog_page(args.mode, args.database, args.schema_name, args.table,
+                                                     after, args.page_size or DEFAULT_PAGE_SIZE)
+    return {"rows": rows, "next_cursor": _encode_cursor(scope, last) if last is not None else None}
 
 def update_metadata(args: MetadataArgs) -> str:
     """Update comments (and tags in Snowflake) for table/column."""
     adp = get_adapter(args.conn)
     out = adp.update_metadata(args)
+    schema_cache.apply_metadata(conn_fingerprint(args.conn), args)
     return out
 
+def bulk_update_metadata(args: BulkMetadataArgs) -> str:
+    """Apply a list of comment/tag changes in one session, reporting each item's outcome."""
+    adp = get_adapter(args.conn)
+    results = adp.bulk_update_metadata(args.changes, atomic=args.atomic)
+    fp = conn_fingerprint(args.conn)
+    for r in results:
+        if r["status"] == "ok":
+            schema_cache.apply_metadata(fp, args.changes[r["index"]])
+    failed = sum(1 for r in results if r["status"] == "error")
+    return safe_json_dumps({"ok": len(results) - failed, "failed": failed, "results": results})
+
 def execute_query(args: QueryArgs) -> str:
     """Execute SQL (use only with permitted roles)."""
+    if args.cache and not args.stream and is_cacheable(args.sql):
+        key = (conn_fingerprint(args.conn), normalize_sql(args.sql), args.columnar)
+        return result_cache.get_or_compute(key, lambda: _run_query(args), args.cache_ttl)
+    out = _run_query(args)
+    _invalidate_results(args)
+    return out
+
+def _invalidate_results(args: QueryArgs) -> None:
+    """A write may change any result read over the same connection, so drop them."""
+    if len(result_cache) and not is_read_only(args.sql):
+        result_cache.invalidate(conn_fingerprint(args.conn))
+
+def _run_query(args: QueryArgs) -> str:
     adp = get_adapter(args.conn)
-    rows = adp.run_query(args.sql)
-    return safe_json_dumps(rows)
+    with statement_timeout(args.timeout):
+        if args.stream and args.output_format == "arrow":
+            if args.output in (None, "-"):
+                raise ValueError("output_format=arrow requires an output file")
+            count = write_arrow_stream(adp.arrow_batches(args.sql, args.batch_size), args.output)
+            return safe_json_dumps({"rows": count, "output": args.output, "format": "arrow"})
+        if args.stream:
+            batches = adp.stream_query(args.sql, args.batch_size, json_ready=True)
+            count = write_json_stream(batches, args.output, args.output_format)
+            if args.output in (None, "-"):
+                return ""
+            return safe_json_dumps({"rows": count, "output": args.output, "format": args.output_format})
+        if args.columnar:
+            return safe_json_dumps(adp.run_query_arrow(args.sql, args.batch_size).to_pydict())
+        rows = adp.run_query_json(args.sql, args.batch_size)
+        return safe_json_dumps(rows)
+
+# ---------- Submitted queries ----------
+
+# Bounds for the status polling interval while waiting for a submitted query (seconds)
+_POLL_MIN = 0.05
+_POLL_MAX = 1.0
+
+def _wait_status(args: QueryHandleArgs) -> Dict[str, Any]:
+    """Status of a submitted query, polled with backoff for up to ``args.wait`` seconds."""
+    adp = get_adapter(args.conn)
+    deadline = time.monotonic() + args.wait
+    delay = _POLL_MIN
+    while True:
+        status = adp.query_status(args.handle)
+        left = deadline - time.monotonic()
+        if status["state"] != "running" or left <= 0:
+            return status
+        time.sleep(min(delay, left))
+        delay = min(delay * 2, _POLL_MAX)
+
+def submit_query(args: SubmitQueryArgs) -> str:
+    """Start a query without waiting; returns a handle for query_status, cancel_query and fetch_query."""
+    handle = get_adapter(args.conn).submit_query(args.sql, args.timeout, args.batch_size)
+    if len(result_cache) and not is_read_only(args.sql):
+        result_cache.invalidate(conn_fingerprint(args.conn))
+    return safe_json_dumps({"handle": handle, "state": "running"})
+
+def query_status(args: QueryHandleArgs) -> str:
+    """State of a submitted query (running, succeeded, failed or cancelled), waiting up to ``wait`` seconds."""
+    return safe_json_dumps(_wait_status(args))
+
+def cancel_query(args: QueryHandleArgs) -> str:
+    """Ask the server to cancel a submitted query."""
+    cancelled = get_adapter(args.conn).cancel_query(args.handle)
+    return safe_json_dumps({"handle": args.handle, "cancel_requested": cancelled})
+
+def fetch_query(args: QueryHandleArgs) -> str:
+    """Rows of a finished submitted query, waiting up to ``wait`` seconds for it to finish."""
+    if args.wait:
+        _wait_status(args)
+    return safe_json_dumps(get_adapter(args.conn).fetch_query(args.handle, args.batch_size))
+
+def export_query(args: ExportArgs, progress: Optional[ProgressCallback] = None) -> str:
+    """Export a query result to Parquet/CSV files using the dialect's fastest bulk path."""
+    adp = get_adapter(args.conn)
+    summary = adp.export_query(args.sql, args.output, args.format, args.compression,
+                               args.rows_per_file, args.batch_size, progress)
+    return safe_json_dumps({**summary, "format": args.format})
+
+def _load_ontology(args) -> dict:
+    """Ontology edges for the args' scope, served from the schema cache when possible."""
+    fp = conn_fingerprint(args.conn)
+    if args.incremental:
+        graph, stats = ontology_snapshots.refresh(get_adapter(args.conn), fp, args.database, args.schema_name)
+        schema_cache.put("ontology", fp, graph, args.database, args.schema_name)
+        if stats["mode"] == "full" or stats["changed_tables"] or stats["dropped_tables"]:
+            schema_cache.invalidate(fp, args.database, args.schema_name, kinds={"ontology_graph"})
+        return graph
+    graph = None if args.refresh else schema_cache.get("ontology", fp, args.database, args.schema_name)
+    if graph is None:
+        adp = get_adapter(args.conn)
+        graph = adp.ontology(args.database, args.schema_name)
+        schema_cache.put("ontology", fp, graph, args.database, args.schema_name)
+        schema_cache.invalidate(fp, args.database, args.schema_name, kinds={"ontology_graph"})
+    return graph
 
 def get_ontology(args: SchemaArgs) -> str:
     """Return foreign key relationships (simple graph)."""
-    adp = get_adapter(args.conn)
-    graph = adp.ontology(args.database, args.schema_name)
-    return safe_json_dumps(graph)
+    return safe_json_dumps(_load_ontology(args))
+
+def query_ontology(args: OntologyQueryArgs) -> str:
+    """Answer neighbour, reachability, join-path and component queries over the FK graph."""
+    fp = conn_fingerprint(args.conn)
+    edges = _load_ontology(args)
+    graph = schema_cache.get("ontology_graph", fp, args.database, args.schema_name)
+    if graph is None:
+        graph = OntologyGraph.from_edges(edges)
+        schema_cache.put("ontology_graph", fp, graph, args.database, args.schema_name)
+
+    if args.op == "components":
+        return safe_json_dumps({"components": graph.connected_components()})
+    if not args.table:
+        raise ValueError(f"table is required for op={args.op}")
+    if args.op == "neighbors":
+        return safe_json_dumps({"edges": graph.neighbors(args.table, args.direction)})
+    if args.op == "reachable":
+        return safe_json_dumps({"tables": graph.reachable(args.table, args.hops, args.direction)})
+    if not args.target:
+        raise ValueError("target is required for op=join_path")
+    return safe_json_dumps({"path": graph.shortest_join_path(args.table, args.target)})
+
+def _stored_knowledge_graph(adp, fp: str, args: OntologyArgs):
+    """The requested knowledge graph document, or None when nothing (or no storage table) exists.
+
+    Without ``version`` the legacy JSON_STORAGE table is read; a database that only has
+    save_ontology versions gets the latest of those instead.
+    """
+    try:
+        if args.version is not None:
+            return knowledge_graph_store.load(adp, fp, None if args.version == "latest" else args.version)
+        return knowledge_graphs.current(adp, fp, args.refresh)
+    except Exception:
+        # Only a missing storage table is not an error; the probe runs just on this path
+        tables = adp.knowledge_graph_tables()
+        if ("json_storage" if args.version is None else "graph_versions") in tables:
+            raise
+    if args.version is None and "graph_versions" in tables:
+        return knowledge_graph_store.load(adp, fp)
+    return None
 
 def view_current_ontology(args: OntologyArgs) -> str:
-    """Get the current ontology from knowledge graph storage."""
-    adp = get_adapter(args.conn)
-    
-    # Use the specific query for current ontology
-    query = query_manager.get_query("snowflake", "view_current_ontology")
-    
-    with adp._conn() as cn:
-        cur = cn.cursor()
-        cur.execute(query)
-        cols = [d[0] for d in cur.description]
-        data = [dict(zip(cols, r)) for r in cur.fetchall()]
-    
+    """Get the current ontology from knowledge graph storage (refetched only when a new version is stored)."""
+    adp, fp = get_adapter(args.conn), conn_fingerprint(args.conn)
+    doc = _stored_knowledge_graph(adp, fp, args)
+    if doc is None:
+        return safe_json_dumps([])
+    if args.path is not None:
+        try:
+            value = doc.at(args.path)
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise ValueError(f"Path not found in the knowledge graph: {args.path}") from None
+        return safe_json_dumps({"id": doc.id, "created_at": doc.created_at, "path": args.path, "value": value})
+    key = adp.fold_identifier  # keys cased as the dialect returns the stored row's columns
+    return safe_json_dumps([{key("knowledge_graph"): doc.text(), key("id"): doc.id, key("created_at"): doc.created_at}])
+
+def save_ontology(args: SaveOntologyArgs) -> str:
+    """Store a knowledge graph version as compressed chunks, writing only what changed since the latest one."""
+    graph = args.graph
+    if graph is None:
+        graph = _load_ontology(SchemaArgs(conn=args.conn, database=args.database, schema=args.schema_name))
+    result = knowledge_graph_store.save(get_adapter(args.conn), conn_fingerprint(args.conn), graph,
+                                        args.delta, args.snapshot_every, args.chunk_size)
+    return safe_json_dumps(result)
+
+# ---------- Catalog crawl ----------
+
+def _is_glob(pattern: str) -> bool:
+    return any(c in pattern for c in "*?[")
+
+def _matches(name: str, pattern: str) -> bool:
+    return fnmatch.fnmatchcase(str(name).lower(), pattern.lower())
+
+def _scope_conn(conn: Conn, database: Optional[str]) -> Conn:
+    """PostgreSQL catalogs are per database, so other databases need their own connection."""
+    if conn.type == "postgres" and database and database != conn.dbname:
+        return conn.model_copy(update={"dbname": database})
+    return conn
+
+def _crawl_scopes(args: CrawlArgs) -> Tuple[List[Tuple[Optional[str], str]], List[Dict[str, Any]]]:
+    """Expand database/schema names and globs into (database, schema) scopes, plus discovery errors."""
+    listed: Dict[str, List[Tuple[str, str]]] = {}
+
+    def visible(database):
+        conn = _scope_conn(args.conn, database)
+        key = conn_fingerprint(conn)
+        if key not in listed:
+            listed[key] = get_adapter(conn).list_schemas()
+        return listed[key]
+
+    scopes, errors = [], []
+    for db_pattern in args.databases or [args.conn.database or args.conn.dbname]:
+        try:
+            if db_pattern is not None and _is_glob(db_pattern):
+                databases = sorted({d for d, _ in visible(None) if _matches(d, db_pattern)})
+            else:
+                databases = [db_pattern]
+        except Exception as e:
+            errors.append({"database": db_pattern, "schema": None, "kind": "discover",
+                           "status": "error", "error": str(e)})
+            continue
+        for database in databases:
+            try:
+                for pattern in args.schemas or ["*"]:
+                    if not _is_glob(pattern):
+                        scopes.append((database, pattern))
+                        continue
+                    scopes += [(d, s) for d, s in visible(database)
+                               if (database is None or _matches(d, database)) and _matches(s, pattern)]
+            except Exception as e:
+                errors.append({"database": database, "schema": None, "kind": "discover",
+                               "status": "error", "error": str(e)})
+    return list(dict.fromkeys(scopes)), errors
+
+_CRAWL_READS = {"list_schema": _load_schema, "ontology": _load_ontology}
+
+def iter_crawl(args: CrawlArgs) -> Iterator[Dict[str, Any]]:
+    """Read every scope's catalog concurrently, yielding one record per (scope, kind) as it finishes.
+
+    Each connection gets ``concurrency`` workers. A failing scope yields an error
+    record instead of stopping the crawl.
+    """
+    scopes, errors = _crawl_scopes(args)
+    yield from errors
+    executors: Dict[str, ThreadPoolExecutor] = {}
+    pending = {}
+    try:
+        for database, schema in scopes:
+            conn = _scope_conn(args.conn, database)
+            key = conn_fingerprint(conn)
+            if key not in executors:
+                # Give every worker a connection, growing the pool of an existing adapter too
+                get_adapter(conn).pool.grow(args.concurrency)
+                executors[key] = ThreadPoolExecutor(args.concurrency, thread_name_prefix="db-agent-crawl")
+            scope_args = SchemaArgs.model_validate({"conn": conn, "database": database, "schema": schema,
+                                                    "refresh": args.refresh})
+            for kind in args.include:
+                pending[executors[key].submit(_CRAWL_READS[kind], scope_args)] = (database, schema, kind)
+        for fut in as_completed(pending):
+            database, schema, kind = pending[fut]
+            record = {"database": database, "schema": schema, "kind": kind}
+            try:
+                data = fut.result()
+            except Exception as e:
+                record.update(status="error", error=str(e))
+            else:
+                record.update(status="ok", count=len(data["edges"] if kind == "ontology" else data), data=data)
+            yield record
+    finally:
+        for ex in executors.values():
+            ex.shutdown(wait=False, cancel_futures=True)
+
+def crawl_catalog(args: CrawlArgs) -> str:
+    """List schema and/or ontology for many databases/schemas (names or globs) concurrently."""
+    totals = {"ok": 0, "failed": 0}
+
+    def records():
+        for r in iter_crawl(args):
+            totals["ok" if r["status"] == "ok" else "failed"] += 1
+            yield r
+
+    if args.stream:
+        write_json_stream(([r] for r in records()), args.output)
+        if args.output in (None, "-"):
+            return ""
+        return safe_json_dumps({**totals, "output": args.output})
+    results = list(records())
+    return safe_json_dumps({**totals, "results": results})
+
+Action = Literal["list_schema","update_metadata","bulk_update_metadata","execute_query","submit_query","query_status","cancel_query","fetch_query","export_query","get_ontology","query_ontology","view_current_ontology","save_ontology","crawl_catalog"]
+
+# Action -> (tool, argument model), built once
+_ACTIONS: Dict[str, Tuple[Callable[..., str], Type[BaseModel]]] = {
+    "list_schema": (list_schema, SchemaArgs),
+    "update_metadata": (update_metadata, MetadataArgs),
+    "bulk_update_metadata": (bulk_update_metadata, BulkMetadataArgs),
+    "execute_query": (execute_query, QueryArgs),
+    "submit_query": (submit_query, SubmitQueryArgs),
+    "query_status": (query_status, QueryHandleArgs),
+    "cancel_query": (cancel_query, QueryHandleArgs),
+    "fetch_query": (fetch_query, QueryHandleArgs),
+    "export_query": (export_query, ExportArgs),
+    "get_ontology": (get_ontology, SchemaArgs),
+    "query_ontology": (query_ontology, OntologyQueryArgs),
+    "view_current_ontology": (view_current_ontology, OntologyArgs),
+    "save_ontology": (save_ontology, SaveOntologyArgs),
+    "crawl_catalog": (crawl_catalog, CrawlArgs),
+}
+
+Payload = Union[Dict[str, Any], str, bytes, BaseModel]
+
+def validate_payload(action: str, payload: Payload) -> BaseModel:
+    """Validate an action's payload: a dict, raw JSON text/bytes (parsed by pydantic directly) or a built model."""
+    model = _ACTIONS[action][1]
+    if isinstance(payload, (str, bytes, bytearray)):
+        return model.model_validate_json(payload)
+    if isinstance(payload, model):
+        return payload
+    return model.model_validate(payload)
+
+@lru_cache(maxsize=None)
+def _batch_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+def validate_payloads(action: str, payloads: Union[List[Dict[str, Any]], str, bytes]) -> List[BaseModel]:
+    """Validate many payloads of one action in a single pass (a list, or a raw JSON array)."""
+    adapter = _batch_adapter(_ACTIONS[action][1])
+    if isinstance(payloads, (str, bytes, bytearray)):
+        return adapter.validate_json(payloads)
+    return adapter.validate_python(payloads)
+
+def run_deterministic(action: Action, payload: Payload, progress: Optional[ProgressCallback] = None) -> str:
+    """Execute an action deterministically (``progress`` is reported by export_query).
+
+    ``payload`` may be raw JSON, which skips building an intermediate dict.
+    """
+    tool, _ = _ACTIONS[action]
+    with span("action", action=action) as sp:
+        args = validate_payload(action, payload)
+        out = tool(args, progress) if action == "export_query" else tool(args)
+        sp.set("bytes", len(out))
+    return out
+
+
+# ---------- Async tools ----------
+
+async def alist_schema(args: SchemaArgs) -> str:
+    """Async list_schema."""
+    if args.page_size is not None or args.cursor is not None or args.mode == "tables":
+        import asyncio
+        return await asyncio.to_thread(list_schema, args)
+    fp = conn_fingerprint(args.conn)
+    scope = (args.database, args.schema_name, args.table)
+    data = None if args.refresh else schema_cache.get("list_schema", fp, *scope)
+    if data is None:
+        data = await get_async_adapter(args.conn).list_schema(*scope)
+        schema_cache.put("list_schema", fp, data, *scope)
     return safe_json_dumps(data)
 
-def run_deterministic(action: Literal["list_schema","update_metadata","execute_query","get_ontology","view_current_ontology"], payload: dict) -> str:
-    """Execute an action deterministically."""
-    mapping = {
-        "list_schema": list_schema,
-        "update_metadata": update_metadata,
-        "execute_query": execute_query,
-        "get_ontology": get_ontology,
-        "view_current_ontology": view_current_ontology,
-    }
-    tool = mapping[action]
-    # Pydantic validation
-    model = {"list_schema": SchemaArgs, "update_metadata": MetadataArgs,
-             "execute_query": QueryArgs, "get_ontology": SchemaArgs, 
-             "view_current_ontology": OntologyArgs}[action]
-    args = model.model_validate(payload)
-    return tool(args)  # call the real function
+async def aupdate_metadata(args: MetadataArgs) -> str:
+    """Async update_metadata."""
+    out = await get_async_adapter(args.conn).update_metadata(args)
+    schema_cache.apply_metadata(conn_fingerprint(args.conn), args)
+    return out
+
+async def abulk_update_metadata(args: BulkMetadataArgs) -> str:
+    """Async bulk_update_metadata."""
+    results = await get_async_adapter(args.conn).bulk_update_metadata(args.changes, atomic=args.atomic)
+    fp = conn_fingerprint(args.conn)
+    for r in results:
+        if r["status"] == "ok":
+            schema_cache.apply_metadata(fp, args.changes[r["index"]])
+    failed = sum(1 for r in results if r["status"] == "error")
+    return safe_json_dumps({"ok": len(results) - failed, "failed": failed, "results": results})
+
+async def aexecute_query(args: QueryArgs) -> str:
+    """Async execute_query; streaming writes, cached reads and timed statements run in a worker thread."""
+    import asyncio
+    if args.stream or args.cache or args.timeout is not None:
+        return await asyncio.to_thread(execute_query, args)
+    if args.columnar:
+        table = await get_async_adapter(args.conn).run_query_arrow(args.sql, args.batch_size)
+        out = safe_json_dumps(table.to_pydict())
+    else:
+        out = safe_json_dumps(await get_async_adapter(args.conn).run_query(args.sql))
+    _invalidate_results(args)
+    return out
+
+async def aget_ontology(args: SchemaArgs) -> str:
+    """Async get_ontology."""
+    if args.incremental:
+        import asyncio
+        return await asyncio.to_thread(get_ontology, args)
+    fp = conn_fingerprint(args.conn)
+    graph = None if args.refresh else schema_cache.get("ontology", fp, args.database, args.schema_name)
+    if graph is None:
+        graph = await get_async_adapter(args.conn).ontology(args.database, args.schema_name)
+        schema_cache.put("ontology", fp, graph, args.database, args.schema_name)
+        schema_cache.invalidate(fp, args.database, args.schema_name, kinds={"ontology_graph"})
+    return safe_json_dumps(graph)
+
+_ASYNC_TOOLS = {
+    "list_schema": alist_schema,
+    "update_metadata": aupdate_metadata,
+    "bulk_update_metadata": abulk_update_metadata,
+    "execute_query": aexecute_query,
+    "get_ontology": aget_ontology,
+}
+
+async def arun_deterministic(action: str, payload: Payload) -> str:
+    """Async counterpart of run_deterministic; actions without an async path run in a worker thread."""
+    import asyncio
+    tool = _ASYNC_TOOLS.get(action)
+    if tool is None:
+        return await asyncio.to_thread(run_deterministic, action, payload)
+    with span("action", action=action) as sp:
+        out = await tool(validate_payload(action, payload))
+        sp.set("bytes", len(out))
+    return out
+
+async def arun_batch(requests: List[Tuple[str, dict]], concurrency: int = 32) -> List[str]:
+    """Run many (action, payload) pairs concurrently, at most ``concurrency`` at a time.
+
+    Results keep the input order; a failing request yields an error JSON object
+    instead of aborting the batch.
+    """
+    import asyncio
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(action: str, payload: dict) -> str:
+        async with sem:
+            try:
+                return await arun_deterministic(action, payload)
+            except Exception as e:
+                return safe_json_dumps({"error": str(e), "action": action})
+
+    return list(await asyncio.gather(*(one(a, p) for a, p in requests)))
@@ -1,8 +1,14 @@
 """Utility functions for the database agent system."""
 
 import re
-from typing import List, Dict, Any
-from ..models.schemas import MetadataArgs
+import sys
+import hashlib
+import json
+from typing import List, Dict, Any, Iterable, Literal, Optional
+from ..models.schemas import MetadataArgs, Conn
+from ..instrumentation import count, span
+from .arrow import to_numpy, to_pandas, write_arrow_stream
+from .serialize import RowEncoder, dumps as json_dumps, iter_json_chunks, to_jsonable, use_backend as use_json_backend
 
 # ---------- Utilities ----------
 _IDENT_OK = re.compile(r"^[A-Za-z0-9_.$]+$")
@@ -15,44 +21,116 @@ def ident(*parts: str) -> str:
             raise ValueError(f"Unsafe identifier: {x}")
     return ".".join(p)
 
+_env_loaded = False
+
+def load_env() -> None:
+    """Load the .env file into the environment, once, on first need (keeps dotenv off the import path)."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+def conn_fingerprint(conn: Conn) -> str:
+    """Stable hash of every connection setting, used to key pools and caches."""
+    raw = json.dumps(conn.model_dump(), sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
 def safe_json_dumps(data: List[Dict[str, Any]], ensure_ascii: bool = False) -> str:
-    """Safely serialize data to JSON, handling datetime objects."""
-    import json
-    return json.dumps(data, ensure_ascii=ensure_ascii, default=str)
+    """Serialize data to JSON with the active backend (datetimes, Decimals, bytes, UUIDs in canonical form)."""
+    with span("serialize") as sp:
+        if ensure_ascii:
+            out = json.dumps(data, ensure_ascii=True, separators=(",", ":"), default=to_jsonable)
+            size = len(out)
+        else:
+            raw = json_dumps(data)
+            out, size = raw.decode("utf-8"), len(raw)
+        sp.set("bytes", size)
+    count("serialize.bytes", size)
+    return out
+
+def write_json_stream(batches: Iterable[List[Dict[str, Any]]], output: Optional[str] = None,
+                      fmt: Literal["ndjson", "json"] = "ndjson") -> int:
+    """Write row batches to a file (or stdout for None/"-") without holding them all in memory.
+
+    ``ndjson`` writes one JSON object per line; ``json`` writes a single array.
+    Each batch is encoded as one chunk. Returns the number of rows written.
+    """
+    out = sys.stdout.buffer if output in (None, "-") else open(output, "wb")
+    counter = [0]
+    written = 0
+    with span("serialize.stream", fmt=fmt) as sp:
+        try:
+            for chunk in iter_json_chunks(batches, fmt, counter):
+                out.write(chunk)
+                written += len(chunk)
+            out.flush()
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        sp.set("rows", counter[0])
+        sp.set("bytes", written)
+    count("serialize.bytes", written)
+    return counter[0]
+
+def build_filter_clause(database: str = None, schema: str = None, table: str = None,
+                        prefix: str = "") -> Dict[str, str]:
+    """Build filter clauses for database queries.
 
-def build_filter_clause(database: str = None, schema: str = None, table: str = None) -> Dict[str, str]:
-    """Build filter clauses for database queries."""
+    The clauses reference their values through quoted placeholders, so they can be
+    passed straight to ``query_manager.render`` (bind parameters) or ``get_query``
+    (escaped literals) together with the values. ``prefix`` qualifies the columns,
+    e.g. ``"tc."`` for queries that join several catalog views.
+    """
     filters = {}
     
     if database:
-        filters['database_filter'] = f"AND table_catalog = '{database}'"
+        filters['database_filter'] = f"AND {prefix}table_catalog = '{{filter_database}}'"
+        filters['filter_database'] = database
     else:
         filters['database_filter'] = ""
     
     if schema:
-        filters['schema_filter'] = f"AND table_schema = '{schema}'"
+        filters['schema_filter'] = f"AND {prefix}table_schema = '{{filter_schema}}'"
+        filters['filter_schema'] = schema
     else:
         filters['schema_filter'] = ""
     
     if table:
-        filters['table_filter'] = f"AND table_name = '{table}'"
+        filters['table_filter'] = f"AND {prefix}table_name = '{{filter_table}}'"
+        filters['filter_table'] = table
     else:
         filters['table_filter'] = ""
     
     return filters
 
-def build_postgres_filter_clause(schema: str = None, table: str = None) -> Dict[str, str]:
-    """Build filter clauses for PostgreSQL queries."""
-    filters = {}
-    
-    if schema:
-        filters['schema_filter'] = f"AND table_schema = '{schema}'"
-    else:
-        filters['schema_filter'] = ""
-    
-    if table:
-        filters['table_filter'] = f"AND table_name = '{table}'"
-    else:
-        filters['table_filter'] = ""
-    
+def build_postgres_filter_clause(schema: str = None, table: str = None, prefix: str = "") -> Dict[str, str]:
+    """Build filter clauses for PostgreSQL queries (see ``build_filter_clause``)."""
+    filters = build_filter_clause(schema=schema, table=table, prefix=prefix)
+    del filters['database_filter']
     return filters
+
+def build_keyset_clause(columns: List[str], after: Optional[List[Any]] = None, name: str = "after") -> Dict[str, Any]:
+    """Build an ``after_filter`` fragment keeping rows that sort after ``after`` on ``columns``.
+
+    The row comparison is expanded into nested ``OR``/``AND`` terms, which every
+    dialect accepts; the key values are bound parameters. Empty without ``after``.
+    """
+    if not after:
+        return {f"{name}_filter": ""}
+    params: Dict[str, Any] = {f"{name}_{i}": v for i, v in enumerate(after)}
+
+    def term(i: int) -> str:
+        col, value = columns[i], f"'{{{name}_{i}}}'"
+        if i == len(columns) - 1:
+            return f"{col} > {value}"
+        return f"({col} > {value} OR ({col} = {value} AND {term(i + 1)}))"
+
+    params[f"{name}_filter"] = f"AND {term(0)}"
+    return params
+
+def build_in_list(name: str, values: List[str]) -> Dict[str, str]:
+    """Build an ``IN (...)`` list fragment with one bound placeholder per value."""
+    params = {f"{name}_{i}": v for i, v in enumerate(values)}
+    params[name] = ", ".join(f"'{{{k}}}'" for k in params)
+    return params
@@ -0,0 +1,131 @@
+"""Columnar (Apache Arrow) result helpers.
+
+pyarrow is an optional dependency: it is imported on first use so the row-based
+paths keep working without it.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+# Batches buffered by stable_batches while column types are still unknown
+_SCHEMA_PROBE_BATCHES = 8
+
+def require_pyarrow():
+    """Import pyarrow, with a clear error when it is not installed."""
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Columnar results require pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+def _column(pa, values: Sequence[Any], type_=None):
+    """Build one Arrow array, falling back to inference and then to strings."""
+    for t in (type_, None) if type_ is not None else (None,):
+        try:
+            return pa.array(values, type=t)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, OverflowError):
+            continue
+    return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+def rows_to_record_batch(rows: Sequence[Sequence[Any]], names: List[str], types: Optional[List[Any]] = None):
+    """Transpose fetched row tuples into one Arrow record batch, column by column.
+
+    ``types`` holds an Arrow type (or None to infer) per column.
+    """
+    pa = require_pyarrow()
+    types = types or [None] * len(names)
+    if rows:
+        columns = [_column(pa, list(col), t) for col, t in zip(zip(*rows), types)]
+    else:
+        columns = [pa.array([], type=t or pa.null()) for t in types]
+    return pa.RecordBatch.from_arrays(columns, names=names)
+
+def pin_types(types: List[Any], batch) -> List[Any]:
+    """Fill unknown column types with the ones inferred for ``batch`` (null columns stay unknown)."""
+    pa = require_pyarrow()
+    return [t if t is not None or pa.types.is_null(f.type) else f.type
+            for t, f in zip(types, batch.schema)]
+
+def record_batches_to_table(batches: Iterable[Any]):
+    """Concatenate record batches into a table, unifying types inferred per batch."""
+    pa = require_pyarrow()
+    batches = list(batches)
+    if not batches:
+        return pa.table({})
+    tables = [pa.Table.from_batches([b]) for b in batches]
+    return pa.concat_tables(tables, promote_options="permissive")
+
+def to_numpy(data) -> Dict[str, Any]:
+    """Columns of an Arrow table or batch as NumPy arrays, zero-copy where Arrow allows it.
+
+    Primitive columns without nulls share the Arrow buffers; other columns are copied.
+    """
+    pa = require_pyarrow()
+    out = {}
+    for name, col in zip(data.schema.names, data.columns):
+        if isinstance(col, pa.ChunkedArray):
+            col = col.combine_chunks() if col.num_chunks != 1 else col.chunk(0)
+        try:
+            out[name] = col.to_numpy(zero_copy_only=True)
+        except pa.ArrowInvalid:
+            out[name] = col.to_numpy(zero_copy_only=False)
+    return out
+
+def to_pandas(data, arrow_dtypes: bool = False):
+    """Convert an Arrow table or batch to a pandas DataFrame.
+
+    With ``arrow_dtypes`` the columns stay backed by the Arrow buffers
+    (``pd.ArrowDtype``) instead of being converted to NumPy dtypes.
+    """
+    require_pyarrow()
+    if arrow_dtypes:
+        import pandas as pd
+        return data.to_pandas(types_mapper=pd.ArrowDtype)
+    return data.to_pandas(split_blocks=True)
+
+def stable_batches(batches: Iterable[Any]) -> Iterator[Any]:
+    """Yield record batches cast to one schema, for writers that need it up front.
+
+    The schema is resolved from the leading batches: columns that are still
+    all-null after ``_SCHEMA_PROBE_BATCHES`` batches are typed as strings.
+    """
+    pa = require_pyarrow()
+    pending: List[Any] = []
+    schema = None
+
+    def cast(batch):
+        if batch.schema == schema:
+            return batch
+        return pa.Table.from_batches([batch]).cast(schema).combine_chunks().to_batches()[0]
+
+    for batch in batches:
+        if schema is not None:
+            yield cast(batch)
+            continue
+        pending.append(batch)
+        if any(pa.types.is_null(f.type) for f in batch.schema) and len(pending) < _SCHEMA_PROBE_BATCHES:
+            continue
+        merged = pa.unify_schemas([b.schema for b in pending], promote_options="permissive")
+        schema = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in merged])
+        for b in pending:
+            yield cast(b)
+        pending.clear()
+    if pending:
+        schema = pa.unify_schemas([b.schema for b in pending], promote_options="permissive")
+        for b in pending:
+            yield cast(b)
+
+def write_arrow_stream(batches: Iterable[Any], output: str) -> int:
+    """Write record batches to an Arrow IPC stream file; returns the number of rows written."""
+    pa = require_pyarrow()
+    count = 0
+    with pa.OSFile(output, "wb") as sink:
+        writer = None
+        for batch in stable_batches(batches):
+            if writer is None:
+                writer = pa.ipc.new_stream(sink, batch.schema)
+            writer.write_batch(batch)
+            count += batch.num_rows
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, pa.schema([]))
+        writer.close()
+    return count
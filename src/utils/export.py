@@ -0,0 +1,120 @@
+"""Bulk export of query results to Parquet and CSV files."""
+
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from .arrow import require_pyarrow, stable_batches
+
+# Receives {"rows": rows written or None, "bytes": bytes written or None, "files": files opened}
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+# Rows buffered into each Parquet row group (Arrow batches are often much smaller)
+_ROW_GROUP_ROWS = 131072
+
+_COMPRESSED_EXTENSIONS = (".gz", ".bz2", ".zst", ".lz4", ".br")
+
+def chunk_path(output: str, index: int) -> str:
+    """Path of the ``index``-th file of a chunked export: ``out.csv.gz`` -> ``out-00001.csv.gz``."""
+    root, ext = os.path.splitext(output)
+    if ext in _COMPRESSED_EXTENSIONS:
+        root, inner = os.path.splitext(root)
+        ext = inner + ext
+    return f"{root}-{index:05d}{ext}"
+
+class ExportWriter:
+    """Writes Arrow record batches to Parquet or CSV, rotating files every ``rows_per_file`` rows.
+
+    Parquet ``compression`` is a codec name (default ``snappy``); for CSV it wraps the
+    whole file in a compressed stream (e.g. ``gzip``, ``zstd``).
+    """
+
+    def __init__(self, output: str, fmt: str = "parquet", compression: Optional[str] = None,
+                 rows_per_file: Optional[int] = None, progress: Optional[ProgressCallback] = None):
+        self.pa = require_pyarrow()
+        self.output = output
+        self.fmt = fmt
+        self.compression = compression
+        self.rows_per_file = rows_per_file
+        self.progress = progress
+        self.rows = 0
+        self.files: List[str] = []
+        self._writer = None
+        self._sink = None
+        self._file_rows = 0
+        self._buffer: List[Any] = []
+        self._buffered = 0
+
+    def _open(self, schema) -> None:
+        path = self.output if self.rows_per_file is None else chunk_path(self.output, len(self.files))
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, schema, compression=self.compression or "snappy")
+        else:
+            import pyarrow.csv as pacsv
+            if self.compression:
+                self._sink = self.pa.CompressedOutputStream(path, self.compression)
+            else:
+                self._sink = self.pa.OSFile(path, "wb")
+            self._writer = pacsv.CSVWriter(self._sink, schema)
+        self.files.append(path)
+        self._file_rows = 0
+
+    def _flush(self) -> None:
+        """Write the buffered batches as one Parquet row group."""
+        if self._buffer:
+            self._writer.write_table(self.pa.Table.from_batches(self._buffer))
+            self._buffer, self._buffered = [], 0
+
+    def _close_file(self) -> None:
+        self._flush()
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+        self._writer = self._sink = None
+
+    def _write_part(self, batch) -> None:
+        if self.fmt == "parquet":
+            self._buffer.append(batch)
+            self._buffered += batch.num_rows
+            if self._buffered >= _ROW_GROUP_ROWS:
+                self._flush()
+        else:
+            self._writer.write_batch(batch)
+
+    def write(self, batch) -> None:
+        """Append one record batch, splitting it across files at the row limit."""
+        while batch.num_rows:
+            if self._writer is None:
+                self._open(batch.schema)
+            room = self.rows_per_file - self._file_rows if self.rows_per_file else batch.num_rows
+            part = batch.slice(0, room)
+            self._write_part(part)
+            self._file_rows += part.num_rows
+            self.rows += part.num_rows
+            batch = batch.slice(part.num_rows)
+            if self.rows_per_file and self._file_rows >= self.rows_per_file:
+                self._close_file()
+        if self.progress is not None:
+            self.progress({"rows": self.rows, "bytes": None, "files": len(self.files)})
+
+    def close(self, schema=None) -> Dict[str, Any]:
+        """Finish the export; an empty result still produces one file when the schema is known."""
+        if self._writer is None and not self.files and schema is not None:
+            self._open(schema)
+        if self._writer is not None:
+            self._close_file()
+        return {"rows": self.rows, "files": self.files}
+
+def export_batches(batches: Iterable[Any], output: str, fmt: str = "parquet",
+                   compression: Optional[str] = None, rows_per_file: Optional[int] = None,
+                   progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """Write record batches to Parquet/CSV file(s); returns ``{"rows": n, "files": [...]}``."""
+    writer = ExportWriter(output, fmt, compression, rows_per_file, progress)
+    schema = None
+    try:
+        for batch in stable_batches(batches):
+            schema = batch.schema
+            if batch.num_rows:
+                writer.write(batch)
+    finally:
+        summary = writer.close(schema)
+    return summary
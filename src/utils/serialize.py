@@ -0,0 +1,279 @@
+"""Type-specialised JSON encoding for result sets.
+
+Each column gets its converter once, chosen from the driver's type codes
+(``cursor.description``) or from the first non-null value seen, so rows are never
+sent through a per-value ``default=`` fallback. Output is the same with either
+backend: ISO 8601 datetimes, Decimals as plain-notation strings, bytes as base64,
+UUIDs as strings, intervals as seconds, and NaN and infinities as null.
+"""
+
+import base64
+import binascii
+import datetime as _dt
+import decimal
+import json
+import math
+import uuid
+from functools import partial
+from itertools import repeat
+from json.encoder import c_make_encoder, encode_basestring
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+    HAS_ORJSON = False
+
+# ---------- Value converters ----------
+# Each converter falls back to the canonical form by type when a column holds an unexpected value.
+
+def _fallback(v):
+    conv = _CONVERTERS.get(type(v))
+    return conv(v) if conv is not None else v
+
+def _iso(v) -> str:
+    try:
+        return v.isoformat()
+    except AttributeError:
+        return _fallback(v)
+
+def _decimal(v) -> str:
+    if type(v) is decimal.Decimal:
+        return format(v, "f")
+    return _fallback(v)
+
+def _bytes(v) -> str:
+    try:
+        return base64.b64encode(v).decode("ascii")
+    except TypeError:
+        return _fallback(v)
+
+def _seconds(v) -> float:
+    try:
+        return v.total_seconds()
+    except AttributeError:
+        return _fallback(v)
+
+def _uuid(v) -> str:
+    return str(v)
+
+# Converters for values the stdlib encoder cannot handle natively
+_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    _dt.datetime: _iso,
+    _dt.date: _iso,
+    _dt.time: _iso,
+    _dt.timedelta: _seconds,
+    decimal.Decimal: _decimal,
+    bytes: _bytes,
+    bytearray: _bytes,
+    memoryview: _bytes,
+    uuid.UUID: _uuid,
+}
+
+# Column kind of each convertible Python type, for columns sniffed from values
+_KINDS = {
+    _dt.datetime: "datetime",
+    _dt.date: "date",
+    _dt.time: "time",
+    _dt.timedelta: "timedelta",
+    decimal.Decimal: "decimal",
+    bytes: "bytes",
+    bytearray: "bytes",
+    memoryview: "bytes",
+    uuid.UUID: "uuid",
+}
+
+# Column kinds reported by adapters (see DBAdapter._column_kinds) and their converters
+KIND_CONVERTERS: Dict[str, Optional[Callable[[Any], Any]]] = {
+    "native": None,  # str/int/float/bool, JSON values: emitted as-is
+    "datetime": _iso,
+    "date": _iso,
+    "time": _iso,
+    "timedelta": _seconds,
+    "decimal": _decimal,
+    "bytes": _bytes,
+    "uuid": _uuid,
+}
+
+# Whole-column converters for the common case: C-level methods mapped over the column, so
+# no Python frame runs per value. They raise TypeError on a None or a value of another
+# type, and the column then goes through the per-value converter above. ``date`` has none
+# (date.isoformat would silently truncate a datetime), nor ``uuid`` (UUID.__str__ is Python).
+_b64 = partial(binascii.b2a_base64, newline=False)
+
+def _iso_column(col):
+    return list(map(_dt.datetime.isoformat, col))
+
+def _time_column(col):
+    return list(map(_dt.time.isoformat, col))
+
+def _seconds_column(col):
+    return list(map(_dt.timedelta.total_seconds, col))
+
+def _decimal_column(col):
+    return list(map(decimal.Decimal.__format__, col, repeat("f")))
+
+def _bytes_column(col):
+    return list(map(bytes.decode, map(_b64, col)))
+
+_COLUMN_CONVERTERS: Dict[str, Callable[[Sequence[Any]], List[Any]]] = {
+    "datetime": _iso_column,
+    "time": _time_column,
+    "timedelta": _seconds_column,
+    "decimal": _decimal_column,
+    "bytes": _bytes_column,
+}
+
+# orjson encodes these itself with the same ISO 8601 / string output
+_ORJSON_NATIVE = {"datetime", "date", "time", "uuid"}
+
+def to_jsonable(value: Any) -> Any:
+    """Canonical JSON form of a value the encoder does not handle (``default=`` hook)."""
+    for t in type(value).__mro__:
+        conv = _CONVERTERS.get(t)
+        if conv is not None:
+            return conv(value)
+    return str(value)
+
+def _kind_of(value: Any) -> str:
+    """Column kind for a sample value."""
+    for t in type(value).__mro__:
+        kind = _KINDS.get(t)
+        if kind is not None:
+            return kind
+    return "native"
+
+# ---------- Backends ----------
+
+def _finite(obj: Any) -> Any:
+    """Copy of ``obj`` with NaN and infinities replaced by None."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+# One reusable encoder: json.dumps with custom options builds a new one on every call, and
+# JSONEncoder.encode still builds a new C encoder per call, so the C encoder is kept directly
+# (without circular-reference checks: rows are plain trees). NaN and infinities are not JSON:
+# they raise, and the object is encoded again with them as null, as orjson writes them.
+if c_make_encoder is not None:
+    _c_encode = c_make_encoder(None, to_jsonable, encode_basestring, None, ":", ",", False, False, False)
+
+    def _std_encode(obj: Any) -> str:
+        return "".join(_c_encode(obj, 0))
+else:  # pragma: no cover - interpreters without the _json accelerator
+    _std_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=to_jsonable,
+                                   allow_nan=False).encode
+
+def _std_dumps(obj: Any) -> bytes:
+    try:
+        return _std_encode(obj).encode("utf-8")
+    except ValueError:
+        return _std_encode(_finite(obj)).encode("utf-8")
+
+def _orjson_dumps(obj: Any) -> bytes:
+    try:
+        return orjson.dumps(obj, default=to_jsonable, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # e.g. integers beyond 64 bits, which orjson rejects
+        return _std_dumps(obj)
+
+_BACKENDS: Dict[str, Callable[[Any], bytes]] = {"json": _std_dumps}
+if HAS_ORJSON:
+    _BACKENDS["orjson"] = _orjson_dumps
+_backend = "orjson" if HAS_ORJSON else "json"
+
+def register_backend(name: str, dumps: Callable[[Any], bytes]) -> None:
+    """Add a JSON backend: ``dumps(obj) -> bytes`` accepting JSON-native values."""
+    _BACKENDS[name] = dumps
+
+def use_backend(name: str) -> None:
+    """Select the JSON backend used by dumps() and the row encoders."""
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown JSON backend: {name} (available: {', '.join(_BACKENDS)})")
+    global _backend
+    _backend = name
+
+def backend() -> str:
+    """Name of the active JSON backend."""
+    return _backend
+
+def dumps(obj: Any) -> bytes:
+    """Serialize with the active backend."""
+    return _BACKENDS[_backend](obj)
+
+# ---------- Row encoding ----------
+
+class RowEncoder:
+    """Turns row tuples into dicts the active backend can encode, with one precomputed converter per column.
+
+    ``kinds`` comes from the adapter's type mapping; unknown (None) columns are
+    resolved from the first non-null value and may be refined on later batches.
+    """
+
+    __slots__ = ("columns", "kinds", "_plan", "_pending")
+
+    def __init__(self, columns: Sequence[str], kinds: Optional[Sequence[Optional[str]]] = None):
+        self.columns = list(columns)
+        self.kinds = list(kinds) if kinds else [None] * len(self.columns)
+        self._plan: Optional[List[tuple]] = None
+        self._pending = any(k is None for k in self.kinds)
+
+    def _resolve(self, rows: Sequence[Sequence[Any]]) -> None:
+        for i, kind in enumerate(self.kinds):
+            if kind is None:
+                sample = next((r[i] for r in rows if r[i] is not None), None)
+                if sample is not None:
+                    self.kinds[i] = _kind_of(sample)
+        self._pending = any(k is None for k in self.kinds)
+        skip = _ORJSON_NATIVE if _backend == "orjson" else ()
+        self._plan = [(i, KIND_CONVERTERS[k], _COLUMN_CONVERTERS.get(k)) for i, k in enumerate(self.kinds)
+                      if k is not None and KIND_CONVERTERS.get(k) is not None and k not in skip]
+
+    def rows(self, rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+        """Convert a batch of row tuples to dicts of JSON-native values."""
+        if self._plan is None or self._pending:
+            self._resolve(rows)
+        cols = self.columns
+        if not self._plan:
+            return [dict(zip(cols, r)) for r in rows]
+        # Convert column by column, then zip the columns back into rows.
+        values = list(zip(*rows))
+        for i, conv, column in self._plan:
+            if column is not None:
+                try:
+                    values[i] = column(values[i])
+                    continue
+                except TypeError:  # nulls, or values of another type
+                    pass
+            values[i] = [None if v is None else conv(v) for v in values[i]]
+        return [dict(zip(cols, r)) for r in zip(*values)]
+
+def iter_json_chunks(batches: Iterable[List[Dict[str, Any]]], fmt: str = "ndjson",
+                     counter: Optional[List[int]] = None) -> Iterator[bytes]:
+    """Encode row batches incrementally: one bytes chunk per batch (``ndjson`` or a ``json`` array).
+
+    When given, ``counter[0]`` is incremented with the rows encoded.
+    """
+    be = _BACKENDS[_backend]
+    first = True
+    if fmt == "json":
+        yield b"["
+    for batch in batches:
+        if not batch:
+            continue
+        lines = list(map(be, batch))
+        if counter is not None:
+            counter[0] += len(lines)
+        if fmt == "json":
+            yield (b"\n" if first else b",\n") + b",\n".join(lines)
+        else:
+            yield b"\n".join(lines) + b"\n"
+        first = False
+    if fmt == "json":
+        yield b"]\n" if first else b"\n]\n"
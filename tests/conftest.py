@@ -0,0 +1,6 @@
+"""Shared test setup: make the repository root importable (``src`` is not installed)."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
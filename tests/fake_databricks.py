@@ -0,0 +1,94 @@
+"""In-memory stand-in for ``databricks.sql``, for offline DatabricksAdapter tests.
+
+Only what the adapter uses is provided: ``connect`` and a cursor with ``execute``,
+``description``, ``fetchall_arrow``, ``fetchmany_arrow``, ``cancel`` and ``close``.
+Statements are answered from canned Arrow tables (the first registered pattern found
+in the SQL wins); anything else gets no result set, like DDL. Every statement is
+recorded in ``executed`` with its parameters.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import pyarrow as pa
+
+def _type_name(t: pa.DataType) -> str:
+    """Databricks type name the connector reports in ``description`` for an Arrow type."""
+    if pa.types.is_decimal(t):
+        return "decimal"
+    if pa.types.is_timestamp(t):
+        return "timestamp"
+    if pa.types.is_date(t):
+        return "date"
+    if pa.types.is_binary(t):
+        return "binary"
+    if pa.types.is_list(t):
+        return "array"
+    if pa.types.is_struct(t):
+        return "struct"
+    if pa.types.is_map(t):
+        return "map"
+    return {pa.int32(): "int", pa.int64(): "bigint", pa.float64(): "double",
+            pa.bool_(): "boolean"}.get(t, "string")
+
+class Cursor:
+    def __init__(self, server: "FakeDatabricks"):
+        self._server = server
+        self._table: Optional[pa.Table] = None
+        self._pos = 0
+        self.description = None
+        self.cancelled = False
+        self.closed = False
+
+    def execute(self, operation: str, parameters: Optional[Dict[str, Any]] = None):
+        self._server.executed.append((operation, parameters))
+        self._table, self._pos = self._server.answer(operation), 0
+        self.description = None if self._table is None else [
+            (f.name, _type_name(f.type), None, None, None, None, None) for f in self._table.schema]
+
+    def fetchall_arrow(self) -> pa.Table:
+        table = self._table.slice(self._pos)
+        self._pos = self._table.num_rows
+        return table
+
+    def fetchmany_arrow(self, size: int) -> pa.Table:
+        table = self._table.slice(self._pos, size)
+        self._pos += table.num_rows
+        return table
+
+    def cancel(self):
+        self.cancelled = True
+
+    def close(self):
+        self.closed = True
+
+class Connection:
+    def __init__(self, server: "FakeDatabricks"):
+        self._server = server
+        self.open = True
+
+    def cursor(self) -> Cursor:
+        cur = Cursor(self._server)
+        self._server.cursors.append(cur)
+        return cur
+
+    def close(self):
+        self.open = False
+
+class FakeDatabricks:
+    """Pass as ``connector=`` to DatabricksAdapter; ``respond`` registers canned results."""
+
+    def __init__(self):
+        self.results: List[Tuple[str, pa.Table]] = []
+        self.executed: List[Tuple[str, Optional[Dict[str, Any]]]] = []
+        self.cursors: List[Cursor] = []
+        self.connections: List[Dict[str, Any]] = []
+
+    def respond(self, pattern: str, table: pa.Table) -> None:
+        self.results.append((pattern, table))
+
+    def answer(self, sql: str) -> Optional[pa.Table]:
+        return next((table for pattern, table in self.results if pattern in sql), None)
+
+    def connect(self, **kwargs) -> Connection:
+        self.connections.append(kwargs)
+        return Connection(self)
@@ -0,0 +1,120 @@
+"""In-memory stand-in for ``pymysql``, for offline MySQLAdapter tests.
+
+Provides what the adapter uses: ``connect``, ``Error`` and ``cursors.SSCursor``.
+Like PyMySQL, parameters are escaped and interpolated into the statement with
+``%`` (so ``%%`` becomes ``%``). Statements are answered from canned results (the
+first registered pattern found in the SQL wins) and recorded in ``executed`` as
+(connection id, cursor class name, SQL). A statement containing ``SLEEP(`` blocks
+until a ``KILL QUERY`` for its connection arrives from another connection.
+"""
+
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+class Error(Exception):
+    pass
+
+class SSCursor:
+    """Marker class: the adapter passes it to ``cursor()`` for unbuffered reads."""
+
+def _escape(value: Any) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+class Cursor:
+    def __init__(self, conn: "Connection", kind: Optional[type]):
+        self._conn = conn
+        self.kind = kind.__name__ if kind else "Cursor"
+        self.description = None
+        self._rows: List[tuple] = []
+
+    def execute(self, query: str, args: Optional[Dict[str, Any]] = None) -> int:
+        if args is not None:
+            query = query % {k: _escape(v) for k, v in args.items()}
+        server = self._conn.server
+        server.executed.append((self._conn.id, self.kind, query))
+        if query.startswith("KILL QUERY "):
+            server.kill(int(query.split()[-1]))
+            return 0
+        if "SLEEP(" in query:
+            killed = server.killed.setdefault(self._conn.id, threading.Event())
+            self._conn.sleeping.set()
+            if killed.wait(10):
+                raise Error(1317, "Query execution was interrupted")
+        columns, rows = server.answer(query)
+        self.description = None if columns is None else [(c, code, None, None, None, None, None)
+                                                          for c, code in columns]
+        self._rows = list(rows)
+        return len(self._rows)
+
+    def fetchall(self) -> List[tuple]:
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size: int = 1) -> List[tuple]:
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+class Connection:
+    def __init__(self, server: "FakeMySQL", id: int, kwargs: Dict[str, Any]):
+        self.server = server
+        self.id = id
+        self.kwargs = kwargs
+        self.sleeping = threading.Event()
+        self.closed = False
+
+    def cursor(self, kind: Optional[type] = None) -> Cursor:
+        return Cursor(self, kind)
+
+    def thread_id(self) -> int:
+        return self.id
+
+    def ping(self, reconnect: bool = True):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+class FakeMySQL:
+    """Pass as ``driver=`` to MySQLAdapter; ``respond`` registers canned results.
+
+    ``columns`` are (name, MySQL field type code) pairs; None means no result set.
+    """
+
+    Error = Error
+    cursors = SimpleNamespace(SSCursor=SSCursor)
+
+    def __init__(self):
+        self.results: List[Tuple[str, Optional[Sequence[Tuple[str, int]]], Sequence[tuple]]] = []
+        self.executed: List[Tuple[int, str, str]] = []
+        self.connections: List[Connection] = []
+        self.killed: Dict[int, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def respond(self, pattern: str, columns: Optional[Sequence[Tuple[str, int]]], rows: Sequence[tuple] = ()):
+        self.results.append((pattern, columns, rows))
+
+    def answer(self, sql: str):
+        return next(((columns, rows) for pattern, columns, rows in self.results if pattern in sql), (None, ()))
+
+    def kill(self, connection_id: int) -> None:
+        self.killed.setdefault(connection_id, threading.Event()).set()
+
+    def connect(self, **kwargs) -> Connection:
+        with self._lock:
+            conn = Connection(self, len(self.connections) + 1, kwargs)
+            self.connections.append(conn)
+        return conn
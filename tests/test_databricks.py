@@ -0,0 +1,96 @@
+"""DatabricksAdapter against the in-memory connector stub."""
+
+import datetime
+import decimal
+
+import pyarrow as pa
+import pytest
+
+from fake_databricks import FakeDatabricks
+from src.adapters.databricks import DatabricksAdapter
+from src.models.schemas import Conn, MetadataArgs
+from src.utils.serialize import dumps
+
+ORDERS = pa.table({
+    "amount": pa.array([decimal.Decimal("1.50"), decimal.Decimal("2.25"), None, decimal.Decimal("4.00"),
+                        decimal.Decimal("5.75")], pa.decimal128(10, 2)),
+    "created": pa.array([datetime.datetime(2024, 1, d) for d in range(1, 6)], pa.timestamp("us")),
+    "name": ["a", "b", "c", "d", "e"],
+})
+
+@pytest.fixture
+def server():
+    return FakeDatabricks()
+
+@pytest.fixture
+def adapter(server):
+    adp = DatabricksAdapter(Conn(type="databricks", databricks_server_hostname="host", databricks_http_path="/sql",
+                                 databricks_token="token", database="main"), connector=server)
+    yield adp
+    adp.close()
+
+def test_list_schema_reads_the_given_catalog(server, adapter):
+    server.respond("information_schema.columns", pa.table({
+        "table_schema": ["sales", "sales"], "table_name": ["orders", "orders"], "column_name": ["id", "note"],
+        "data_type": ["INT", "STRING"], "is_nullable": ["NO", "YES"], "comment": [None, "free text"]}))
+    rows = adapter.list_schema(database="main", schema="sales")
+    assert rows[1] == {"table_schema": "sales", "table_name": "orders", "column_name": "note",
+                       "data_type": "STRING", "is_nullable": "YES", "comment": "free text"}
+    sql, params = server.executed[0]
+    assert "FROM `main`.information_schema.columns" in sql
+    assert list(params.values()) == ["sales"]
+    assert server.connections[0]["catalog"] == "main"
+
+def test_ontology_builds_edges(server, adapter):
+    server.respond("referential_constraints", pa.table({
+        "table_schema": ["sales"], "table_name": ["items"], "column_name": ["order_id"],
+        "fk_table_schema": ["sales"], "fk_table_name": ["orders"], "fk_column_name": ["id"]}))
+    assert adapter.ontology(schema="sales") == {"edges": [{"from": "sales.items.order_id", "to": "sales.orders.id"}]}
+    assert "FROM information_schema.referential_constraints" in server.executed[0][0]
+
+def test_run_query_returns_python_values(server, adapter):
+    server.respond("SELECT", ORDERS)
+    rows = adapter.run_query("SELECT * FROM orders")
+    assert len(rows) == 5
+    assert rows[0] == {"amount": decimal.Decimal("1.50"), "created": datetime.datetime(2024, 1, 1), "name": "a"}
+    assert rows[2]["amount"] is None
+    assert adapter.run_query("CREATE TABLE t (a INT)") == []
+
+def test_stream_query_batches(server, adapter):
+    server.respond("SELECT", ORDERS)
+    batches = list(adapter.stream_query("SELECT * FROM orders", batch_size=2))
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert batches[2][0]["name"] == "e"
+    ready = list(adapter.stream_query("SELECT * FROM orders", batch_size=2, json_ready=True))
+    assert dumps(ready[0][0]) == b'{"amount":"1.50","created":"2024-01-01T00:00:00","name":"a"}'
+    assert all(cur.closed for cur in server.cursors)
+
+def test_arrow_batches_pass_through(server, adapter):
+    server.respond("SELECT", ORDERS)
+    batches = list(adapter.arrow_batches("SELECT * FROM orders", batch_size=2))
+    assert [b.num_rows for b in batches] == [2, 2, 1]
+    assert all(b.schema == ORDERS.schema for b in batches)
+
+def test_arrow_batches_empty_result_keeps_the_schema(server, adapter):
+    server.respond("SELECT", ORDERS.slice(0, 0))
+    batches = list(adapter.arrow_batches("SELECT * FROM orders WHERE false"))
+    assert len(batches) == 1
+    assert batches[0].num_rows == 0
+    assert batches[0].schema == ORDERS.schema
+    assert adapter.run_query_arrow("SELECT * FROM orders WHERE false").schema == ORDERS.schema
+
+def test_update_metadata_quotes_identifiers_and_binds_the_comment(server, adapter):
+    adapter.update_metadata(MetadataArgs(conn={"type": "databricks"}, level="column", database="main",
+                                         schema="sales", table="odd`name", column="note", comment="it's new"))
+    adapter.update_metadata(MetadataArgs(conn={"type": "databricks"}, level="table", database="main",
+                                         schema="sales", table="orders", comment="orders"))
+    (column_sql, column_params), (table_sql, table_params) = server.executed
+    assert column_sql.startswith("ALTER TABLE `main`.`sales`.`odd``name` ALTER COLUMN `note` COMMENT ")
+    assert "it's new" not in column_sql and list(column_params.values()) == ["it's new"]
+    assert table_sql.startswith("COMMENT ON TABLE `main`.`sales`.`orders` IS ")
+    assert list(table_params.values()) == ["orders"]
+
+def test_update_metadata_requires_a_column(adapter):
+    with pytest.raises(ValueError):
+        adapter.update_metadata(MetadataArgs(conn={"type": "databricks"}, level="column", schema="sales",
+                                             table="orders", comment="x"))
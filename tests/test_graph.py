@@ -0,0 +1,94 @@
+"""OntologyGraph: CSR adjacency, components (union-find) and bidirectional join paths."""
+
+import random
+from collections import deque
+
+import pytest
+
+from src.ontology.graph import OntologyGraph
+
+def fk(src, dst, col="id"):
+    return {"from": f"s.{src}.{dst}_id", "to": f"s.{dst}.{col}"}
+
+# orders -> customers -> regions, order_items -> orders, order_items -> products; audit <-> users apart
+EDGES = [fk("orders", "customers"), fk("customers", "regions"), fk("order_items", "orders"),
+         fk("order_items", "products"), fk("audit", "users")]
+
+@pytest.fixture
+def graph():
+    return OntologyGraph.from_edges({"edges": EDGES})
+
+def test_round_trips_the_edge_list(graph):
+    assert graph.to_edges() == {"edges": EDGES}
+    rows = [("s", "orders", "customers_id", "s", "customers", "id")]
+    assert OntologyGraph.from_fk_rows(rows).to_edges() == {"edges": [fk("orders", "customers")]}
+
+def test_csr_neighbors(graph):
+    assert graph.neighbors("s.orders", "out") == [fk("orders", "customers")]
+    assert graph.neighbors("s.orders", "in") == [fk("order_items", "orders")]
+    assert graph.neighbors("s.orders") == [fk("orders", "customers"), fk("order_items", "orders")]
+    assert graph.neighbors("s.regions", "out") == []
+    with pytest.raises(KeyError, match="s.nope"):
+        graph.neighbors("s.nope")
+
+def test_reachable(graph):
+    assert graph.reachable("s.orders") == {"s.customers": 1, "s.order_items": 1}
+    assert graph.reachable("s.orders", hops=2) == {"s.customers": 1, "s.order_items": 1,
+                                                   "s.regions": 2, "s.products": 2}
+    assert graph.reachable("s.orders", hops=3, direction="out") == {"s.customers": 1, "s.regions": 2}
+
+def test_components(graph):
+    assert [sorted(c) for c in graph.connected_components()] == [
+        ["s.customers", "s.order_items", "s.orders", "s.products", "s.regions"], ["s.audit", "s.users"]]
+    assert OntologyGraph().connected_components() == []
+
+def test_shortest_path_keeps_edge_orientation(graph):
+    assert graph.shortest_join_path("s.products", "s.regions") == [
+        fk("order_items", "products"), fk("order_items", "orders"),
+        fk("orders", "customers"), fk("customers", "regions")]
+    assert graph.shortest_join_path("s.orders", "s.customers") == [fk("orders", "customers")]
+
+def test_self_path_is_empty(graph):
+    assert graph.shortest_join_path("s.orders", "s.orders") == []
+
+def test_other_component_is_unreachable(graph):
+    assert graph.shortest_join_path("s.orders", "s.users") is None
+    with pytest.raises(KeyError):
+        graph.shortest_join_path("s.orders", "s.nope")
+
+def _bfs_distance(edges, s, t):
+    adj = {}
+    for a, b in edges:
+        adj.setdefault(a, set()).add(b)
+        adj.setdefault(b, set()).add(a)
+    dist, queue = {s: 0}, deque([s])
+    while queue:
+        n = queue.popleft()
+        for m in adj.get(n, ()):
+            if m not in dist:
+                dist[m] = dist[n] + 1
+                queue.append(m)
+    return dist.get(t)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_shortest_paths_match_plain_bfs(seed):
+    rnd = random.Random(seed)
+    pairs = [(rnd.randrange(60), rnd.randrange(60)) for _ in range(70)]  # several components
+    pairs = [(a, b) for a, b in pairs if a != b]
+    graph = OntologyGraph((f"s.t{a}", "fk", f"s.t{b}", "id") for a, b in pairs)
+    tables = graph.tables
+    for _ in range(100):
+        source, target = rnd.choice(tables), rnd.choice(tables)
+        path = graph.shortest_join_path(source, target)
+        expected = _bfs_distance([(f"s.t{a}", f"s.t{b}") for a, b in pairs], source, target)
+        if expected is None:
+            assert path is None
+            continue
+        assert len(path) == expected
+        # Consecutive edges share a table, leading from source to target
+        at = source
+        for e in path:
+            ends = (e["from"].rsplit(".", 1)[0], e["to"].rsplit(".", 1)[0])
+            assert at in ends
+            at = ends[1] if ends[0] == at else ends[0]
+        assert at == target
@@ -0,0 +1,66 @@
+"""Submitted-query cancellation on SQLiteAdapter, with simulated round-trip latency."""
+
+import time
+
+import pytest
+
+from src.adapters.sqlite import SQLiteAdapter
+from src.models.schemas import Conn
+
+# Enough rows for many fetch batches, each of which waits ``latency``
+COUNT = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 5000) SELECT i FROM n"
+# Runs for a long time inside a single execute, so cancelling must interrupt it
+SPIN = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT count(*) FROM n"
+
+@pytest.fixture
+def adapter(tmp_path):
+    adp = SQLiteAdapter(Conn(type="sqlite", path=str(tmp_path / "jobs.db")), latency=0.002)
+    yield adp
+    adp.close()
+
+def _wait(adp, handle):
+    assert adp.jobs.get(handle).done.wait(10)
+    return adp.query_status(handle)
+
+def test_cancel_between_batches(adapter):
+    handle = adapter.submit_query(COUNT, batch_size=10)
+    assert adapter.cancel_query(handle) is True
+    assert _wait(adapter, handle)["state"] == "cancelled"
+    with pytest.raises(ValueError, match="cancelled"):
+        adapter.fetch_query(handle)
+
+@pytest.mark.parametrize("delay", [0, 0.1])  # before and after the statement starts
+def test_cancel_interrupts_a_running_statement(adapter, delay):
+    handle = adapter.submit_query(SPIN)
+    time.sleep(delay)
+    assert adapter.query_status(handle)["state"] == "running"
+    assert adapter.cancel_query(handle) is True
+    status = _wait(adapter, handle)
+    assert status["state"] == "cancelled" and status["error"]
+
+def test_cancel_after_finish(adapter):
+    handle = adapter.submit_query("SELECT 1 AS one")
+    assert _wait(adapter, handle)["state"] == "succeeded"
+    assert adapter.cancel_query(handle) is False
+    status = adapter.query_status(handle)
+    assert (status["state"], status["rows"]) == ("succeeded", 1) and "error" not in status
+    assert adapter.fetch_query(handle) == [{"one": 1}]
+    with pytest.raises(ValueError, match="Unknown query handle"):
+        adapter.fetch_query(handle)
+
+def test_fetch_while_running(adapter):
+    handle = adapter.submit_query(SPIN)
+    with pytest.raises(ValueError, match="still running"):
+        adapter.fetch_query(handle)
+    adapter.cancel_query(handle)
+    _wait(adapter, handle)
+
+def test_cancel_racing_the_end_of_the_statement(adapter):
+    # Whichever wins, an accepted cancel means no result, and the pooled connection
+    # is never interrupted after it is returned.
+    for _ in range(30):
+        handle = adapter.submit_query("SELECT 1 AS one")
+        cancelled = adapter.cancel_query(handle)
+        state = _wait(adapter, handle)["state"]
+        assert state == ("cancelled" if cancelled else "succeeded")
+        assert adapter.run_query("SELECT 2 AS two") == [{"two": 2}]
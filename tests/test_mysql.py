@@ -0,0 +1,88 @@
+"""MySQLAdapter against the in-memory PyMySQL stand-in."""
+
+import datetime
+import decimal
+
+import pytest
+
+from fake_pymysql import FakeMySQL
+from src.adapters.mysql import MySQLAdapter
+from src.models.schemas import Conn, MetadataArgs
+from src.utils.serialize import dumps
+
+DDL = ("CREATE TABLE `orders` (\n"
+       "  `id` int NOT NULL AUTO_INCREMENT,\n"
+       "  `Note` varchar(20) DEFAULT 'a%b' COMMENT 'old, it''s',\n"
+       "  `total` decimal(10,2) NOT NULL DEFAULT '0.00',\n"
+       "  PRIMARY KEY (`id`)\n"
+       ") ENGINE=InnoDB COMMENT='orders'")
+
+@pytest.fixture
+def server():
+    return FakeMySQL()
+
+@pytest.fixture
+def adapter(server):
+    adp = MySQLAdapter(Conn(type="mysql", host="db", user="app", database="shop"), driver=server)
+    yield adp
+    adp.close()
+
+def _statements(server, kind=None):
+    return [sql for _, k, sql in server.executed if kind is None or k == kind]
+
+def test_result_reads_use_unbuffered_cursors(server, adapter):
+    server.respond("SELECT", [("amount", 246), ("at", 12), ("name", 253)],
+                   [(decimal.Decimal("1.50"), datetime.datetime(2024, 1, 2), "x")] * 5)
+    assert adapter.run_query("SELECT * FROM orders")[0] == {
+        "amount": decimal.Decimal("1.50"), "at": datetime.datetime(2024, 1, 2), "name": "x"}
+    assert [len(b) for b in adapter.stream_query("SELECT * FROM orders", batch_size=2)] == [2, 2, 1]
+    rows = adapter.run_query_json("SELECT * FROM orders", batch_size=2)
+    assert dumps(rows[0]) == b'{"amount":"1.50","at":"2024-01-02T00:00:00","name":"x"}'
+    assert [kind for _, kind, _ in server.executed] == ["SSCursor"] * 3
+
+def test_catalog_reads_bind_the_schema(server, adapter):
+    server.respond("information_schema.columns", [(c, 253) for c in ("table_schema", "table_name", "column_name",
+                                                                     "data_type", "is_nullable", "comment")],
+                   [("shop", "orders", "id", "int", "NO", "")])
+    assert adapter.list_schema(schema="shop")[0]["column_name"] == "id"
+    assert "AND table_schema = 'shop'" in _statements(server)[0]
+
+@pytest.mark.parametrize("column", ["Note", "note", "NOTE"])
+def test_update_column_comment_keeps_the_definition(server, adapter, column):
+    server.respond("SHOW CREATE TABLE", [("Table", 253), ("Create Table", 253)], [("orders", DDL)])
+    adapter.update_metadata(MetadataArgs(conn={"type": "mysql"}, level="column", schema="shop", table="orders",
+                                         column=column, comment="new 'c'"))
+    show, alter = _statements(server)
+    assert show == "SHOW CREATE TABLE `shop`.`orders`"
+    # type, default (with its literal %) restated; the old comment replaced, not duplicated
+    assert alter == ("ALTER TABLE `shop`.`orders` MODIFY COLUMN `Note` varchar(20) DEFAULT 'a%b' "
+                     "COMMENT 'new \\'c\\''")
+
+def test_update_column_comment_keeps_a_not_null_default(server, adapter):
+    server.respond("SHOW CREATE TABLE", [("Table", 253), ("Create Table", 253)], [("orders", DDL)])
+    adapter.update_metadata(MetadataArgs(conn={"type": "mysql"}, level="column", schema="shop", table="orders",
+                                         column="total", comment="sum"))
+    assert _statements(server)[-1] == ("ALTER TABLE `shop`.`orders` MODIFY COLUMN `total` decimal(10,2) "
+                                       "NOT NULL DEFAULT '0.00' COMMENT 'sum'")
+
+def test_update_column_comment_unknown_column(server, adapter):
+    server.respond("SHOW CREATE TABLE", [("Table", 253), ("Create Table", 253)], [("orders", DDL)])
+    with pytest.raises(ValueError, match="Column not found"):
+        adapter.update_metadata(MetadataArgs(conn={"type": "mysql"}, level="column", schema="shop",
+                                             table="orders", column="missing", comment="x"))
+
+def test_cancel_sends_kill_query_from_another_connection(server, adapter):
+    handle = adapter.submit_query("SELECT SLEEP(60)")
+    job_conn = server.connections[0]
+    assert handle.startswith(f"{job_conn.id}-")
+    assert job_conn.sleeping.wait(5)
+    assert adapter.cancel_query(handle) is True
+    job = adapter.jobs.get(handle)
+    assert job.done.wait(5)
+    assert adapter.query_status(handle)["state"] == "cancelled"
+    kills = [(cid, sql) for cid, _, sql in server.executed if sql.startswith("KILL QUERY")]
+    assert len(kills) == 1
+    killer_id, kill_sql = kills[0]
+    assert kill_sql == f"KILL QUERY {job_conn.id}"
+    assert killer_id != job_conn.id and server.connections[killer_id - 1].closed
+    assert adapter.cancel_query(handle) is False
@@ -0,0 +1,243 @@
+"""ConnectionPool and the fingerprint-keyed adapter registry, with fake connections."""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.adapters import factory
+from src.adapters import pool as pool_module
+from src.adapters.base import ThreadedAsyncAdapter
+from src.adapters.pool import ConnectionPool, PoolConfig
+from src.models.schemas import Conn
+from src.utils import conn_fingerprint
+
+class FakeConnection:
+    def __init__(self, n: int, fail_rollback: bool = False):
+        self.n = n
+        self.fail_rollback = fail_rollback
+        self.alive = True
+        self.commits = self.rollbacks = 0
+        self.closed = False
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+        if self.fail_rollback:
+            raise OSError("connection lost")
+
+    def close(self):
+        self.closed = True
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(pool_module.time, "monotonic", clock)
+    return clock
+
+def make_pool(**config):
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection(len(opened)))
+        return opened[-1]
+
+    pool = ConnectionPool(connect, lambda c: c.alive, PoolConfig(**config))
+    return pool, opened
+
+def test_checkout_reuses_returned_connections(clock):
+    pool, opened = make_pool(max_size=2)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert pool.size == 2 and len(opened) == 2
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.release(first)
+    pool.release(second)
+    assert pool.size == 2 and len(opened) == 2
+
+def test_full_pool_times_out():
+    pool, _ = make_pool(max_size=1, acquire_timeout=0.01)
+    pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+
+def test_grow_wakes_waiting_callers():
+    pool, opened = make_pool(max_size=1, acquire_timeout=5)
+    pool.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+    waiter.join(0.05)
+    assert waiter.is_alive() and not got
+    pool.grow(2)
+    waiter.join(1)
+    assert got and pool.size == 2 and len(opened) == 2
+    pool.grow(1)  # never shrinks
+    assert pool.config.max_size == 2
+
+def test_health_check_runs_after_check_interval(clock):
+    pool, opened = make_pool(check_interval=30)
+    pc = pool.acquire()
+    pool.release(pc)
+    pc.raw.alive = False
+    clock.now += 10
+    assert pool.acquire() is pc  # checked recently: not probed again
+    pool.release(pc)
+    clock.now += 30
+    fresh = pool.acquire()
+    assert fresh is not pc and pc.raw.closed and len(opened) == 2
+
+def test_max_lifetime_closes_on_release_and_checkout(clock):
+    pool, opened = make_pool(max_lifetime=60, idle_timeout=1000)
+    pc = pool.acquire()
+    clock.now += 61
+    pool.release(pc)
+    assert pc.raw.closed and pool.size == 0
+
+    pc = pool.acquire()
+    pool.release(pc)
+    clock.now += 61
+    assert pool.acquire() is not pc and pc.raw.closed
+
+def test_evict_idle_closes_only_expired(clock):
+    pool, opened = make_pool(idle_timeout=100)
+    old, recent = pool.acquire(), pool.acquire()
+    pool.release(old)
+    clock.now += 90
+    pool.release(recent)
+    clock.now += 20
+    assert pool.evict_idle() == 1
+    assert old.raw.closed and not recent.raw.closed and pool.size == 1
+
+def test_connection_commits_on_success(clock):
+    pool, opened = make_pool()
+    with pool.connection() as raw:
+        pass
+    assert (raw.commits, raw.rollbacks) == (1, 0)
+    assert pool.acquire().raw is raw
+
+def test_connection_rolls_back_on_error(clock):
+    pool, opened = make_pool()
+    with pytest.raises(ValueError):
+        with pool.connection() as raw:
+            raise ValueError("boom")
+    assert (raw.commits, raw.rollbacks) == (0, 1) and not raw.closed
+    assert pool.acquire().raw is raw
+
+def test_connection_discards_a_broken_connection(clock):
+    pool, opened = make_pool()
+    with pytest.raises(ValueError):
+        with pool.connection() as raw:
+            raw.fail_rollback = True
+            raise ValueError("boom")
+    assert raw.closed and pool.size == 0
+    assert pool.acquire().raw is not raw
+
+def test_failed_connect_frees_the_slot(clock):
+    calls = []
+
+    def connect():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError("refused")
+        return FakeConnection(len(calls))
+
+    pool = ConnectionPool(connect, config=PoolConfig(max_size=1, acquire_timeout=0.01))
+    with pytest.raises(OSError):
+        pool.acquire()
+    assert pool.size == 0
+    assert pool.acquire().raw.n == 2
+
+def test_close_refuses_checkouts_and_closes_busy_connections_on_release(clock):
+    pool, opened = make_pool()
+    idle, busy = pool.acquire(), pool.acquire()
+    pool.release(idle)
+    pool.close()
+    assert idle.raw.closed and not busy.raw.closed
+    pool.release(busy)
+    assert busy.raw.closed
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+# ----- conn_fingerprint registry -----
+
+class FakeAdapter:
+    _pool = None
+
+    def __init__(self, conn: Conn):
+        self.conn = conn
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setitem(factory._factories, "sqlite", (FakeAdapter, None))
+    monkeypatch.setattr(factory, "_adapters", {})
+    monkeypatch.setattr(factory, "load_env", lambda: None)
+    return factory
+
+def test_fingerprint_covers_every_setting():
+    a = Conn(type="postgres", host="db", user="app", password="x")
+    assert conn_fingerprint(a) == conn_fingerprint(Conn(type="postgres", user="app", password="x", host="db"))
+    assert conn_fingerprint(a) != conn_fingerprint(a.model_copy(update={"password": "y"}))
+    assert conn_fingerprint(a) != conn_fingerprint(a.model_copy(update={"type": "mysql"}))
+
+def test_registry_shares_adapters_by_fingerprint(registry):
+    conn = Conn(type="sqlite", path="a.db")
+    adp = registry.get_adapter(conn, PoolConfig(max_size=2))
+    assert isinstance(adp, FakeAdapter) and adp.pool_config.max_size == 2
+    assert registry.get_adapter(Conn(type="sqlite", path="a.db")) is adp
+    assert registry.get_adapter(Conn(type="sqlite", path="b.db")) is not adp
+
+def test_registry_builds_one_adapter_under_concurrency(registry, monkeypatch):
+    built = []
+    monkeypatch.setitem(registry._factories, "sqlite", (lambda c: built.append(FakeAdapter(c)) or built[-1], None))
+    conn = Conn(type="sqlite", path="a.db")
+    start = threading.Barrier(8)
+
+    def worker():
+        start.wait()
+        registry.get_adapter(conn)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(built) == 1
+
+def test_close_adapters_closes_and_forgets(registry):
+    adp = registry.get_adapter(Conn(type="sqlite", path="a.db"))
+    registry.close_adapters()
+    assert adp.closed
+    assert registry.get_adapter(Conn(type="sqlite", path="a.db")) is not adp
+
+def test_async_registry_is_per_event_loop(registry):
+    conn = Conn(type="sqlite", path="a.db")
+
+    async def get():
+        first = registry.get_async_adapter(conn)
+        assert registry.get_async_adapter(conn) is first
+        await registry.aclose_adapters()
+        return first
+
+    one, two = asyncio.run(get()), asyncio.run(get())
+    assert isinstance(one, ThreadedAsyncAdapter) and one is not two
+    assert one.sync is two.sync is registry.get_adapter(conn)
+
+def test_unknown_type_is_rejected(registry, monkeypatch):
+    monkeypatch.delitem(registry._factories, "sqlite")
+    with pytest.raises(ValueError, match="not supported"):
+        registry.get_adapter(Conn(type="sqlite", path="a.db"))
@@ -0,0 +1,74 @@
+"""CompiledQuery rendering: bind parameters vs inlined literals, escaping and defaults."""
+
+import pytest
+
+from src.queries import QueryManager, query_manager
+
+@pytest.fixture
+def manager():
+    return QueryManager()
+
+def render(manager, template, style="pyformat", backslashes=False, **params):
+    return manager.compile_text(template).render(manager, params, style, backslashes)
+
+def inline(manager, template, backslashes=False, **params):
+    return manager.compile_text(template).inline(manager, params, backslashes)
+
+def test_whole_literals_are_bound(manager):
+    q = render(manager, "SELECT * FROM t WHERE a = '{a}' AND b = '{b}'", a="x'y", b=2)
+    assert q.sql == "SELECT * FROM t WHERE a = %(a)s AND b = %(b)s"
+    assert q.params == {"a": "x'y", "b": 2}
+    q = render(manager, "SELECT * FROM t WHERE a = '{a}'", style="named", a="x")
+    assert (q.sql, q.params) == ("SELECT * FROM t WHERE a = :a", {"a": "x"})
+
+def test_inline_escapes_literals(manager):
+    assert inline(manager, "SELECT * FROM t WHERE a = '{a}'", a="x'y") == "SELECT * FROM t WHERE a = 'x''y'"
+    assert inline(manager, "SELECT '{a}'", backslashes=True, a="a\\'") == "SELECT 'a\\\\'''"
+
+def test_placeholders_inside_longer_literals_are_inlined(manager):
+    q = render(manager, "SELECT * FROM t WHERE name LIKE '{prefix}%' AND id = '{id}'", prefix="o'k", id=1)
+    assert q.sql == "SELECT * FROM t WHERE name LIKE 'o''k%%' AND id = %(id)s"
+    assert q.params == {"id": 1}
+
+def test_percent_is_escaped_only_with_pyformat_binds(manager):
+    template = "SELECT * FROM t WHERE a LIKE 'x%' AND b = '{b}'"
+    assert render(manager, template, b=1).sql == "SELECT * FROM t WHERE a LIKE 'x%%' AND b = %(b)s"
+    assert render(manager, template, style="named", b=1).sql == "SELECT * FROM t WHERE a LIKE 'x%' AND b = :b"
+    # Without bind parameters the driver does no % substitution, so the text is left alone
+    assert render(manager, "SELECT * FROM t WHERE a LIKE 'x%'").sql == "SELECT * FROM t WHERE a LIKE 'x%'"
+    q = render(manager, "SELECT {cols} FROM t WHERE b = '{b}'", cols="a % 2 AS odd", b=1)
+    assert q.sql == "SELECT a %% 2 AS odd FROM t WHERE b = %(b)s"
+
+def test_defaults(manager):
+    q = render(manager, "SELECT * FROM t WHERE kind = '{kind:table}' {limit:LIMIT 10}")
+    assert (q.sql, q.params) == ("SELECT * FROM t WHERE kind = %(kind)s LIMIT 10", {"kind": "table"})
+    q = render(manager, "SELECT * FROM t WHERE kind = '{kind:table}'", kind="view")
+    assert q.params == {"kind": "view"}
+
+def test_defaults_inside_nested_fragments(manager):
+    template = "SELECT * FROM t WHERE 1 = 1 {filter}"
+    fragment = "AND kind = '{kind:table}' AND schema = '{schema}'"
+    q = render(manager, template, filter=fragment, schema="s")
+    assert q.sql == "SELECT * FROM t WHERE 1 = 1 AND kind = %(kind)s AND schema = %(schema)s"
+    assert q.params == {"kind": "table", "schema": "s"}
+    assert render(manager, template, filter=fragment, schema="s", kind="view").params["kind"] == "view"
+    assert inline(manager, template, filter=fragment, schema="s") == \
+        "SELECT * FROM t WHERE 1 = 1 AND kind = 'table' AND schema = 's'"
+
+def test_missing_parameter(manager):
+    with pytest.raises(KeyError, match="Missing parameter 'a'"):
+        render(manager, "SELECT '{a}'")
+    with pytest.raises(KeyError, match="Missing parameter 'b'"):
+        render(manager, "SELECT {f}", f="'{b}'")
+
+def test_repeated_renders_reuse_the_text(manager):
+    template = "SELECT * FROM {table} WHERE a = '{a}'"
+    first = render(manager, template, table="t", a=1)
+    second = render(manager, template, table="t", a=2)
+    assert first.sql == second.sql and (first.params, second.params) == ({"a": 1}, {"a": 2})
+    assert render(manager, template, table="u", a=1).sql == "SELECT * FROM u WHERE a = %(a)s"
+
+def test_dialect_paramstyles():
+    q = query_manager.render("sqlite", "graph_versions_at_seq", seq=3)
+    assert ":seq" in q.sql and q.params == {"seq": 3}
+    assert "%(seq)s" in query_manager.render("postgres", "graph_versions_at_seq", seq=3).sql
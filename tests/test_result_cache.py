@@ -0,0 +1,139 @@
+"""ResultCache single-flight, invalidation and spill, plus the cacheability checks."""
+
+import os
+import threading
+import time
+
+import pytest
+
+from src.cache.results import ResultCache, is_cacheable, normalize_sql
+
+def test_concurrent_callers_share_one_computation():
+    cache = ResultCache()
+    calls = []
+    start = threading.Barrier(50)
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "[1]"
+
+    def worker():
+        start.wait()
+        results.append(cache.get_or_compute(("fp", "SELECT 1", None), compute))
+
+    threads = [threading.Thread(target=worker) for _ in range(50)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == ["[1]"] * 50
+    assert cache.get_or_compute(("fp", "SELECT 1", None), compute) == "[1]" and len(calls) == 1
+
+def test_errors_are_shared_but_not_cached():
+    cache = ResultCache()
+    entered, release = threading.Event(), threading.Event()
+    errors = []
+
+    def fail():
+        entered.set()
+        release.wait(1)
+        raise RuntimeError("down")
+
+    def follower():
+        try:
+            cache.get_or_compute("k", lambda: "never")
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=lambda: pytest.raises(RuntimeError, cache.get_or_compute, "k", fail))
+    leader.start()
+    entered.wait(1)
+    other = threading.Thread(target=follower)
+    other.start()
+    time.sleep(0.02)
+    release.set()
+    leader.join()
+    other.join()
+    assert [str(e) for e in errors] == ["down"]
+    assert cache.get_or_compute("k", lambda: "ok") == "ok"
+
+def test_invalidation_during_compute_drops_the_stale_result():
+    cache = ResultCache()
+    key = ("fp", "SELECT * FROM t", None)
+
+    def compute():
+        cache.invalidate("fp")  # a write lands while the read is running
+        return "old"
+
+    assert cache.get_or_compute(key, compute) == "old"
+    assert cache.get(key) is None
+    assert cache.get_or_compute(key, lambda: "new") == "new"
+    assert cache.get(key) == "new"
+
+def test_invalidate_only_drops_that_fingerprint():
+    cache = ResultCache()
+    cache.put(("a", "SELECT 1", None), "1")
+    cache.put(("b", "SELECT 1", None), "1")
+    assert cache.invalidate("a") == 1
+    assert cache.get(("a", "SELECT 1", None)) is None
+    assert cache.get(("b", "SELECT 1", None)) == "1"
+
+def test_ttl_expiry():
+    cache = ResultCache(ttl=60)
+    cache.put("k", "v", ttl=0)
+    time.sleep(0.01)
+    assert cache.get("k") is None and len(cache) == 0
+
+def test_evicted_entries_spill_to_disk_and_come_back(tmp_path):
+    cache = ResultCache(max_bytes=10, max_entry_bytes=10, spill_dir=str(tmp_path))
+    cache.put(("fp", "a", None), "aaaaaa")
+    cache.put(("fp", "b", None), "bbbbbb")  # evicts "a" to disk
+    info = cache.info()
+    assert (info["entries"], info["disk_entries"], info["evictions"], info["spills"]) == (1, 1, 1, 1)
+    assert len(os.listdir(tmp_path)) == 1
+    assert cache.get(("fp", "a", None)) == "aaaaaa"
+    assert cache.info()["disk_hits"] == 1
+    # "a" is back in memory, pushing "b" out to disk
+    assert cache.info()["disk_entries"] == 1 and cache.get(("fp", "b", None)) == "bbbbbb"
+
+def test_oversized_entries_skip_memory(tmp_path):
+    cache = ResultCache(max_bytes=100, max_entry_bytes=4, spill_dir=str(tmp_path))
+    cache.put("big", "é" * 3)  # 6 bytes in UTF-8
+    assert cache.info()["entries"] == 0 and cache.info()["disk_entries"] == 1
+    cache.invalidate()
+    assert len(cache) == 0 and os.listdir(tmp_path) == []
+
+def test_spill_is_bounded(tmp_path):
+    cache = ResultCache(max_bytes=4, max_entry_bytes=4, spill_dir=str(tmp_path), spill_max_bytes=8)
+    for name in "abcd":
+        cache.put(name, name * 4)
+    info = cache.info()
+    assert info["disk_bytes"] <= 8 and len(os.listdir(tmp_path)) == info["disk_entries"] == 2
+
+@pytest.mark.parametrize("sql", [
+    "SELECT uuid, name FROM users",
+    "SELECT * FROM t WHERE note = 'now() or rand()'",
+    "select a -- random()\nfrom t",
+    'SELECT "CURRENT_DATE" FROM t',
+])
+def test_cacheable(sql):
+    assert is_cacheable(sql)
+
+@pytest.mark.parametrize("sql", [
+    "SELECT uuid() AS id",
+    "SELECT UUID ( )",
+    "SELECT * FROM t WHERE day = CURRENT_DATE",
+    "SELECT now()",
+    "SELECT * FROM t ORDER BY random() LIMIT 1",
+    "INSERT INTO t SELECT 1",
+    "SELECT 1; DROP TABLE t",
+    "SELECT * FROM t FOR SHARE",
+])
+def test_not_cacheable(sql):
+    assert not is_cacheable(sql)
+
+def test_normalize_keeps_literals():
+    assert normalize_sql("SELECT  'a  b' -- c\n FROM t ;") == "SELECT 'a  b' FROM t"
@@ -0,0 +1,73 @@
+"""The orjson and stdlib JSON backends must produce byte-identical output."""
+
+import datetime
+import decimal
+import uuid
+
+import pytest
+
+from src.utils import serialize
+
+pytest.importorskip("orjson")
+
+UTC = datetime.timezone.utc
+
+VALUES = {
+    "naive_datetime": datetime.datetime(2024, 1, 2, 3, 4, 5, 678901),
+    "aware_datetime": datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=UTC),
+    "offset_datetime": datetime.datetime(2024, 1, 2, tzinfo=datetime.timezone(datetime.timedelta(hours=-5))),
+    "date": datetime.date(2024, 2, 29),
+    "time": datetime.time(23, 59, 59, 1),
+    "timedelta": datetime.timedelta(days=1, seconds=1, microseconds=500000),
+    "decimal": decimal.Decimal("1234567890.000000001"),
+    "decimal_exponent": decimal.Decimal("1E-7"),
+    "decimal_nan": decimal.Decimal("NaN"),
+    "bytes": b"\x00\xffbinary",
+    "bytearray": bytearray(b"abc"),
+    "memoryview": memoryview(b"xyz"),
+    "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "nan": float("nan"),
+    "infinity": float("inf"),
+    "negative_infinity": float("-inf"),
+    "float": 0.1,
+    "big_int": 2**70,
+    "text": "naïve \"quoted\"  ",
+    "none": None,
+}
+
+@pytest.fixture
+def backends():
+    previous = serialize.backend()
+
+    def encode(build):
+        out = {}
+        for name in ("json", "orjson"):
+            serialize.use_backend(name)
+            out[name] = build()
+        return out
+
+    yield encode
+    serialize.use_backend(previous)
+
+@pytest.mark.parametrize("name", list(VALUES))
+def test_values_encode_identically(backends, name):
+    out = backends(lambda: serialize.dumps({"v": VALUES[name], "list": [VALUES[name]]}))
+    assert out["json"] == out["orjson"]
+
+def test_non_finite_floats_are_null(backends):
+    out = backends(lambda: serialize.dumps({"a": [float("nan"), (float("inf"), 1.5)]}))
+    assert out["json"] == out["orjson"] == b'{"a":[null,[null,1.5]]}'
+
+@pytest.mark.parametrize("kinds", [None, "declared"])
+def test_row_encoder_output_is_identical(backends, kinds):
+    columns = list(VALUES)
+    rows = [tuple(VALUES.values()), tuple(None for _ in columns)]
+    declared = [serialize._kind_of(v) for v in VALUES.values()] if kinds else None
+
+    def build():
+        encoder = serialize.RowEncoder(columns, declared)
+        return b"".join(serialize.iter_json_chunks([encoder.rows(rows)], "json"))
+
+    out = backends(build)
+    assert out["json"] == out["orjson"]
+    assert b'"decimal":"1234567890.000000001"' in out["json"] and b'"uuid":"12345678-' in out["json"]